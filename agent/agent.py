@@ -4,17 +4,19 @@ IPL Tweet Agent - Agent for generating viral IPL cricket tweets using MCP server
 """
 
 import os
+import sys
 import asyncio
-from typing import Dict, Any, Optional, List, Literal
+import logging
+import argparse
+from typing import Dict, Any, Optional, Literal
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# LangChain imports
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langgraph.prebuilt import create_react_agent
+# LangChain imports (langchain_openai and langgraph.prebuilt are imported on first
+# use: the OpenAI SDK is about half of the API's import time)
+from langchain_core.messages import HumanMessage, AIMessage
 
 # Import the MCP client manager
 from mcp_client import MCPClientManager
@@ -22,60 +24,172 @@ from mcp_client import MCPClientManager
 # Import prompt templates
 from prompts.ipl_tweet_agent_prompt import IPLTweetAgentPrompts
 
+# Process-wide pooled HTTP client for the chat model
+from http_client import get_llm_http_client, llm_http_timeout
+
+# Per-request time budgets
+from deadline import Deadline, DeadlineExceeded, run_within
+
+# Fast failure while the MCP server or a model is down
+from circuit_breaker import CircuitOpen
+
+# Pre-match drafts filled in locally for common scenarios
+from draft_cache import draft_cache
+
+# Deterministic fetch-prompt -> write-tweet pipeline
+from tweet_graph import TweetPipelineDeps, get_tweet_graph
+
+# Per tweet type / priority model selection with SLO fallback
+from model_router import model_router
+
+# Structured logs written off the event loop
+from json_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
 class IPLTweetAgent:
     """Agent that generates viral IPL cricket tweets using MCP servers."""
     
-    def __init__(self, model_name: str = "gpt-4o"):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        pipeline: Optional[Literal["graph", "react"]] = None
+    ):
         """Initialize the IPL Tweet Agent.
         
         Args:
-            model_name: The name of the OpenAI model to use
+            model_name: The default OpenAI model (MODEL_NAME, else gpt-4o). The graph
+                pipeline picks the model per request through the model router.
+            pipeline: "graph" for the deterministic two-node pipeline (default) or
+                "react" for the original tool-calling ReAct agent. Defaults to the
+                AGENT_PIPELINE environment variable.
         """
-        self.model_name = model_name
+        self.model_name = model_name or os.getenv("MODEL_NAME", "gpt-4o")
+        self.pipeline = pipeline or os.getenv("AGENT_PIPELINE", "graph")
+        self.validate_tweets = os.getenv("AGENT_VALIDATE_TWEETS", "false").lower() == "true"
         self.llm = None
+        self.llms: Dict[str, Any] = {}
         self.agent = None
         self.mcp_client_manager = None
         self.system_prompt = IPLTweetAgentPrompts.get_system_prompt()
     
+    def _create_llm(self, model_name: Optional[str] = None):
+        """Create the chat model for the configured LLM backend."""
+        model_name = model_name or self.model_name
+        if os.getenv("LLM_BACKEND", "openai") == "simulated":
+            from simulated_llm import SimulatedChatModel
+            return SimulatedChatModel(model_name=model_name)
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=model_name,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_llm_http_client(),
+            timeout=llm_http_timeout()
+        )
+    
     async def setup(self):
         """Set up the agent with the appropriate model and MCP tools."""
-        # Initialize the OpenAI LLM
-        self.llm = ChatOpenAI(model=self.model_name, api_key=os.getenv("OPENAI_API_KEY"))
+        # Initialize the chat model
+        self.llm = self.get_llm(self.model_name)
         
         # Initialize the MCP client manager
         self.mcp_client_manager = MCPClientManager()
-        await self.mcp_client_manager.setup()
+        try:
+            await self.mcp_client_manager.setup()
+        except Exception as e:
+            if self.pipeline == "react":
+                raise
+            # The graph pipeline renders the bundled templates until the server is back
+            logger.warning(f"MCP server unavailable, continuing without it: {str(e)}")
         
         # Get tools from the MCP client manager
         mcp_tools = self.mcp_client_manager.get_tools()
-        print(f"Loaded {len(mcp_tools)} tools from MCP servers")
+        logger.info(f"Loaded {len(mcp_tools)} tools from MCP servers")
         
-        # Create the ReAct agent with MCP tools
-        self.agent = create_react_agent(
-            self.llm,
-            mcp_tools,
-            prompt=self.system_prompt
-        )
+        if self.pipeline == "react":
+            from langgraph.prebuilt import create_react_agent
+            # Create the ReAct agent with MCP tools
+            self.agent = create_react_agent(
+                self.llm,
+                mcp_tools,
+                prompt=self.system_prompt
+            )
+        else:
+            # The compiled graph is shared by every agent in the process
+            self.agent = get_tweet_graph()
+    
+    def get_llm(self, model_name: str):
+        """Chat model for the given model name (created once per agent)."""
+        if model_name not in self.llms:
+            self.llms[model_name] = self._create_llm(model_name)
+        return self.llms[model_name]
+    
+    def _pipeline_config(self, deadline: Optional[Deadline] = None, llm: Any = None) -> Dict[str, Any]:
+        """Run config handing this agent's dependencies to the tweet graph."""
+        return {
+            "configurable": {
+                "pipeline": TweetPipelineDeps(
+                    llm=llm or self.llm,
+                    mcp_client_manager=self.mcp_client_manager,
+                    system_prompt=self.system_prompt,
+                    validate=self.validate_tweets,
+                    deadline=deadline,
+                )
+            }
+        }
     
     async def generate_tweet(
         self, 
         cricket_moment: str, 
-        tweet_type: Literal["standard", "one_liner"] = "standard"
+        tweet_type: Literal["standard", "one_liner"] = "standard",
+        deadline: Optional[Deadline] = None,
+        candidates: int = 1,
+        priority: str = "normal",
+        drafts: bool = True
     ) -> Dict[str, Any]:
         """Generate a viral tweet for an IPL cricket moment.
         
         Args:
             cricket_moment: Description of the cricket moment to tweet about
             tweet_type: Type of tweet to generate ("standard" or "one_liner")
+            deadline: Optional request deadline enforced on every MCP and LLM call
+            candidates: Number of tweets to request from a single model call; they are
+                ranked locally and returned best first under "ranked_tweets"
+                (graph pipeline only)
+            priority: Request lane, used with the tweet type to route to a model
+                (graph pipeline only)
+            drafts: False to skip the pre-match drafts, when the caller has already
+                tried them (graph pipeline only)
             
         Returns:
             Generated tweet and analysis
+            
+        Raises:
+            DeadlineExceeded: if the deadline runs out before the tweet is written
+            CircuitOpen: if a dependency the request needs is failing fast
         """
+        if drafts and self.pipeline != "react":
+            # Common scenarios are served from the pre-match drafts without any MCP or model call
+            await draft_cache.refresh()
+            drafted = draft_cache.fill(cricket_moment, tweet_type, candidates)
+            if drafted is not None:
+                return drafted
+        
         if not self.agent:
-            await self.setup()
+            await run_within(deadline, self.setup(), "setup")
             
         try:
-            print(f"Generating viral {tweet_type} tweet for cricket moment: {cricket_moment[:50]}...")
+            logger.info(
+                f"Generating viral {tweet_type} tweet for cricket moment: {cricket_moment[:50]}...",
+                extra={"tweet_type": tweet_type, "priority": priority},
+            )
+            
+            if self.pipeline != "react":
+                llm = self.get_llm(model_router.select(tweet_type, priority))
+                return await self.agent.ainvoke(
+                    {"cricket_moment": cricket_moment, "tweet_type": tweet_type, "candidates": candidates},
+                    config=self._pipeline_config(deadline, llm)
+                )
             
             # Step 1: Get the viral tweet prompt using the appropriate MCP tool
             if tweet_type == "one_liner":
@@ -87,11 +201,11 @@ class IPLTweetAgent:
                     cricket_moment=cricket_moment
                 )
             
-            prompt_result = await self.agent.ainvoke({
+            prompt_result = await run_within(deadline, self.agent.ainvoke({
                 "messages": [
                     HumanMessage(content=prompt_request)
                 ]
-            })
+            }), "prompt_fetch")
             
             # Find the AI's response containing the prompt
             ai_messages = [msg for msg in prompt_result["messages"] if isinstance(msg, AIMessage)]
@@ -115,17 +229,17 @@ class IPLTweetAgent:
             tweet_messages = prompt_result["messages"] + [HumanMessage(content=tweet_request)]
             
             # Generate the tweet
-            tweet_result = await self.agent.ainvoke({
+            tweet_result = await run_within(deadline, self.agent.ainvoke({
                 "messages": tweet_messages
-            })
+            }), "write")
             
             return tweet_result
             
+        except (DeadlineExceeded, CircuitOpen):
+            raise
         except Exception as e:
             error_message = f"An error occurred while generating the tweet: {str(e)}"
-            print(error_message)
-            import traceback
-            print(traceback.format_exc())
+            logger.exception(error_message, extra={"tweet_type": tweet_type})
             return {
                 "messages": [
                     HumanMessage(content=f"Generate viral tweet for cricket moment: {cricket_moment}"),
@@ -158,8 +272,8 @@ async def run_tweet_generation(
         print("\nERROR: OPENAI_API_KEY not found in .env file.")
         return None
     
-    # Initialize the agent
-    agent = IPLTweetAgent(model_name="gpt-4o")
+    # Initialize the agent (model from MODEL_NAME / MODEL_ROUTES)
+    agent = IPLTweetAgent()
     
     try:
         results = {}
@@ -210,7 +324,28 @@ async def run_tweet_generation(
         await agent.close()
 
 async def main():
-    """Example of using the run_tweet_generation function."""
+    """Generate tweets for a JSONL file of moments (--input), or for an example moment."""
+    setup_logging("agent")
+    parser = argparse.ArgumentParser(description="Generate viral IPL tweets")
+    parser.add_argument("--input", help='JSONL file of cricket moments to generate for ("-" for stdin)')
+    parser.add_argument("--output", default="tweets.jsonl", help="JSONL file results are written to as they complete")
+    parser.add_argument("--concurrency", type=int, default=4, help="Generations running at once")
+    parser.add_argument("--tweet-type", default="standard", choices=["standard", "one_liner"],
+                        help="Tweet type for lines that don't set one")
+    parser.add_argument("--candidates", type=int, default=1, help="Candidates for lines that don't set them")
+    parser.add_argument("--timeout", type=float, default=0.0, help="Seconds allowed per moment (0 = no limit)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the output file and skip ids it already has a successful line for")
+    args = parser.parse_args()
+    
+    if args.input:
+        # Imported here: the batch module builds on this one
+        from batch_generation import run_batch
+        await run_batch(
+            args.input, args.output, args.concurrency, args.tweet_type, args.candidates, args.timeout, args.resume
+        )
+        return
+    
     # Example cricket moment
     cricket_moment = """
     Rohit Sharma just hit a towering six off Pat Cummins that landed on the stadium roof. 
@@ -224,4 +359,8 @@ async def main():
         print("\nTweet generation completed successfully!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # A batch's finished results are already on disk; rerun with --resume to continue
+        sys.exit(130)
@@ -3,26 +3,69 @@ FastAPI Application for IPL Tweet Generator
 """
 
 import os
+import asyncio
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import MutableHeaders
 import uvicorn
 import time
-import traceback
+from contextlib import asynccontextmanager
 
 # Import API routes
 from routes.v1 import router as v1_router
 
+# In-process agent metrics
+from metrics import registry, CONTENT_TYPE_LATEST
+
+# Shared HTTP connection pool for the chat model
+from http_client import close_llm_http_client
+
+# Background-written SQLite log of generations
+from generation_store import generation_store
+
+# Optional capture of incoming requests for replay
+from traffic_capture import traffic_capture
+
+# tracemalloc instrumentation (MEMORY_TRACING)
+from memory_tracking import memory_tracker
+
+# Live ball-by-ball feed ingestion (started when FEED_PATH / FEED_SOCKET_PORT is set)
+from feed_ingestion import FeedIngestor, source_from_env
+
+# Structured JSON logs, written by a background thread
+from json_logging import setup_logging
+
+# Startup warm-up behind /ready
+from warmup import warmup
+
 # Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging("agent")
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up and start feed ingestion if configured; release process-wide resources on shutdown"""
+    memory_tracker.start()
+    # In the background: the port opens now, /ready reports when the replica can serve
+    warmup_task = asyncio.create_task(warmup.run())
+    feed_task = None
+    feed_source = source_from_env()
+    if feed_source is not None:
+        feed_task = asyncio.create_task(FeedIngestor().run(feed_source))
+    yield
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+    if feed_task is not None:
+        feed_task.cancel()
+        await asyncio.gather(feed_task, return_exceptions=True)
+    await close_llm_http_client()
+    generation_store.flush()
+    traffic_capture.close()
+
 # Create FastAPI app with metadata
 app = FastAPI(
     title="IPL Tweet Generator API",
@@ -30,6 +73,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,  # Disable default docs
     redoc_url=None,  # Disable redoc docs
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -42,29 +86,51 @@ app.add_middleware(
 )
 
 # Performance monitoring middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add X-Process-Time header to response"""
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
-    except Exception as e:
-        logger.error(f"Request error: {str(e)}")
-        logger.error(traceback.format_exc())
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"},
-        )
+class ProcessTimeMiddleware:
+    """Add X-Process-Time header to response
+    
+    Plain ASGI middleware rather than @app.middleware("http"): the latter wraps the
+    receive channel, which hides client disconnects from the route handlers.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.time()
+        response_started = False
+        
+        async def send_with_process_time(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                process_time = time.time() - start_time
+                MutableHeaders(scope=message).append("X-Process-Time", str(process_time))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_process_time)
+        except Exception as e:
+            logger.exception(f"Request error: {str(e)}", extra={"path": scope.get("path")})
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Internal server error"},
+            )
+            await response(scope, receive, send)
+
+app.add_middleware(ProcessTimeMiddleware)
 
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Handle all unhandled exceptions"""
-    logger.error(f"Unhandled exception: {str(exc)}")
-    logger.error(traceback.format_exc())
+    logger.error(f"Unhandled exception: {str(exc)}", exc_info=exc, extra={"path": request.url.path})
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal server error"},
@@ -98,9 +164,34 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
+    """Liveness: the process is up (see /ready for whether it can serve)"""
     return {"status": "healthy"}
 
+# Readiness endpoint
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once warmed up and while the required dependencies are available, else 503"""
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose agent metrics in the Prometheus text format"""
+    return Response(registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+# Memory debugging endpoint
+@app.get("/debug/memory", include_in_schema=False)
+async def debug_memory(request: Request, limit: int = 25, group_by: str = "lineno", compare: bool = False):
+    """Top allocating source lines and recent per-request memory reports (MEMORY_TRACING only)"""
+    if not memory_tracker.enabled:
+        return JSONResponse(status_code=404, content={"detail": "Memory tracing is disabled (set MEMORY_TRACING=true)"})
+    if not memory_tracker.authorized(request.headers.get("X-Memory-Debug") or request.query_params.get("debug")):
+        return JSONResponse(status_code=403, content={"detail": "Pass the memory tracing token in X-Memory-Debug or ?debug="})
+    if group_by not in ("lineno", "filename", "traceback"):
+        return JSONResponse(status_code=400, content={"detail": "group_by must be lineno, filename or traceback"})
+    return await memory_tracker.summary(limit, group_by, compare)
+
 if __name__ == "__main__":
     # Get port from environment or use default
     port = int(os.getenv("API_PORT", "8000"))
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+"""
+Batch Generation - Tweets for a JSONL file of cricket moments
+
+Streams moments from a JSONL file (or stdin), one object per line:
+
+    {"id": "m1-18.6", "cricket_moment": "Rohit hits Cummins onto the roof", "tweet_type": "one_liner"}
+
+Only ``cricket_moment`` is required. ``id`` defaults to the line number, and
+``tweet_type`` (standard or one_liner) and ``candidates`` (clamped to 1-5, as in the
+API) to the command-line values. Lines that don't parse are counted and skipped,
+and a moment whose generation fails gets an error line. ``--concurrency``
+generations run at once in the ``batch`` scheduler lane over one shared agent and
+MCP session. The input is read only as fast as the workers take moments, so large
+files are never loaded whole. Every result is appended to the output JSONL and
+flushed as soon as it completes, so lines come out of input order and carry the id:
+
+    {"id": "m1-18.6", "status": "success", "tweet": "...", "candidates": [], "model": "gpt-4o", "latency_ms": 812.4}
+
+``--resume`` keeps the existing output and skips ids that already have a
+successful line. An interrupted run is therefore continued by running the same
+command again with ``--resume``. Failed ids are retried. Throughput and latency
+stats are printed when the run ends, including when it is interrupted.
+
+    python agent.py --input moments.jsonl --output tweets.jsonl --concurrency 8 [--resume]
+    cat moments.jsonl | python agent.py --input - --output tweets.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, IO, List, Optional, Set
+
+from agent import IPLTweetAgent
+from deadline import Deadline, DeadlineExceeded
+from circuit_breaker import CircuitOpen
+from generation_store import generation_store, moment_hash, text_hash
+from memory_tracking import release_history
+from scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+TWEET_TYPES = ("standard", "one_liner")
+MAX_CANDIDATES = 5
+
+@dataclass
+class BatchItem:
+    """One moment to generate for, as read from the input."""
+
+    id: str
+    cricket_moment: str
+    tweet_type: str
+    candidates: int
+
+@dataclass
+class BatchStats:
+    """Outcome counts and per-item latencies of a batch run."""
+
+    started: float = field(default_factory=time.monotonic)
+    read: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+    latencies: List[float] = field(default_factory=list)
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        done = sum(self.statuses.values())
+        lines = [
+            f"{done} generated in {elapsed:.1f}s ({done / elapsed if elapsed else 0.0:.2f}/s), "
+            f"{self.skipped} skipped as already done, {self.invalid} invalid lines",
+            "status: " + (", ".join(f"{status} {count}" for status, count in sorted(self.statuses.items())) or "none"),
+        ]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            pick = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+            lines.append(
+                f"latency: p50 {pick(50):.2f}s, p95 {pick(95):.2f}s, p99 {pick(99):.2f}s, max {ordered[-1]:.2f}s"
+            )
+        return "\n".join(lines)
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids with a successful line in an existing output file.
+
+    A trailing partial line, left by a run killed mid-write, is cut off so that
+    appended results start on a line of their own.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "rb+") as output_file:
+        data = output_file.read()
+        if data and not data.endswith(b"\n"):
+            output_file.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    done = set()
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("status") == "success":
+            done.add(str(record.get("id")))
+    return done
+
+def _parse_item(line: str, line_number: int, tweet_type: str, candidates: int) -> Optional[BatchItem]:
+    line = line.strip()
+    if not line:
+        return None
+    data = json.loads(line)
+    if not isinstance(data, dict) or not str(data.get("cricket_moment") or "").strip():
+        raise ValueError("cricket_moment is required")
+    item_type = data.get("tweet_type") or tweet_type
+    if item_type not in TWEET_TYPES:
+        raise ValueError(f"tweet_type must be one of {', '.join(TWEET_TYPES)}, got {item_type!r}")
+    try:
+        item_candidates = int(data.get("candidates") or candidates)
+    except (TypeError, ValueError):
+        raise ValueError(f"candidates must be a number, got {data.get('candidates')!r}")
+    return BatchItem(
+        id=str(data.get("id", line_number)),
+        cricket_moment=data["cricket_moment"],
+        tweet_type=item_type,
+        candidates=min(max(item_candidates, 1), MAX_CANDIDATES),
+    )
+
+def _tweets(result: Dict[str, Any]) -> List[str]:
+    """Generated tweet(s) of an agent result, best first."""
+    if result.get("error"):
+        return []
+    if result.get("ranked_tweets"):
+        return [candidate["content"] for candidate in result["ranked_tweets"]]
+    ai_messages = [msg.content for msg in result.get("messages", []) if getattr(msg, "type", None) == "ai"]
+    return [ai_messages[-1]] if ai_messages else []
+
+class BatchRunner:
+    """Generates tweets for a stream of moments with a fixed number of workers."""
+
+    def __init__(
+        self,
+        output: IO[str],
+        concurrency: int = 4,
+        tweet_type: str = "standard",
+        candidates: int = 1,
+        timeout: float = 0.0,
+        skip_ids: Optional[Set[str]] = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            output: Text file results are appended to, one JSON line each
+            concurrency: Generations running at once
+            tweet_type: Tweet type for lines that don't set one
+            candidates: Candidates for lines that don't set them
+            timeout: Seconds allowed per moment (0 = no limit)
+            skip_ids: Ids already done, from a previous run's output
+        """
+        self.output = output
+        self.concurrency = concurrency
+        self.tweet_type = tweet_type
+        self.candidates = candidates
+        self.timeout = timeout
+        self.skip_ids = skip_ids or set()
+        self.agent = IPLTweetAgent()
+        self.stats = BatchStats()
+        # One line in flight at a time, so workers' results never interleave
+        self._write_lock = asyncio.Lock()
+
+    def _write_line(self, line: str) -> None:
+        self.output.write(line)
+        self.output.flush()
+
+    async def _read(self, source: IO[str], queue: "asyncio.Queue[Optional[BatchItem]]") -> None:
+        loop = asyncio.get_running_loop()
+        line_number = 0
+        while True:
+            # readline in a thread: stdin may be a pipe that is still being written to
+            line = await loop.run_in_executor(None, source.readline)
+            if not line:
+                break
+            line_number += 1
+            try:
+                item = _parse_item(line, line_number, self.tweet_type, self.candidates)
+            except ValueError as e:
+                self.stats.invalid += 1
+                logger.warning(f"Skipping input line {line_number}: {str(e)}")
+                continue
+            if item is None:
+                continue
+            self.stats.read += 1
+            if item.id in self.skip_ids:
+                self.stats.skipped += 1
+                continue
+            # Bounded queue: reading waits for the workers
+            await queue.put(item)
+        for _ in range(self.concurrency):
+            await queue.put(None)
+
+    async def _worker(self, queue: "asyncio.Queue[Optional[BatchItem]]") -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await self._generate(item)
+
+    async def _generate(self, item: BatchItem) -> None:
+        request_id = f"batch-{item.id}"
+        started = time.monotonic()
+        status, error, tweets, result = "success", None, [], {}
+        deadline = Deadline(self.timeout) if self.timeout > 0 else None
+        try:
+            async with scheduler.slot("batch", deadline):
+                result = await self.agent.generate_tweet(
+                    item.cricket_moment, item.tweet_type, deadline, item.candidates, "batch"
+                )
+            tweets = _tweets(result)
+            if not tweets:
+                status = "error"
+                error = str(result["messages"][-1].content) if result.get("messages") else "No tweet generated"
+        except DeadlineExceeded as e:
+            status, error = "deadline_exceeded", str(e)
+        except CircuitOpen as e:
+            status, error = "circuit_open", str(e)
+        except Exception as e:
+            # Lane full, MCP or model errors: fail this moment only, the run goes on
+            status, error = "error", f"{type(e).__name__}: {e}"
+
+        latency = time.monotonic() - started
+        model = result.get("model") or self.agent.model_name
+        self.stats.statuses[status] = self.stats.statuses.get(status, 0) + 1
+        if status == "success":
+            self.stats.latencies.append(latency)
+        else:
+            logger.warning(f"Batch item {item.id} failed: {error}", extra={"request_id": request_id})
+
+        record = {
+            "id": item.id,
+            "status": status,
+            "tweet_type": item.tweet_type,
+            "tweet": tweets[0] if tweets else None,
+            "candidates": tweets[1:],
+            "model": model,
+            "latency_ms": round(latency * 1000, 1),
+        }
+        if error:
+            record["error"] = error
+        # One write and flush per result, so an interrupted run loses at most a partial line;
+        # done in a thread so a slow disk doesn't stall the other workers
+        async with self._write_lock:
+            await asyncio.to_thread(self._write_line, json.dumps(record, ensure_ascii=False) + "\n")
+
+        tweet = tweets[0] if tweets else None
+        generation_store.record(
+            request_id=request_id,
+            tweet_type=item.tweet_type,
+            cricket_moment=item.cricket_moment,
+            moment_hash=moment_hash(item.cricket_moment),
+            prompt_hash=text_hash(result.get("prompt")),
+            tweet=tweet,
+            tweet_hash=text_hash(tweet),
+            candidates=tweets[1:] or None,
+            model=model,
+            status=status,
+            error=error,
+            latency_ms=latency * 1000,
+        )
+        release_history(result)
+
+    async def run(self, source: IO[str]) -> BatchStats:
+        """Generate for every moment in the source and return the stats."""
+        # Set up once: every worker shares the agent, its models and the MCP session
+        await self.agent.setup()
+        queue: "asyncio.Queue[Optional[BatchItem]]" = asyncio.Queue(maxsize=self.concurrency * 2)
+        reader = asyncio.create_task(self._read(source, queue))
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(reader, *workers)
+        finally:
+            reader.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(reader, *workers, return_exceptions=True)
+            await self.agent.close()
+        return self.stats
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    tweet_type: str = "standard",
+    candidates: int = 1,
+    timeout: float = 0.0,
+    resume: bool = False,
+) -> BatchStats:
+    """Run a batch from a JSONL file ("-" for stdin) into a JSONL output file.
+
+    Args:
+        input_path: JSONL file of moments, or "-" to read stdin
+        output_path: JSONL file results are written to
+        concurrency: Generations running at once
+        tweet_type: Tweet type for lines that don't set one
+        candidates: Candidates for lines that don't set them
+        timeout: Seconds allowed per moment (0 = no limit)
+        resume: Keep the output file and skip ids it already has a success for
+
+    Returns:
+        The run's stats (also printed to stderr)
+    """
+    # File I/O in threads, off the loop the workers run on
+    skip_ids = await asyncio.to_thread(completed_ids, output_path) if resume else set()
+    source = sys.stdin if input_path == "-" else await asyncio.to_thread(open, input_path, encoding="utf-8")
+    output = await asyncio.to_thread(open, output_path, "a" if resume else "w", encoding="utf-8")
+    runner = BatchRunner(output, concurrency, tweet_type, candidates, timeout, skip_ids)
+    try:
+        return await runner.run(source)
+    finally:
+        await asyncio.to_thread(output.close)
+        if source is not sys.stdin:
+            await asyncio.to_thread(source.close)
+        await asyncio.to_thread(generation_store.flush)
+        print(runner.stats.summary(), file=sys.stderr)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Broadcast Load - Thousands of simulated dashboards on the tweet stream
+
+Starts the agent API in a child process and connects ``--clients`` raw-socket
+SSE clients to ``/v1/tweets/stream``. ``--slow-share`` of them stop reading after
+the first message, and have a small receive buffer. It then publishes
+``--messages`` tweet events at ``--rate`` per second straight into the server's
+broadcaster, with no model involved, and reports:
+
+- the delivery latency seen by the clients that keep up
+- how many messages each group received
+- how many slow clients were dropped
+- how long each ``publish`` call took, which is the cost the generation path pays
+
+A stalled connection first fills the kernel socket buffers, which can hold a few MB
+on loopback. Only after that does its queue back up and get it dropped. Publish
+enough data to get past them, for example ``--messages 3000 --payload-bytes 2000``.
+
+    cd agent && python -m benchmarks.broadcast_load --clients 2000 --slow-share 0.05 --messages 300 --rate 10
+"""
+
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List
+
+import uvicorn
+
+from benchmarks.common import latency_summary, print_table
+
+def _serve(port: int, messages: int, rate: float, payload_bytes: int, conn: Connection) -> None:
+    """Child process: the agent API plus a publisher that starts on request."""
+    import app
+    from tweet_broadcast import tweet_broadcaster
+
+    server = uvicorn.Server(uvicorn.Config(
+        app.app, host="127.0.0.1", port=port, log_level="warning", backlog=4096, timeout_keep_alive=60,
+    ))
+
+    async def publisher() -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, conn.recv)
+        padding = "x" * payload_bytes
+        publish_seconds = []
+        for index in range(messages):
+            started = time.perf_counter()
+            tweet_broadcaster.publish({"tweet": f"HITMAN SPECIAL #{index}! {padding}", "source": "load", "ts": time.time()})
+            publish_seconds.append(time.perf_counter() - started)
+            await asyncio.sleep(1.0 / rate)
+        # Give the subscribers time to drain before reporting
+        await loop.run_in_executor(None, conn.recv)
+        conn.send((publish_seconds, tweet_broadcaster.status()))
+        server.should_exit = True
+
+    async def serve() -> None:
+        task = asyncio.create_task(publisher())
+        await server.serve()
+        task.cancel()
+
+    asyncio.run(serve())
+
+def _wait_listening(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1.0).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("The agent API did not start")
+
+class _Client:
+    """Minimal SSE client over a raw socket, cheap enough to run thousands of."""
+
+    def __init__(self, index: int, slow: bool):
+        self.index = index
+        self.slow = slow
+        self.received = 0
+        self.dropped = False
+        self.latencies: List[float] = []
+        self.connected = asyncio.Event()
+
+    async def run(self, port: int, stop: asyncio.Event) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.slow:
+            # A stalled dashboard on a poor connection: tiny window, and it stops reading
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=1 << 20)
+        writer.write(b"GET /v1/tweets/stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        await writer.drain()
+        try:
+            while not stop.is_set():
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b"HTTP/1.1 200"):
+                    self.connected.set()
+                elif line.startswith(b"event: dropped"):
+                    self.dropped = True
+                    return
+                elif line.startswith(b"data: "):
+                    # Chunked transfer encoding wraps frames in size lines; only data lines matter
+                    event = json.loads(line[6:])
+                    self.received += 1
+                    self.latencies.append(time.time() - event["ts"])
+                    if self.slow:
+                        await stop.wait()
+                        self.dropped = await self._read_until_dropped(reader)
+                        return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_until_dropped(reader: asyncio.StreamReader, timeout: float = 5.0) -> bool:
+        """Read the backlog a stalled client left behind, looking for the server's goodbye."""
+        try:
+            async with asyncio.timeout(timeout):
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        return False
+                    if line.startswith(b"event: dropped"):
+                        return True
+        except TimeoutError:
+            return False
+
+def _raise_fd_limit(needed: int) -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(
+        target=_serve, args=(args.port, args.messages, args.rate, args.payload_bytes, child_conn), daemon=True,
+    )
+    server.start()
+    _wait_listening(args.port)
+
+    stop = asyncio.Event()
+    slow_count = int(args.clients * args.slow_share)
+    clients = [_Client(index, slow=index < slow_count) for index in range(args.clients)]
+    tasks = []
+    for offset in range(0, len(clients), 200):
+        # Connect in waves so the accept backlog keeps up
+        batch = clients[offset:offset + 200]
+        tasks.extend(asyncio.create_task(client.run(args.port, stop)) for client in batch)
+        await asyncio.wait_for(asyncio.gather(*(client.connected.wait() for client in batch)), 30)
+    print(f"{len(clients)} clients connected ({slow_count} slow), publishing {args.messages} messages at {args.rate:g}/s")
+
+    parent_conn.send("start")
+    await asyncio.sleep(args.messages / args.rate + args.drain_seconds)
+    parent_conn.send("report")
+    publish_seconds, status = await asyncio.get_running_loop().run_in_executor(None, parent_conn.recv)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    server.join(10)
+
+    rows = []
+    for name, group in (("keeping up", [c for c in clients if not c.slow]), ("slow", [c for c in clients if c.slow])):
+        if not group:
+            continue
+        latencies = [latency for client in group for latency in client.latencies]
+        summary = latency_summary(latencies)
+        rows.append({
+            "clients": f"{name} ({len(group)})",
+            "msgs_min": min(client.received for client in group),
+            "msgs_max": max(client.received for client in group),
+            "dropped": sum(1 for client in group if client.dropped),
+            "p50_ms": summary["p50"] * 1000,
+            "p99_ms": summary["p99"] * 1000,
+            "max_ms": summary["max"] * 1000,
+        })
+    publish_summary = latency_summary(publish_seconds)
+    print_table(rows, ["clients", "msgs_min", "msgs_max", "dropped", "p50_ms", "p99_ms", "max_ms"])
+    print(
+        f"\npublish(): p50 {publish_summary['p50'] * 1e6:.0f}us, p99 {publish_summary['p99'] * 1e6:.0f}us, "
+        f"max {publish_summary['max'] * 1e6:.0f}us for {args.clients} subscribers; "
+        f"server dropped {status['dropped_subscribers']} subscribers"
+    )
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan-out of the tweet stream to many local SSE clients")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--slow-share", type=float, default=0.05, help="Share of clients that stop reading")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=10.0, help="Messages published per second")
+    parser.add_argument("--payload-bytes", type=int, default=500, help="Padding added to every tweet")
+    parser.add_argument("--drain-seconds", type=float, default=3.0)
+    parser.add_argument("--buffer", type=int, default=32, help="BROADCAST_BUFFER for the server")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    os.environ["BROADCAST_BUFFER"] = str(args.buffer)
+    os.environ["BROADCAST_MAX_SUBSCRIBERS"] = str(args.clients)
+
+    _raise_fd_limit(2 * args.clients + 256)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
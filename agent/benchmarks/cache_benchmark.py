@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Cache Benchmark - Result cache latency and hit rate across worker processes
+
+Starts several processes that each run a mix of get/set operations over a shared
+key space, the way uvicorn workers hit the result cache, and reports get/set
+latency percentiles and the overall hit rate for every backend. The memory backend
+shows what per-worker caches do to the hit rate; the sqlite backend shows the cost
+of sharing under write contention.
+
+    cd agent && python -m benchmarks.cache_benchmark --workers 4 --ops 5000
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+from typing import Any, Dict, List
+
+from benchmarks.common import latency_summary, print_table
+from result_cache import MemoryCache, SQLiteCache
+
+# A cached generation: a couple of ranked tweets
+_VALUE = [
+    {"content": "HITMAN SPECIAL! 🔥💥\n\nRohit Sharma just sent that one into orbit!\n\n#RohitSharma #MIPaltan",
+     "tweet_type": "standard", "rank": 1, "score": 1.2, "weighted_length": 96, "repaired": False},
+    {"content": "THAT SOUND! 💥\n\nPull shot, pure timing, ball gone. Classic Ro45!\n\n#RohitSharma #IPL2025",
+     "tweet_type": "standard", "rank": 2, "score": 1.1, "weighted_length": 90, "repaired": False},
+]
+
+def _worker(backend: str, path: str, ops: int, keys: int, write_ratio: float, seed: int, results) -> None:
+    cache = SQLiteCache(path, max_entries=keys) if backend == "sqlite" else MemoryCache(max_entries=keys)
+    rng = random.Random(seed)
+    gets: List[float] = []
+    sets: List[float] = []
+    hits = 0
+    for _ in range(ops):
+        # Popular moments are requested far more often than the long tail
+        key = f"moment-{int(rng.paretovariate(1.2)) % keys}"
+        started = time.perf_counter()
+        value = cache.get(key)
+        gets.append(time.perf_counter() - started)
+        if value is not None:
+            hits += 1
+        if value is None or rng.random() < write_ratio:
+            started = time.perf_counter()
+            cache.set(key, _VALUE, ttl=300)
+            sets.append(time.perf_counter() - started)
+    results.put({"gets": gets, "sets": sets, "hits": hits})
+
+def run(backend: str, workers: int, ops: int, keys: int, write_ratio: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "result_cache.db")
+        if backend == "sqlite":
+            SQLiteCache(path)
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker, args=(backend, path, ops, keys, write_ratio, seed, results))
+            for seed in range(workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+    gets = [value for result in collected for value in result["gets"]]
+    sets = [value for result in collected for value in result["sets"]]
+    get_latency = latency_summary(gets)
+    set_latency = latency_summary(sets)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "ops/s": len(gets) / elapsed,
+        "hit_rate": sum(result["hits"] for result in collected) / len(gets),
+        "get_p50_us": get_latency["p50"] * 1e6,
+        "get_p99_us": get_latency["p99"] * 1e6,
+        "set_p50_us": set_latency["p50"] * 1e6,
+        "set_p99_us": set_latency["p99"] * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Result cache backends under multi-process contention")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent worker processes")
+    parser.add_argument("--ops", type=int, default=5000, help="Lookups per worker")
+    parser.add_argument("--keys", type=int, default=500, help="Distinct moments")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="Share of hits that rewrite the entry")
+    args = parser.parse_args()
+
+    rows = [run(backend, args.workers, args.ops, args.keys, args.write_ratio) for backend in ("memory", "sqlite")]
+    print_table(rows, ["backend", "workers", "ops/s", "hit_rate", "get_p50_us", "get_p99_us",
+                       "set_p50_us", "set_p99_us"])
+
+if __name__ == "__main__":
+    main()
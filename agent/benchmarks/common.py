@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Shared helpers for the agent benchmarks
+"""
+
+import math
+from typing import Any, Dict, List, Sequence
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Representative cricket moments used when no input file is given
+SAMPLE_MOMENTS = [
+    "Rohit Sharma just hit a towering six off Pat Cummins that landed on the stadium roof, 110 meters.",
+    "Rohit Sharma pulls Mohammed Siraj over deep square leg for six, last ball of the 18th over.",
+    "Back-to-back fours from Rohit Sharma through the covers, MI need 24 off 12.",
+    "Rohit Sharma reaches his fifty with a straight six off Rashid Khan.",
+    "Rohit Sharma flicks Bumrah's yorker past fine leg for four to bring up the hundred partnership.",
+]
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of a list of latencies in seconds."""
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else 0.0,
+    }
+
+class LLMUsageCallback(AsyncCallbackHandler):
+    """Counts chat model calls and token usage, for real and simulated models alike."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        self.calls += 1
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+            return
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.prompt_tokens += metadata.get("input_tokens", 0)
+                self.completion_tokens += metadata.get("output_tokens", 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "llm_calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    """Print rows as a fixed-width table."""
+    widths = {
+        column: max(len(column), *(len(_cell(row.get(column))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    print("  ".join("-" * widths[column] for column in columns))
+    for row in rows:
+        print("  ".join(_cell(row.get(column)).ljust(widths[column]) for column in columns))
+
+def _cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Feed Simulator - Append a synthetic ball-by-ball feed to a JSONL file
+
+Writes one delivery per ``--interval`` seconds for an MI innings: mostly dots and
+singles, with fours and sixes for Rohit Sharma often enough to exercise the feed
+ingestion pipeline and its event-to-tweet latency metric.
+
+    cd agent && python -m benchmarks.feed_simulator /tmp/feed.jsonl --balls 60 --interval 0.5
+    # in another shell
+    cd agent && python feed_ingestion.py --file /tmp/feed.jsonl
+"""
+
+import json
+import time
+import random
+import argparse
+
+BATTERS = ["Rohit Sharma", "Ishan Kishan", "Suryakumar Yadav"]
+BOWLERS = ["Pat Cummins", "Mohammed Siraj", "Rashid Khan", "Jasprit Bumrah"]
+COMMENTARY = {
+    6: ["over deep square leg", "straight down the ground", "onto the stadium roof", "over long-on"],
+    4: ["through the covers", "past fine leg", "between point and gully", "down the ground"],
+}
+
+def simulate(path: str, balls: int, interval: float, seed: int) -> None:
+    rng = random.Random(seed)
+    runs_total = 0
+    wickets = 0
+    start_over = 20 - (balls + 5) // 6
+    with open(path, "a", encoding="utf-8") as f:
+        for index in range(balls):
+            over = start_over + index // 6 + (index % 6 + 1) / 10
+            batter = BATTERS[0] if rng.random() < 0.6 else rng.choice(BATTERS[1:])
+            runs = rng.choices([0, 1, 2, 4, 6], weights=[30, 35, 10, 15, 10])[0]
+            runs_total += runs
+            event = {
+                "event_id": f"sim-{seed}-{index}",
+                "match_id": f"sim-{seed}",
+                "over": round(over, 1),
+                "batter": batter,
+                "bowler": rng.choice(BOWLERS),
+                "runs": runs,
+                "ts": time.time(),
+                "team": "MI",
+                "score": f"{runs_total}/{wickets}",
+                "target": 201,
+            }
+            if runs in COMMENTARY:
+                event["commentary"] = rng.choice(COMMENTARY[runs])
+            f.write(json.dumps(event) + "\n")
+            f.flush()
+            time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic ball-by-ball feed")
+    parser.add_argument("path", help="JSONL feed file to append to")
+    parser.add_argument("--balls", type=int, default=60, help="Deliveries to write")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between deliveries")
+    parser.add_argument("--seed", type=int, default=45)
+    args = parser.parse_args()
+    simulate(args.path, args.balls, args.interval, args.seed)
+
+if __name__ == "__main__":
+    main()
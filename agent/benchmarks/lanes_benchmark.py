@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Lanes Benchmark - Live-lane wait times while a backfill floods the agent
+
+Drives the priority-lane scheduler with simulated generations: a batch backfill
+submits far more work than there are slots, while live and normal requests arrive
+at a steady rate. Reports per-lane wait times with the lanes enabled and, for
+comparison, with every request in a single FIFO lane.
+
+    cd agent && python -m benchmarks.lanes_benchmark --backfill 200 --live 40
+"""
+
+import time
+import random
+import argparse
+import asyncio
+from typing import Dict, List
+
+from benchmarks.common import latency_summary, print_table
+from scheduler import LaneScheduler
+
+async def _generation(scheduler: LaneScheduler, lane: str, scheduled_lane: str,
+                      waits: Dict[str, List[float]], work_seconds: float) -> None:
+    started = time.perf_counter()
+    async with scheduler.slot(scheduled_lane):
+        waits[lane].append(time.perf_counter() - started)
+        await asyncio.sleep(random.uniform(0.5, 1.5) * work_seconds)
+
+async def run(lanes_enabled: bool, backfill: int, live: int, normal: int,
+              concurrency: int, work_seconds: float, arrival_interval: float) -> List[Dict]:
+    scheduler = LaneScheduler(concurrency=concurrency, live_reserved=2 if lanes_enabled else 0,
+                              max_queue=backfill + live + normal)
+    waits: Dict[str, List[float]] = {"live": [], "normal": [], "batch": []}
+
+    def lane_for(lane: str) -> str:
+        return lane if lanes_enabled else "normal"
+
+    tasks = [
+        asyncio.create_task(_generation(scheduler, "batch", lane_for("batch"), waits, work_seconds))
+        for _ in range(backfill)
+    ]
+    interactive = ["live"] * live + ["normal"] * normal
+    random.shuffle(interactive)
+    for lane in interactive:
+        await asyncio.sleep(arrival_interval)
+        tasks.append(asyncio.create_task(_generation(scheduler, lane, lane_for(lane), waits, work_seconds)))
+    await asyncio.gather(*tasks)
+
+    rows = []
+    for lane, values in waits.items():
+        summary = latency_summary(values)
+        rows.append({
+            "mode": "lanes" if lanes_enabled else "fifo",
+            "lane": lane,
+            "requests": len(values),
+            "wait_p50_s": summary["p50"],
+            "wait_p95_s": summary["p95"],
+            "wait_max_s": summary["max"],
+        })
+    return rows
+
+async def main():
+    parser = argparse.ArgumentParser(description="Per-lane wait times under a backfill flood")
+    parser.add_argument("--backfill", type=int, default=200, help="Batch generations submitted at once")
+    parser.add_argument("--live", type=int, default=40, help="Live generations arriving over the run")
+    parser.add_argument("--normal", type=int, default=40, help="Normal generations arriving over the run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--work", type=float, default=0.2, help="Mean seconds per simulated generation")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between interactive arrivals")
+    args = parser.parse_args()
+
+    rows = []
+    for lanes_enabled in (False, True):
+        random.seed(45)
+        rows.extend(await run(lanes_enabled, args.backfill, args.live, args.normal,
+                              args.concurrency, args.work, args.interval))
+    print_table(rows, ["mode", "lane", "requests", "wait_p50_s", "wait_p95_s", "wait_max_s"])
+
+if __name__ == "__main__":
+    asyncio.run(main())
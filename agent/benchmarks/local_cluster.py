@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Local Cluster - Several agent replicas behind the consistent-hash gateway
+
+Starts ``--replicas`` agent API processes with the simulated LLM and a gateway in
+front of them, sends a stream of requests with repeated moments through the
+gateway and reports how requests spread over the replicas and whether every moment
+stayed on one replica. It then stops one replica and reports how many moments moved
+(ideally only the ones it owned). Needs a running tweet MCP server.
+
+    cd agent && python -m benchmarks.local_cluster --replicas 3 --requests 60
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import SAMPLE_MOMENTS, print_table
+
+def _start(module: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+def _wait_healthy(url: str, path: str = "/health", timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}{path}", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become healthy")
+
+def _send(gateway_url: str, moments: List[str]) -> Dict[str, str]:
+    """Send every moment through the gateway; moment -> replica that served it."""
+    served: Dict[str, set] = defaultdict(set)
+    with httpx.Client(base_url=gateway_url, timeout=60.0) as client:
+        for moment in moments:
+            response = client.post("/v1/tweets", json={"cricket_moment": moment})
+            served[moment].add(response.headers.get("X-Gateway-Replica", f"error {response.status_code}"))
+    return served
+
+def main():
+    parser = argparse.ArgumentParser(description="Consistent-hash routing over local agent replicas")
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--moments", type=int, default=20, help="Distinct moments (the rest are duplicates)")
+    parser.add_argument("--base-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    replica_urls = [f"http://127.0.0.1:{args.base_port + 1 + index}" for index in range(args.replicas)]
+    gateway_url = f"http://127.0.0.1:{args.base_port}"
+    agent_env = {"LLM_BACKEND": "simulated", "SIMULATED_LLM_LATENCY": "0.05", "AGENT_DB_PATH": "/tmp/local_cluster.db"}
+
+    processes = []
+    try:
+        for index, url in enumerate(replica_urls):
+            processes.append(_start("app", args.base_port + 1 + index, agent_env))
+        for url in replica_urls:
+            # The gateway only routes to warmed-up replicas
+            _wait_healthy(url, "/ready")
+        processes.append(_start("gateway", args.base_port, {
+            "GATEWAY_REPLICAS": ",".join(replica_urls),
+            "GATEWAY_HEALTH_INTERVAL": "0.5",
+        }))
+        _wait_healthy(gateway_url)
+
+        distinct = [f"{SAMPLE_MOMENTS[index % len(SAMPLE_MOMENTS)]} (ball {index})" for index in range(args.moments)]
+        rng = random.Random(45)
+        moments = [rng.choice(distinct) for _ in range(args.requests)]
+
+        before = _send(gateway_url, moments)
+        load = Counter(replica for moment in moments for replica in before[moment])
+        sticky = sum(1 for replicas in before.values() if len(replicas) == 1)
+        print_table(
+            [{"replica": replica, "requests": load[replica]} for replica in replica_urls],
+            ["replica", "requests"],
+        )
+        print(f"\n{sticky}/{len(before)} moments were always served by the same replica")
+
+        # Take one replica away and see which moments move
+        victim = replica_urls[-1]
+        processes[len(replica_urls) - 1].terminate()
+        processes[len(replica_urls) - 1].wait()
+        time.sleep(1.5)
+        seen = list(before)
+        after = _send(gateway_url, seen)
+        owned = [moment for moment in seen if before[moment] == {victim}]
+        moved = [moment for moment in seen if after[moment] != before[moment]]
+        print(f"Stopped {victim}: {len(moved)} of {len(seen)} moments moved "
+              f"({len(owned)} were owned by the stopped replica)")
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+
+if __name__ == "__main__":
+    main()
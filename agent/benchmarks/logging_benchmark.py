@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Logging Benchmark - Caller-side cost of a log line, inline vs through the queue
+
+Times each log call from the caller's point of view (what a request handler pays)
+for print(), inline logging with a text or JSON formatter, and the queue-based JSON
+setup from ``json_logging`` with and without INFO sampling. Every ``--error-every``-th
+call logs an exception with its traceback. ``--sink-delay-ms`` makes every write to
+the output stream sleep, to show what a slow or blocked stdout does to each variant.
+Output goes to a temporary file.
+
+    cd agent && python -m benchmarks.logging_benchmark --calls 20000 --sink-delay-ms 0.2
+"""
+
+import io
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import traceback
+from logging.handlers import QueueListener
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import latency_summary, print_table
+from json_logging import DroppingQueueHandler, InfoSampler, JsonFormatter
+
+class SlowStream(io.TextIOBase):
+    """Text stream whose every write takes at least `delay` seconds."""
+
+    def __init__(self, stream: Any, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+def _fail() -> None:
+    raise ValueError("simulated model error")
+
+def _run(log: Callable[[int, bool], None], calls: int, error_every: int) -> List[float]:
+    timings = []
+    for index in range(calls):
+        error = error_every > 0 and index % error_every == 0
+        started = time.perf_counter()
+        log(index, error)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def _logger(handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"benchmark.{id(handler)}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+def _log_with(logger: logging.Logger) -> Callable[[int, bool], None]:
+    def log(index: int, error: bool) -> None:
+        if error:
+            try:
+                _fail()
+            except ValueError:
+                logger.exception("Tweet generation failed", extra={"request_id": f"req-{index}"})
+        else:
+            logger.info(f"Request req-{index}: Generating standard viral tweet", extra={"request_id": f"req-{index}"})
+    return log
+
+def scenario(name: str, stream: Any, calls: int, error_every: int) -> Dict[str, Any]:
+    listener = None
+    if name == "print":
+        def log(index: int, error: bool) -> None:
+            print(f"Generating viral standard tweet for req-{index}", file=stream)
+            if error:
+                try:
+                    _fail()
+                except ValueError:
+                    print(traceback.format_exc(), file=stream)
+    elif name in ("inline_text", "inline_json"):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(
+            JsonFormatter("benchmark") if name == "inline_json"
+            else logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+        log = _log_with(_logger(handler))
+    else:
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter("benchmark"))
+        handler = DroppingQueueHandler(queue.Queue(maxsize=calls + 1))
+        if name == "queue_json_sampled":
+            handler.addFilter(InfoSampler(0.1))
+        listener = QueueListener(handler.queue, output)
+        listener.start()
+        log = _log_with(_logger(handler))
+
+    started = time.perf_counter()
+    timings = _run(log, calls, error_every)
+    caller_seconds = time.perf_counter() - started
+    if listener is not None:
+        # Wait for the listener to write everything out
+        listener.stop()
+    drained_seconds = time.perf_counter() - started
+
+    summary = latency_summary(timings)
+    return {
+        "variant": name,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+        "p50_us": summary["p50"] * 1e6,
+        "p99_us": summary["p99"] * 1e6,
+        "max_us": summary["max"] * 1e6,
+        "caller_s": caller_seconds,
+        "drained_s": drained_seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call overhead of the logging setups")
+    parser.add_argument("--calls", type=int, default=20000, help="Log calls per variant")
+    parser.add_argument("--error-every", type=int, default=100, help="Log an exception every N calls (0 = never)")
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0, help="Delay added to every write to the output")
+    args = parser.parse_args()
+
+    rows = []
+    for name in ("print", "inline_text", "inline_json", "queue_json", "queue_json_sampled"):
+        with tempfile.TemporaryFile("w+") as output:
+            rows.append(scenario(name, SlowStream(output, args.sink_delay_ms / 1000.0), args.calls, args.error_every))
+    print_table(rows, ["variant", "mean_us", "p50_us", "p99_us", "max_us", "caller_s", "drained_s"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Pipeline Benchmark - Deterministic tweet graph vs the original ReAct agent
+
+Runs the same cricket moments through both pipelines and reports LLM calls,
+tokens and latency per request. Needs a running tweet MCP server (MCP_HOST /
+TWEET_MCP_PORT); uses the simulated LLM unless ``--backend openai`` is given.
+
+    cd agent && python -m benchmarks.pipeline_benchmark --requests 20
+"""
+
+import os
+import time
+import argparse
+import asyncio
+from typing import Any, Dict
+
+from benchmarks.common import SAMPLE_MOMENTS, LLMUsageCallback, latency_summary, print_table
+
+async def run_pipeline(pipeline: str, requests: int, tweet_type: str) -> Dict[str, Any]:
+    """Generate `requests` tweets sequentially through one pipeline."""
+    # Imported late so --backend is applied before the agent reads LLM_BACKEND
+    from agent import IPLTweetAgent
+
+    agent = IPLTweetAgent(model_name=os.getenv("MODEL_NAME", "gpt-4o"), pipeline=pipeline)
+    await agent.setup()
+    usage = LLMUsageCallback()
+    agent.llm.callbacks = [usage]
+
+    latencies = []
+    errors = 0
+    try:
+        for index in range(requests):
+            moment = SAMPLE_MOMENTS[index % len(SAMPLE_MOMENTS)]
+            started = time.perf_counter()
+            result = await agent.generate_tweet(moment, tweet_type)
+            latencies.append(time.perf_counter() - started)
+            errors += 1 if result.get("error") else 0
+    finally:
+        await agent.close()
+
+    counts = usage.snapshot()
+    summary = latency_summary(latencies)
+    return {
+        "pipeline": pipeline,
+        "requests": requests,
+        "errors": errors,
+        "llm_calls/req": counts["llm_calls"] / requests,
+        "prompt_tok/req": counts["prompt_tokens"] / requests,
+        "completion_tok/req": counts["completion_tokens"] / requests,
+        "p50_s": summary["p50"],
+        "p95_s": summary["p95"],
+        "max_s": summary["max"],
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare the tweet graph with the ReAct agent")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per pipeline")
+    parser.add_argument("--tweet-type", choices=["standard", "one_liner"], default="standard")
+    parser.add_argument("--backend", choices=["simulated", "openai"], default="simulated")
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = args.backend
+    # Measure generation, not moments answered from the pre-match drafts
+    os.environ["DRAFT_CACHE_ENABLED"] = "false"
+
+    rows = []
+    for pipeline in ("react", "graph"):
+        rows.append(await run_pipeline(pipeline, args.requests, args.tweet_type))
+
+    print()
+    print_table(rows, list(rows[0].keys()))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Traffic Replay - Re-issue a captured request stream against any deployment
+
+Reads one or more capture files written with ``TRAFFIC_CAPTURE=true`` (rotated
+files are merged and ordered by arrival time) and sends every request to the target
+at its original offset divided by ``--speed``, so inter-arrival gaps and bursts are
+preserved. Reports latency, throughput, status codes and how far the replayer fell
+behind the schedule.
+
+    cd agent && python -m benchmarks.replay /data/capture/requests.jsonl* \\
+        --target http://localhost:8000 --speed 10
+"""
+
+import json
+import time
+import argparse
+import asyncio
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import latency_summary, print_table
+
+def load_capture(paths: List[str], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Read capture files and return their entries ordered by arrival time."""
+    entries = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partial last line
+                    continue
+                if "ts" in entry and "body" in entry:
+                    entries.append(entry)
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries[:limit] if limit else entries
+
+async def _send(
+    client: httpx.AsyncClient,
+    entry: Dict[str, Any],
+    start: float,
+    offset: float,
+    results: List[Dict[str, Any]],
+    keep_deadlines: bool,
+) -> None:
+    """Wait for the entry's slot in the schedule, then send it."""
+    delay = start + offset - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    lag = time.perf_counter() - (start + offset)
+    headers = entry.get("headers", {}) if keep_deadlines else {}
+
+    sent = time.perf_counter()
+    try:
+        response = await client.post("/v1/tweets", json=entry["body"], headers=headers)
+        status = str(response.status_code)
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    results.append({"status": status, "latency": time.perf_counter() - sent, "lag": lag})
+
+async def replay(
+    entries: List[Dict[str, Any]],
+    target: str,
+    speed: float,
+    timeout: float,
+    keep_deadlines: bool,
+) -> Dict[str, Any]:
+    """Replay the entries against the target and summarize the run."""
+    results: List[Dict[str, Any]] = []
+    first_ts = entries[0]["ts"]
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _send(client, entry, start, (entry["ts"] - first_ts) / speed, results, keep_deadlines)
+            for entry in entries
+        ))
+        elapsed = time.perf_counter() - start
+
+    ok = [result["latency"] for result in results if result["status"] == "200"]
+    latency = latency_summary(ok)
+    lag = latency_summary([result["lag"] for result in results])
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "statuses": dict(Counter(result["status"] for result in results)),
+        "captured_span_s": entries[-1]["ts"] - first_ts,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "p50_s": latency["p50"],
+        "p95_s": latency["p95"],
+        "p99_s": latency["p99"],
+        "max_s": latency["max"],
+        "max_lag_s": lag["max"],
+    }
+
+def _write_summary(path: str, summary: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay captured tweet requests against a deployment")
+    parser.add_argument("captures", nargs="+", help="Capture files (rotated files may be listed together)")
+    parser.add_argument("--target", default="http://localhost:8000", help="Base URL of the agent API")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (1 = real time)")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request HTTP timeout in seconds")
+    parser.add_argument("--drop-deadlines", action="store_true",
+                        help="Do not resend captured X-Request-Timeout headers")
+    parser.add_argument("--json", dest="json_output", default=None, help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    entries = await asyncio.to_thread(load_capture, args.captures, args.limit)
+    if not entries:
+        print("No captured requests found")
+        return
+
+    print(f"Replaying {len(entries)} requests against {args.target} at {args.speed}x\n")
+    summary = await replay(entries, args.target, args.speed, args.timeout, not args.drop_deadlines)
+
+    columns = ["requests", "ok", "elapsed_s", "throughput_rps", "p50_s", "p95_s", "p99_s", "max_s", "max_lag_s"]
+    print_table([summary], columns)
+    print(f"\nStatus codes: {summary['statuses']}")
+
+    if args.json_output:
+        await asyncio.to_thread(_write_summary, args.json_output, summary)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Startup Profile - Where the agent API spends its import time, and how long until it is ready
+
+First imports the app in a fresh interpreter with ``-X importtime`` and lists the
+modules with the largest cumulative import time. Then, unless ``--imports-only``
+is given, it starts the API ``--runs`` times and measures:
+
+- the time until ``/health`` answers, which is the time to listening
+- the time until ``/ready`` answers 200, which is the end of the warm-up
+- how long each warm-up step took
+
+The simulated LLM is used unless ``--backend openai`` is given. The warm-up's MCP
+steps need a running tweet MCP server; without one they are reported as failed,
+but the graph pipeline is still ready.
+
+    cd agent && python -m benchmarks.startup_profile --top 25 --runs 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.common import latency_summary, print_table
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_profile(module: str = "app") -> List[Dict[str, Any]]:
+    """Modules imported by `module`, with self and cumulative import time in ms."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AGENT_DIR,
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+def _time_to_ready(port: int, env: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=AGENT_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    listening = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.monotonic() - started < timeout:
+                try:
+                    if listening is None and client.get("/health").status_code == 200:
+                        listening = time.monotonic() - started
+                    response = client.get("/ready")
+                    if response.status_code == 200:
+                        return {"listening": listening, "ready": time.monotonic() - started, "status": response.json()}
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.02)
+        raise RuntimeError(f"The agent API was not ready within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait(10)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile and time to ready of the agent API")
+    parser.add_argument("--top", type=int, default=25, help="Modules listed by cumulative import time")
+    parser.add_argument("--runs", type=int, default=3, help="API starts to time")
+    parser.add_argument("--imports-only", action="store_true", help="Only profile the imports")
+    parser.add_argument("--backend", default="simulated", choices=["simulated", "openai"])
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for /ready")
+    parser.add_argument("--port", type=int, default=8796)
+    args = parser.parse_args()
+
+    rows = import_profile()
+    total = next(row for row in rows if row["module"] == "app")["cumulative_ms"]
+    print(f"import app: {total:.0f}ms, {len(rows)} modules\n")
+    top = sorted((row for row in rows if row["module"] != "app"), key=lambda row: row["cumulative_ms"], reverse=True)
+    print_table(top[:args.top], ["module", "depth", "self_ms", "cumulative_ms"])
+    if args.imports_only:
+        return
+
+    env = {"LLM_BACKEND": args.backend, "AGENT_DB_PATH": "/tmp/startup_profile.db", "LOG_LEVEL": "WARNING"}
+    runs = [_time_to_ready(args.port, env, args.timeout) for _ in range(args.runs)]
+    print(f"\n{args.runs} starts (LLM_BACKEND={args.backend}):")
+    print_table(
+        [
+            {"milestone": name, **{key: value * 1000 for key, value in latency_summary([run[name] for run in runs]).items()}}
+            for name in ("listening", "ready")
+        ],
+        ["milestone", "p50", "p95", "max"],
+    )
+    print("\nwarm-up steps (last start):")
+    print_table(
+        [{"step": name, **{key: step[key] for key in ("state", "required", "seconds", "error")}}
+         for name, step in runs[-1]["status"]["steps"].items()],
+        ["step", "state", "required", "seconds", "error"],
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Circuit Breakers - Fail fast while the MCP server or a model provider is down
+
+Every dependency has its own breaker: ``mcp`` for the tweet MCP server and
+``model:<name>`` for each chat model. Call outcomes are kept for a rolling window of
+``CIRCUIT_WINDOW`` seconds. Once the window holds at least ``CIRCUIT_MIN_CALLS``
+calls and the failure rate reaches ``CIRCUIT_FAILURE_RATE``, the breaker opens and
+calls fail immediately with ``CircuitOpen`` instead of waiting for their timeouts.
+After ``CIRCUIT_OPEN_SECONDS`` it goes half-open and lets ``CIRCUIT_HALF_OPEN_PROBES``
+calls through: when they all succeed it closes again, the first failure re-opens it.
+
+A call that runs past its dependency's call timeout is aborted and counts as a
+failure, so a hanging server trips the breaker just like a refusing one. Cancelled
+calls (client disconnects, spent request deadlines) are not counted either way.
+Breakers are used from the event loop only.
+
+    CIRCUIT_BREAKERS            "false" to let every call through (default true)
+    CIRCUIT_WINDOW              seconds of call outcomes considered (default 30)
+    CIRCUIT_MIN_CALLS           calls in the window before a breaker may open (default 10)
+    CIRCUIT_FAILURE_RATE        failure rate that opens a breaker (default 0.5)
+    CIRCUIT_OPEN_SECONDS        seconds an open breaker fails fast (default 15)
+    CIRCUIT_HALF_OPEN_PROBES    successful probes needed to close again (default 2)
+    CIRCUIT_MCP_CALL_TIMEOUT    seconds before an MCP call counts as failed (default 5)
+    CIRCUIT_MODEL_CALL_TIMEOUT  seconds before a model call counts as failed (default 0, no limit)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from metrics import registry
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = registry.gauge(
+    "agent_circuit_state",
+    "Circuit breaker state by dependency (0 closed, 1 half-open, 2 open)",
+    ["dependency"],
+)
+circuit_transitions = registry.counter(
+    "agent_circuit_transitions",
+    "Circuit breaker state changes, by dependency and new state",
+    ["dependency", "state"],
+)
+circuit_rejected = registry.counter(
+    "agent_circuit_rejected",
+    "Calls failed fast because the dependency's circuit was open",
+    ["dependency"],
+)
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, dependency: str, retry_after: float):
+        self.dependency = dependency
+        self.retry_after = retry_after
+        super().__init__(f"{dependency} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling failure-rate window."""
+
+    def __init__(
+        self,
+        dependency: str,
+        enabled: bool = True,
+        window: float = 30.0,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 2,
+        call_timeout: float = 0.0,
+    ):
+        """Initialize the breaker.
+
+        Args:
+            dependency: Name used in metrics, logs and CircuitOpen
+            enabled: False to let every call through untouched
+            window: Seconds of call outcomes considered
+            min_calls: Calls in the window before the breaker may open
+            failure_rate: Failure rate that opens the breaker
+            open_seconds: Seconds the breaker fails fast before probing
+            half_open_probes: Successful probes needed to close again
+            call_timeout: Seconds before a call is aborted as failed (0 = no limit)
+        """
+        self.dependency = dependency
+        self.enabled = enabled
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.call_timeout = call_timeout
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        circuit_state.labels(dependency).set(0)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        circuit_state.labels(self.dependency).set(_STATE_VALUES[state])
+        circuit_transitions.labels(self.dependency, state).inc()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            logger.warning(
+                f"Circuit for {self.dependency} opened ({previous}); failing fast for {self.open_seconds:.0f}s",
+                extra={"dependency": self.dependency},
+            )
+        else:
+            if state == CLOSED:
+                self._outcomes.clear()
+                self._failures = 0
+            logger.info(f"Circuit for {self.dependency} is {state}", extra={"dependency": self.dependency})
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (without reserving a probe)."""
+        if not self.enabled or self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.retry_after() <= 0
+        return self._probes_in_flight + self._probe_successes < self.half_open_probes
+
+    def _acquire(self) -> bool:
+        """Admit a call or raise CircuitOpen; True if the call is a half-open probe."""
+        if self.state == OPEN and self.retry_after() <= 0:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and self._probes_in_flight + self._probe_successes < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        circuit_rejected.labels(self.dependency).inc()
+        # Half-open with every probe slot taken: the verdict is due shortly
+        raise CircuitOpen(self.dependency, max(1.0, self.retry_after()))
+
+    def _record(self, ok: bool, probe: bool) -> None:
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            self._probes_in_flight -= 1
+            if not ok:
+                self._transition(OPEN)
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._transition(CLOSED)
+            return
+
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._prune(now)
+        if (
+            self.state == CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and self._failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._transition(OPEN)
+
+    async def call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run a dependency call through the breaker.
+
+        Args:
+            call: Creates the awaitable; not invoked when the circuit is open
+
+        Returns:
+            The call's result
+
+        Raises:
+            CircuitOpen: if the circuit is open (nothing was called)
+            TimeoutError: if the call ran past the call timeout
+        """
+        if not self.enabled:
+            return await call()
+
+        probe = self._acquire()
+        try:
+            if self.call_timeout > 0:
+                call_timeout = asyncio.timeout(self.call_timeout)
+                try:
+                    async with call_timeout:
+                        result = await call()
+                except TimeoutError:
+                    if not call_timeout.expired():
+                        raise
+                    raise TimeoutError(f"{self.dependency} call took longer than {self.call_timeout:.1f}s")
+            else:
+                result = await call()
+        except asyncio.CancelledError:
+            # Neither a success nor a failure of the dependency; free the probe slot
+            if probe and self.state == HALF_OPEN:
+                self._probes_in_flight -= 1
+            raise
+        except Exception:
+            self._record(False, probe)
+            raise
+        self._record(True, probe)
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """State and current window of the breaker."""
+        self._prune(time.monotonic())
+        return {
+            "state": self.state,
+            "calls": len(self._outcomes),
+            "failure_rate": round(self._failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "retry_after_seconds": round(self.retry_after(), 1),
+        }
+
+class CircuitBreakers:
+    """Breakers by dependency name, created on first use with the CIRCUIT_* settings."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        window: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_probes: Optional[int] = None,
+        mcp_call_timeout: Optional[float] = None,
+        model_call_timeout: Optional[float] = None,
+    ):
+        """Initialize the breakers; unset arguments fall back to the CIRCUIT_* variables."""
+        self.enabled = enabled if enabled is not None else os.getenv("CIRCUIT_BREAKERS", "true").lower() == "true"
+        self.window = window or float(os.getenv("CIRCUIT_WINDOW", "30"))
+        self.min_calls = min_calls or int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+        self.failure_rate = failure_rate or float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+        self.open_seconds = open_seconds or float(os.getenv("CIRCUIT_OPEN_SECONDS", "15"))
+        self.half_open_probes = half_open_probes or int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "2"))
+        self.call_timeouts = {
+            "mcp": mcp_call_timeout if mcp_call_timeout is not None else float(os.getenv("CIRCUIT_MCP_CALL_TIMEOUT", "5")),
+            "model": model_call_timeout if model_call_timeout is not None else float(os.getenv("CIRCUIT_MODEL_CALL_TIMEOUT", "0")),
+        }
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, dependency: str) -> CircuitBreaker:
+        """Breaker for a dependency ("mcp" or "model:<name>")."""
+        if dependency not in self.breakers:
+            self.breakers[dependency] = CircuitBreaker(
+                dependency,
+                enabled=self.enabled,
+                window=self.window,
+                min_calls=self.min_calls,
+                failure_rate=self.failure_rate,
+                open_seconds=self.open_seconds,
+                half_open_probes=self.half_open_probes,
+                call_timeout=self.call_timeouts.get(dependency.split(":", 1)[0], 0.0),
+            )
+        return self.breakers[dependency]
+
+    def model(self, model: str) -> CircuitBreaker:
+        """Breaker for a chat model."""
+        return self.get(f"model:{model}")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """State of every breaker created so far."""
+        return {dependency: breaker.status() for dependency, breaker in self.breakers.items()}
+
+# Shared by every agent in the process so dependency health survives across requests
+circuit_breakers = CircuitBreakers()
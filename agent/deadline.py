@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Request Deadlines - End-to-end time budgets for tweet generation
+
+Every /v1/tweets request gets a deadline, taken from the ``X-Request-Timeout``
+header (seconds) or ``REQUEST_DEADLINE_SECONDS``. The budget is split across the
+pipeline steps: MCP setup and prompt fetching may each use at most their share of
+the total, and writing the tweet gets whatever is left. Each MCP and LLM call is
+wrapped in ``Deadline.run`` so it is cancelled as soon as its budget is spent.
+
+    REQUEST_DEADLINE_SECONDS        default deadline (default 60)
+    REQUEST_DEADLINE_MAX_SECONDS    upper bound for client supplied deadlines (default 120)
+    DEADLINE_SETUP_SHARE            share of the deadline for MCP setup (default 0.25)
+    DEADLINE_PROMPT_FETCH_SHARE     share of the deadline for prompt fetching (default 0.25)
+"""
+
+import os
+import math
+import time
+import asyncio
+from typing import Awaitable, Mapping, Optional, TypeVar
+
+from metrics import registry
+
+T = TypeVar("T")
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+deadline_exceeded = registry.counter(
+    "agent_requests_deadline_exceeded",
+    "Requests that ran out of time, by the pipeline step that was running",
+    ["step"],
+)
+requests_cancelled = registry.counter(
+    "agent_requests_cancelled",
+    "Requests whose in-flight work was cancelled, by reason",
+    ["reason"],
+)
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline step runs past its share of the request deadline."""
+
+    def __init__(self, step: str, timeout: float):
+        self.step = step
+        self.timeout = timeout
+        super().__init__(f"Deadline of {timeout:.1f}s exceeded during {step}")
+
+class Deadline:
+    """Absolute point in time by which a request must be finished."""
+
+    def __init__(self, timeout: float):
+        """Initialize the deadline.
+
+        Args:
+            timeout: Total seconds the request may take from now
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.step_shares = {
+            "setup": float(os.getenv("DEADLINE_SETUP_SHARE", "0.25")),
+            "prompt_fetch": float(os.getenv("DEADLINE_PROMPT_FETCH_SHARE", "0.25")),
+        }
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "Deadline":
+        """Build the deadline from request headers, falling back to the default."""
+        default = float(os.getenv("REQUEST_DEADLINE_SECONDS", "60"))
+        maximum = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "120"))
+        timeout = default
+        raw = headers.get(DEADLINE_HEADER)
+        if raw:
+            try:
+                timeout = float(raw)
+            except ValueError:
+                pass
+            # "nan" would expire at once and "inf" would never expire: use the default
+            if not math.isfinite(timeout):
+                timeout = default
+        return cls(min(max(timeout, 0.0), maximum))
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def step_budget(self, step: str) -> float:
+        """Seconds the given step may use."""
+        share = self.step_shares.get(step)
+        if share is None:
+            return self.remaining()
+        return min(self.remaining(), self.timeout * share)
+
+    async def run(self, awaitable: Awaitable[T], step: str) -> T:
+        """Await a call, cancelling it when the step's budget runs out.
+
+        Args:
+            awaitable: The MCP or LLM call
+            step: Pipeline step name ("setup", "prompt_fetch", "write", ...)
+
+        Returns:
+            The call's result
+
+        Raises:
+            DeadlineExceeded: if the budget was spent before the call finished
+        """
+        budget = self.step_budget(step)
+        if budget <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            deadline_exceeded.labels(step).inc()
+            raise DeadlineExceeded(step, self.timeout)
+
+        step_timeout = asyncio.timeout(budget)
+        try:
+            async with step_timeout:
+                return await awaitable
+        except TimeoutError:
+            # A TimeoutError raised by the call itself is not ours to translate
+            if not step_timeout.expired():
+                raise
+            deadline_exceeded.labels(step).inc()
+            raise DeadlineExceeded(step, self.timeout)
+
+async def run_within(deadline: Optional[Deadline], awaitable: Awaitable[T], step: str) -> T:
+    """Run a call under a deadline if there is one, otherwise just await it."""
+    if deadline is None:
+        return await awaitable
+    return await deadline.run(awaitable, step)
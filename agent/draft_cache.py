@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+"""
+Draft Cache - Pre-match tweet drafts for common scenarios, filled in locally
+
+Most moments have one of a handful of shapes: a six off the last ball, back-to-back
+fours, a fifty reached. Before the match, ``python draft_cache.py`` generates tweets
+for a sample moment of every scenario in ``SCENARIOS``. It then turns each tweet
+into a draft by replacing the sample's slot values (bowler, distance, over,
+required runs) with placeholders. The drafts are stored by scenario and tweet type
+in one JSON file.
+
+At request time, ``DraftCache.fill`` detects the scenario and its slot values from
+``cricket_moment`` with a few regular expressions. It then fills the scenario's
+drafts and ranks them with tweet_scoring, which takes milliseconds and makes no
+MCP or model call. Detection is deliberately strict. The kind comes only from the
+delivery itself ("<batter> hits <bowler> for a six") or a milestone ("<batter>
+reaches his fifty"). The batter must be the one the drafts were written for.
+Dismissals are never drafted, and "last ball" counts only for the last ball of
+the innings or over 19.6. Drafts that need a slot the moment does not mention are
+skipped, and so are drafts without any slot. When no scenario matches, or no
+draft fills into a valid tweet, the caller falls back to live generation.
+Callers await ``DraftCache.refresh`` first, which re-reads the file in a thread
+when it changes, so the job can refresh it while the agent runs.
+
+    DRAFT_CACHE_ENABLED         serve matching moments from the drafts (default false)
+    DRAFT_CACHE_PATH            JSON file holding the drafts (default /data/drafts.json)
+    DRAFT_CACHE_PER_SCENARIO    drafts generated per scenario and tweet type (default 5)
+
+    python draft_cache.py --per-scenario 5 --tweet-types standard,one_liner
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+
+from metrics import registry
+from tweet_scoring import TweetScore, rank_tweets
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+draft_lookups = registry.counter(
+    "agent_draft_cache_lookups",
+    "Moments checked against the pre-match drafts, by result (hit, no_scenario, unfillable)",
+    ["result"],
+)
+
+SLOTS = ("bowler", "bowler_surname", "distance", "over", "required_runs")
+
+# Re-check the drafts file for changes at most this often
+RELOAD_INTERVAL = 5.0
+
+# Batter of every sample moment; the drafts name this batter, so only their moments can use them
+BATTER = "Rohit Sharma"
+
+# Slot values of the sample moments; distinctive enough to find again in the generated tweets
+SAMPLE_SLOTS = {
+    "bowler": "Pat Cummins",
+    "bowler_surname": "Cummins",
+    "distance": "103",
+    "over": "17.2",
+    "required_runs": "23",
+}
+
+@dataclass(frozen=True)
+class Scenario:
+    """A common moment shape and the sample moment its drafts are generated from."""
+    name: str
+    kind: str
+    sample: str
+    last_ball: bool = False
+    back_to_back: bool = False
+    chase: bool = False
+    over: str = SAMPLE_SLOTS["over"]
+
+    def matches(self, facts: Dict[str, Any]) -> bool:
+        return (
+            facts["kind"] == self.kind
+            and (not self.last_ball or facts["last_ball"])
+            and (not self.back_to_back or facts["back_to_back"])
+            and (not self.chase or "required_runs" in facts["slots"])
+        )
+
+    def sample_slots(self) -> Dict[str, str]:
+        return {**SAMPLE_SLOTS, "over": self.over}
+
+    def sample_moment(self) -> str:
+        """The sample moment with the sample slot values filled in."""
+        return self.sample.format(**self.sample_slots())
+
+# Most specific first: the first matching scenario is used
+SCENARIOS = (
+    Scenario(
+        "six_last_ball", "six",
+        "Rohit Sharma hits {bowler} for a six off the last ball of the innings, {distance} meters over deep mid-wicket. Over {over}.",
+        last_ball=True, over="19.6",
+    ),
+    Scenario(
+        "six_in_chase", "six",
+        "Rohit Sharma hits {bowler} for a {distance} meter six. Over {over}, MI need {required_runs} more runs to win.",
+        chase=True,
+    ),
+    Scenario(
+        "back_to_back_sixes", "six",
+        "Rohit Sharma hits {bowler} for back-to-back sixes, the second one {distance} meters. Over {over}.",
+        back_to_back=True,
+    ),
+    Scenario(
+        "back_to_back_fours", "four",
+        "Rohit Sharma hits {bowler} for back-to-back fours through the covers. Over {over}.",
+        back_to_back=True,
+    ),
+    Scenario("hundred", "hundred", "Rohit Sharma reaches his hundred with a six off {bowler}. Over {over}."),
+    Scenario("fifty", "fifty", "Rohit Sharma reaches his fifty with a boundary off {bowler}. Over {over}."),
+    Scenario("six", "six", "Rohit Sharma hits {bowler} for a six, {distance} meters into the stands. Over {over}."),
+    Scenario("four", "four", "Rohit Sharma hits {bowler} for a four through the covers. Over {over}."),
+)
+
+_NAME = r"[A-Z][\w'-]*(?: [A-Z][\w'-]*){0,2}"
+# "Rohit Sharma hits Pat Cummins for a 103 meter six", "... for back-to-back sixes"
+_DELIVERY_RE = re.compile(
+    rf"\b(?P<batter>{_NAME}) hits (?P<bowler>{_NAME}|the bowler) for "
+    r"(?:(?:a|an|another) )?(?P<back_to_back>(?:back-to-back|consecutive) )?"
+    r"(?:\d{2,3}[- ]?(?:m|meters?|metres?) )?(?P<kind>sixes|six|maximum|fours|four)\b"
+    r"(?P<in_a_row> in a row\b)?"
+)
+# "Rohit Sharma reaches his fifty with a boundary off Pat Cummins"
+_MILESTONE_RE = re.compile(
+    rf"\b(?P<batter>{_NAME}) (?:reaches|brings up) his (?P<kind>fifty|half-century|hundred|century)\b"
+    rf"(?:[^.]*?\boff (?P<bowler>{_NAME}))?"
+)
+_KINDS = {
+    "six": "six", "sixes": "six", "maximum": "six", "four": "four", "fours": "four",
+    "fifty": "fifty", "half-century": "fifty", "hundred": "hundred", "century": "hundred",
+}
+_DISMISSAL_RE = re.compile(
+    r"\b(?:out|dismissed|caught|bowled|stumped|lbw|holes out|departs|walks back)\b(?! of\b)", re.IGNORECASE
+)
+_LAST_BALL_RE = re.compile(r"\b(?:last|final) ball of the (?:innings|match|chase)\b", re.IGNORECASE)
+_DISTANCE_RE = re.compile(r"\b(\d{2,3})\s*(?:m|meters?|metres?)\b", re.IGNORECASE)
+_OVER_RE = re.compile(r"\b[Oo]ver (\d{1,2}\.[0-6])\b")
+_REQUIRED_RES = (
+    re.compile(r"\b(?:needs?|needing|requires?|requiring)\s+(\d{1,3})\b(?:\s+more)?\s+runs?\b", re.IGNORECASE),
+    re.compile(r"\b(\d{1,3})\s+(?:more\s+)?runs?\s+(?:needed|required|to win)\b", re.IGNORECASE),
+)
+_CHASE_RE = re.compile(r"\b(\d{1,3})/\d{1,2}\b.*?\bchasing (\d{1,3})\b")
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+def detect(cricket_moment: str) -> Dict[str, Any]:
+    """Kind, batter, shape flags and slot values found in a cricket moment.
+
+    The kind is None unless the moment describes the batter's own delivery or
+    milestone, and for any dismissal.
+    """
+    facts: Dict[str, Any] = {"kind": None, "batter": None, "last_ball": False, "back_to_back": False, "slots": {}}
+    if _DISMISSAL_RE.search(cricket_moment):
+        return facts
+    match = _MILESTONE_RE.search(cricket_moment) or _DELIVERY_RE.search(cricket_moment)
+    if match is None:
+        return facts
+    groups = match.groupdict()
+    back_to_back = bool(groups.get("back_to_back") or groups.get("in_a_row"))
+    if groups["kind"] in ("sixes", "fours") and not back_to_back:
+        # "for two sixes" or similar: not a single delivery
+        return facts
+
+    slots: Dict[str, str] = {}
+    bowler = groups.get("bowler")
+    if bowler and bowler != "the bowler":
+        slots["bowler"] = bowler
+        slots["bowler_surname"] = bowler.split()[-1]
+    match = _DISTANCE_RE.search(cricket_moment)
+    if match:
+        slots["distance"] = match.group(1)
+    match = _OVER_RE.search(cricket_moment)
+    if match:
+        slots["over"] = match.group(1)
+    for pattern in _REQUIRED_RES:
+        match = pattern.search(cricket_moment)
+        if match:
+            slots["required_runs"] = match.group(1)
+            break
+    else:
+        # Feed moments carry the score and the target ("MI 182/3 chasing 201")
+        match = _CHASE_RE.search(cricket_moment)
+        if match and int(match.group(2)) > int(match.group(1)):
+            slots["required_runs"] = str(int(match.group(2)) - int(match.group(1)))
+
+    facts.update(
+        kind=_KINDS[groups["kind"].lower()],
+        batter=groups["batter"],
+        last_ball=bool(_LAST_BALL_RE.search(cricket_moment)) or slots.get("over") == "19.6",
+        back_to_back=back_to_back,
+        slots=slots,
+    )
+    return facts
+
+def match_scenario(facts: Dict[str, Any]) -> Optional[Scenario]:
+    """Most specific scenario the detected facts fit, or None."""
+    if facts["kind"] is None:
+        return None
+    return next((scenario for scenario in SCENARIOS if scenario.matches(facts)), None)
+
+def to_draft(tweet: str, sample_slots: Dict[str, str]) -> str:
+    """Replace a generated tweet's sample slot values with ``{slot}`` placeholders.
+
+    Names written in capitals (one-liners are ALL CAPS) become ``{SLOT}`` and are
+    filled in capitals.
+    """
+    def placeholder(slot: str) -> Callable[[re.Match], str]:
+        return lambda match: "{" + (slot.upper() if match.group(0).isupper() else slot) + "}"
+
+    draft = tweet
+    # Full bowler name before the surname, so "Pat Cummins" becomes {bowler}
+    for slot in SLOTS:
+        value = sample_slots.get(slot)
+        if not value:
+            continue
+        if value[0].isdigit():
+            # "103" also in "103m", but not in "1103" or "17.25"
+            pattern = re.compile(rf"(?<![\d.]){re.escape(value)}(?!\d|\.\d)")
+        else:
+            pattern = re.compile(rf"\b{re.escape(value)}\b", re.IGNORECASE)
+        draft = pattern.sub(placeholder(slot), draft)
+    return draft
+
+def fill_draft(draft: str, slots: Dict[str, str]) -> Optional[str]:
+    """Fill a draft's placeholders, or None if the moment lacks one of them.
+
+    A draft without any placeholder is refused too: nothing in it was taken from
+    the moment, so it may still describe the sample.
+    """
+    if not any("{" + slot + "}" in draft or "{" + slot.upper() + "}" in draft for slot in SLOTS):
+        return None
+    tweet = draft
+    for slot in SLOTS:
+        for placeholder, value in (("{" + slot + "}", slots.get(slot)), ("{" + slot.upper() + "}", (slots.get(slot) or "").upper())):
+            if placeholder in tweet:
+                if not value:
+                    return None
+                tweet = tweet.replace(placeholder, value)
+    return tweet
+
+class DraftCache:
+    """Drafts by scenario and tweet type, loaded from DRAFT_CACHE_PATH."""
+
+    def __init__(self, enabled: Optional[bool] = None, path: Optional[str] = None):
+        """Initialize the cache; unset arguments fall back to the DRAFT_CACHE_* variables."""
+        self.enabled = enabled if enabled is not None else os.getenv("DRAFT_CACHE_ENABLED", "false").lower() == "true"
+        self.path = path or os.getenv("DRAFT_CACHE_PATH", "/data/drafts.json")
+        self.drafts: Dict[str, Dict[str, List[str]]] = {}
+        self.batter = BATTER
+        self.generated_at: Optional[float] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def _load(self) -> Optional[Tuple[Optional[float], Dict[str, Any]]]:
+        """The drafts file's mtime and contents, or None if they have not changed."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            # Gone: drop the drafts loaded from it, if any
+            return (None, {}) if self._mtime is not None else None
+        if mtime == self._mtime:
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as drafts_file:
+                return mtime, json.load(drafts_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load tweet drafts from {self.path}: {str(e)}")
+            return None
+
+    async def refresh(self) -> None:
+        """Re-read the drafts file if it changed, checking at most every RELOAD_INTERVAL seconds.
+
+        The file is read in a thread, off the event loop; fill() and status() use
+        the drafts loaded by the last refresh.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        loaded = await asyncio.to_thread(self._load)
+        if loaded is None:
+            return
+        mtime, data = loaded
+        self.drafts = data.get("drafts", {})
+        self.batter = data.get("batter") or BATTER
+        self.generated_at = data.get("generated_at")
+        self._mtime = mtime
+        logger.info(
+            f"Loaded {sum(len(drafts) for types in self.drafts.values() for drafts in types.values())} "
+            f"tweet drafts for {len(self.drafts)} scenarios from {self.path}"
+        )
+
+    def _filled(self, cricket_moment: str, tweet_type: str) -> Tuple[Optional[Scenario], List[TweetScore]]:
+        """The moment's scenario and its drafts filled into valid tweets."""
+        if not self.drafts:
+            return None, []
+        facts = detect(cricket_moment)
+        if facts["batter"] is None or _normalize_name(facts["batter"]) != _normalize_name(self.batter):
+            return None, []
+        scenario = match_scenario(facts)
+        drafts = self.drafts.get(scenario.name, {}).get(tweet_type, []) if scenario else []
+        if not drafts:
+            return None, []
+        filled = [tweet for tweet in (fill_draft(draft, facts["slots"]) for draft in drafts) if tweet]
+        valid = [candidate for candidate in rank_tweets(filled, tweet_type) if candidate.valid]
+        if not valid:
+            return scenario, []
+        # Start at a moment-dependent draft so repeats of a scenario don't all get the same tweet
+        offset = int(hashlib.sha256(cricket_moment.encode("utf-8")).hexdigest()[:8], 16) % len(valid)
+        return scenario, valid[offset:] + valid[:offset]
+
+    def fill(self, cricket_moment: str, tweet_type: str, candidates: int = 1) -> Optional[Dict[str, Any]]:
+        """Tweets for the moment from its scenario's drafts, shaped like a generate_tweet result.
+
+        Args:
+            cricket_moment: Description of the cricket moment
+            tweet_type: Type of tweet ("standard" or "one_liner")
+            candidates: Number of filled drafts returned
+
+        Returns:
+            The result, or None when the moment needs live generation
+        """
+        if not self.enabled:
+            return None
+        started = time.monotonic()
+        scenario, filled = self._filled(cricket_moment, tweet_type)
+        if not filled:
+            if self.drafts:
+                draft_lookups.labels("unfillable" if scenario else "no_scenario").inc()
+            return None
+
+        draft_lookups.labels("hit").inc()
+        filled = filled[:max(1, candidates)]
+        return {
+            "cricket_moment": cricket_moment,
+            "tweet_type": tweet_type,
+            "messages": [AIMessage(content=filled[0].content)],
+            "tweet": filled[0].content,
+            "ranked_tweets": [candidate.as_dict() for candidate in filled],
+            "model": f"draft:{scenario.name}",
+            "timings": {"draft": time.monotonic() - started},
+        }
+
+    def fill_types(self, cricket_moment: str, tweet_types: List[str], candidates: int = 1) -> Dict[str, Dict[str, Any]]:
+        """fill() for each tweet type, keeping the types the drafts answer.
+
+        Callers that open an MCP session only for the other types keep these results
+        and pass them on, instead of filling again after the drafts file may have
+        been reloaded.
+        """
+        filled = {}
+        for tweet_type in tweet_types:
+            result = self.fill(cricket_moment, tweet_type, candidates)
+            if result is not None:
+                filled[tweet_type] = result
+        return filled
+
+    def status(self) -> Dict[str, Any]:
+        """Scenarios and draft counts currently loaded."""
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "batter": self.batter,
+            "generated_at": self.generated_at,
+            "scenarios": {name: {kind: len(drafts) for kind, drafts in types.items()} for name, types in self.drafts.items()},
+        }
+
+# Shared by every agent in the process
+draft_cache = DraftCache()
+
+def _write_drafts(path: str, data: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Write then rename, so a running agent never reads a half-written file
+    with open(f"{path}.tmp", "w", encoding="utf-8") as drafts_file:
+        json.dump(data, drafts_file, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+async def precompute(path: str, per_scenario: int, tweet_types: List[str], scenarios: List[Scenario]) -> Dict[str, Any]:
+    """Generate drafts for every scenario and tweet type and write them to `path`."""
+    from agent import IPLTweetAgent
+
+    # Drafts must come from the model, not from the previous drafts file
+    draft_cache.enabled = False
+    agent = IPLTweetAgent()
+    drafts: Dict[str, Dict[str, List[str]]] = {}
+    try:
+        for scenario in scenarios:
+            for tweet_type in tweet_types:
+                result = await agent.generate_tweet(scenario.sample_moment(), tweet_type, candidates=per_scenario)
+                if result.get("error"):
+                    logger.warning(f"No drafts for {scenario.name} ({tweet_type}): {result['messages'][-1].content}")
+                    continue
+                tweets = [candidate["content"] for candidate in result.get("ranked_tweets") or [] if not candidate["errors"]]
+                drafts.setdefault(scenario.name, {})[tweet_type] = list(dict.fromkeys(
+                    to_draft(tweet, scenario.sample_slots()) for tweet in tweets
+                ))
+                logger.info(f"{len(tweets)} drafts for {scenario.name} ({tweet_type})")
+    finally:
+        await agent.close()
+
+    data = {"generated_at": time.time(), "model": agent.model_name, "batter": BATTER, "drafts": drafts}
+    await asyncio.to_thread(_write_drafts, path, data)
+    return data
+
+def main():
+    from json_logging import setup_logging
+
+    parser = argparse.ArgumentParser(description="Generate pre-match tweet drafts for common scenarios")
+    parser.add_argument("--path", default=os.getenv("DRAFT_CACHE_PATH", "/data/drafts.json"), help="Drafts file to write")
+    parser.add_argument(
+        "--per-scenario", type=int, default=int(os.getenv("DRAFT_CACHE_PER_SCENARIO", "5")),
+        help="Drafts per scenario and tweet type (candidates of one model call, at most 5)",
+    )
+    parser.add_argument("--tweet-types", default="standard,one_liner", help="Comma-separated tweet types")
+    parser.add_argument("--scenarios", default="", help="Comma-separated scenario names (default: all)")
+    args = parser.parse_args()
+
+    setup_logging("drafts")
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    scenarios = [scenario for scenario in SCENARIOS if not names or scenario.name in names]
+    tweet_types = [tweet_type.strip() for tweet_type in args.tweet_types.split(",") if tweet_type.strip()]
+    data = asyncio.run(precompute(args.path, min(max(1, args.per_scenario), 5), tweet_types, scenarios))
+    total = sum(len(drafts) for types in data["drafts"].values() for drafts in types.values())
+    print(f"Wrote {total} drafts for {len(data['drafts'])} scenarios to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+#!/usr/bin/env python
+"""
+Feed Ingestion - Turn a live ball-by-ball feed into tweets
+
+Tails a local ball-by-ball event feed (a JSONL file that a scraper appends to, or
+JSONL lines sent to a local TCP socket), keeps the tweet-worthy events (boundaries
+and milestones by the tracked batter), converts each into a ``cricket_moment`` and
+schedules generation through ``IPLTweetAgent`` workers.
+
+Scheduling is by priority: sixes and milestones go before fours, and anything in
+the last overs of the innings jumps the queue. Events older than
+``FEED_MAX_EVENT_AGE`` when a worker picks them up are dropped, because a late
+tweet about a boundary is worth less than the next one. The key metric is
+``agent_feed_event_to_tweet_seconds``: time from the ball being bowled to the
+tweet being ready.
+
+One event per line, for example:
+
+    {"event_id": "m1-18.6", "match_id": "m1", "over": 18.6, "batter": "Rohit Sharma",
+     "bowler": "Pat Cummins", "runs": 6, "kind": "six", "ts": 1747500000.0,
+     "team": "MI", "score": "182/3", "target": 201, "commentary": "over deep square leg"}
+
+    FEED_PATH               JSONL file to tail (starts ingestion inside the API when set)
+    FEED_SOCKET_PORT        local TCP port to accept JSONL events on (alternative to FEED_PATH)
+    FEED_BATTER             batter whose moments are tweeted (default "Rohit Sharma")
+    FEED_BATTER_ALIASES     other spellings of that batter in the feed, comma-separated (e.g. "RG Sharma")
+    FEED_TWEET_TYPE         tweet type to generate (default standard)
+    FEED_CONCURRENCY        generation workers (default 2)
+    FEED_MAX_EVENT_AGE      drop events older than this many seconds (default 60)
+    FEED_DEATH_OVERS        overs at the end of the innings that get top priority (default 2)
+    FEED_OUTPUT_PATH        optional JSONL file the generated tweets are appended to
+
+    python feed_ingestion.py --file /data/feed/ball_by_ball.jsonl
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import IO, Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from agent import IPLTweetAgent
+from deadline import Deadline, DeadlineExceeded
+from circuit_breaker import CircuitOpen
+from generation_store import generation_store, moment_hash, text_hash
+from memory_tracking import release_history
+from scheduler import scheduler
+from tweet_broadcast import tweet_broadcaster
+from metrics import registry
+from json_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+feed_events = registry.counter(
+    "agent_feed_events",
+    "Feed events by outcome (filtered, invalid, queued, stale, tweeted, failed)",
+    ["result"],
+)
+feed_queue_depth = registry.gauge(
+    "agent_feed_queue_depth",
+    "Tweet-worthy feed events waiting for a worker",
+    [],
+)
+event_to_tweet_seconds = registry.histogram(
+    "agent_feed_event_to_tweet_seconds",
+    "Seconds from the ball being bowled to the tweet being ready",
+    ["kind"],
+    buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0),
+)
+
+# Lower is more urgent
+KIND_PRIORITY = {"six": 0, "hundred": 0, "fifty": 1, "four": 2}
+
+# Event-to-tweet latencies kept for the end-of-run summary
+LATENCY_WINDOW = 10000
+
+# Backoff between attempts to set up a worker's agent
+SETUP_RETRY_SECONDS = (1.0, 2.0, 5.0, 10.0, 30.0)
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+@dataclass
+class BallEvent:
+    """One delivery (or milestone) from the feed."""
+    event_id: str
+    kind: str
+    batter: str
+    over: float
+    ts: float
+    bowler: str = ""
+    runs: int = 0
+    team: str = ""
+    score: str = ""
+    target: Optional[int] = None
+    total_overs: int = 20
+    commentary: str = ""
+    match_id: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BallEvent":
+        """Build an event from a feed line; missing timestamps mean "just now"."""
+        kind = str(data.get("kind") or "").lower()
+        runs = int(data.get("runs") or 0)
+        if not kind:
+            kind = {6: "six", 4: "four"}.get(runs, "other")
+        over = float(data.get("over") or 0.0)
+        return cls(
+            event_id=str(data.get("event_id") or f"{data.get('match_id', '')}-{over}-{kind}"),
+            kind=kind,
+            batter=str(data.get("batter") or ""),
+            over=over,
+            ts=float(data.get("ts") or time.time()),
+            bowler=str(data.get("bowler") or ""),
+            runs=runs,
+            team=str(data.get("team") or ""),
+            score=str(data.get("score") or ""),
+            target=data.get("target"),
+            total_overs=int(data.get("total_overs") or 20),
+            commentary=str(data.get("commentary") or ""),
+            match_id=str(data.get("match_id") or ""),
+        )
+
+    def in_death_overs(self, death_overs: int) -> bool:
+        return self.over >= self.total_overs - death_overs
+
+    def to_moment(self) -> str:
+        """Describe the event as a cricket moment for the prompt."""
+        over = int(self.over)
+        ball = round((self.over - over) * 10)
+        if self.kind in ("six", "four"):
+            text = f"{self.batter} hits {self.bowler or 'the bowler'} for a {self.kind}"
+            if self.commentary:
+                text += f" {self.commentary}"
+        else:
+            text = f"{self.batter} reaches his {self.kind}"
+            if self.commentary:
+                text += f", {self.commentary}"
+        text += f". Over {over}.{ball}"
+        if self.over >= self.total_overs - 1:
+            text += " (final over)"
+        if self.team and self.score:
+            text += f", {self.team} {self.score}"
+        if self.target:
+            text += f" chasing {self.target}"
+        return text + "."
+
+@dataclass(order=True)
+class _Scheduled:
+    priority: int
+    sequence: int
+    event: BallEvent = field(compare=False)
+
+class FeedIngestor:
+    """Filters feed events and generates tweets for them in priority order."""
+
+    def __init__(
+        self,
+        batter: Optional[str] = None,
+        aliases: Optional[List[str]] = None,
+        tweet_type: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        max_event_age: Optional[float] = None,
+        death_overs: Optional[int] = None,
+        output_path: Optional[str] = None,
+    ):
+        """Initialize the ingestor; unset arguments fall back to the FEED_* variables."""
+        self.batter = _normalize_name(batter or os.getenv("FEED_BATTER", "Rohit Sharma"))
+        if aliases is None:
+            aliases = [alias for alias in os.getenv("FEED_BATTER_ALIASES", "").split(",") if alias.strip()]
+        self.batter_names = {self.batter, *(_normalize_name(alias) for alias in aliases)}
+        self.tweet_type = tweet_type or os.getenv("FEED_TWEET_TYPE", "standard")
+        self.concurrency = concurrency or int(os.getenv("FEED_CONCURRENCY", "2"))
+        self.max_event_age = max_event_age or float(os.getenv("FEED_MAX_EVENT_AGE", "60"))
+        self.death_overs = death_overs if death_overs is not None else int(os.getenv("FEED_DEATH_OVERS", "2"))
+        self.output_path = output_path or os.getenv("FEED_OUTPUT_PATH")
+        self.queue: "asyncio.PriorityQueue[_Scheduled]" = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._seen: Dict[str, float] = {}
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._output_lock = threading.Lock()
+
+    def is_tweet_worthy(self, event: BallEvent) -> bool:
+        """Boundaries and milestones by the tracked batter (full name or a configured alias)."""
+        return event.kind in KIND_PRIORITY and _normalize_name(event.batter) in self.batter_names
+
+    def priority(self, event: BallEvent) -> int:
+        """Sixes and milestones first; the last overs outrank everything else."""
+        priority = KIND_PRIORITY[event.kind]
+        if event.in_death_overs(self.death_overs):
+            priority -= 3
+        return priority
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """Filter one raw feed event and queue it if it is worth a tweet.
+
+        Returns:
+            True if the event was queued
+        """
+        try:
+            event = BallEvent.from_dict(data)
+        except (TypeError, ValueError):
+            feed_events.labels("invalid").inc()
+            return False
+        # Feeds resend corrections and reconnects replay the tail; tweet each ball once
+        if not self.is_tweet_worthy(event) or event.event_id in self._seen:
+            feed_events.labels("filtered").inc()
+            return False
+        self._seen[event.event_id] = event.ts
+        if len(self._seen) > 10000:
+            cutoff = time.time() - self.max_event_age
+            self._seen = {key: ts for key, ts in self._seen.items() if ts >= cutoff}
+
+        self.queue.put_nowait(_Scheduled(self.priority(event), next(self._sequence), event))
+        feed_events.labels("queued").inc()
+        feed_queue_depth.set(self.queue.qsize())
+        return True
+
+    async def _worker(self, index: int) -> None:
+        """Generate tweets for queued events with one long-lived agent."""
+        agent = IPLTweetAgent()
+        try:
+            await self._setup(agent, index)
+            while True:
+                scheduled = await self.queue.get()
+                feed_queue_depth.set(self.queue.qsize())
+                try:
+                    await self._generate(agent, scheduled.event)
+                except Exception as e:
+                    feed_events.labels("failed").inc()
+                    logger.exception(f"Feed worker {index} failed on {scheduled.event.event_id}: {str(e)}")
+                finally:
+                    self.queue.task_done()
+        finally:
+            await agent.close()
+
+    async def _setup(self, agent: IPLTweetAgent, index: int) -> None:
+        """Set up the worker's agent, retrying with backoff until it works."""
+        for attempt in itertools.count():
+            try:
+                await agent.setup()
+                return
+            except Exception as e:
+                delay = SETUP_RETRY_SECONDS[min(attempt, len(SETUP_RETRY_SECONDS) - 1)]
+                logger.error(f"Feed worker {index} could not set up its agent, retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _generate(self, agent: IPLTweetAgent, event: BallEvent) -> None:
+        age = time.time() - event.ts
+        if age > self.max_event_age:
+            feed_events.labels("stale").inc()
+            logger.info(f"Dropping stale feed event {event.event_id} ({age:.1f}s old)", extra={"request_id": f"feed-{event.event_id}"})
+            return
+
+        moment = event.to_moment()
+        request_id = f"feed-{event.event_id}"
+        started = time.monotonic()
+        status, error, tweet, result = "success", None, None, {}
+        try:
+            # Whatever freshness budget is left is the deadline for this tweet
+            deadline = Deadline(self.max_event_age - age)
+            async with scheduler.slot("live", deadline):
+                result = await agent.generate_tweet(moment, self.tweet_type, deadline, priority="live")
+            if result.get("error"):
+                status, error = "error", str(result["messages"][-1].content)
+            else:
+                tweet = result.get("tweet") or str(result["messages"][-1].content)
+        except DeadlineExceeded as e:
+            status, error = "deadline_exceeded", str(e)
+        except CircuitOpen as e:
+            status, error = "circuit_open", str(e)
+
+        if tweet:
+            latency = time.time() - event.ts
+            self.latencies.append(latency)
+            event_to_tweet_seconds.labels(event.kind).observe(latency)
+            feed_events.labels("tweeted").inc()
+            logger.info(
+                f"Tweet for {event.event_id} ({event.kind}, over {event.over}) ready {latency:.2f}s after the ball",
+                extra={"request_id": request_id, "latency_seconds": round(latency, 3)},
+            )
+            if self.output_path:
+                await asyncio.to_thread(self._write_output, event, moment, tweet, latency)
+            tweet_broadcaster.publish({
+                "request_id": request_id,
+                "source": "feed",
+                "tweet_type": self.tweet_type,
+                "tweet": tweet,
+                "candidates": [],
+                "cricket_moment": moment,
+                "model": result.get("model") or agent.model_name,
+                "ts": time.time(),
+                "event_id": event.event_id,
+                "latency_seconds": round(latency, 3),
+            })
+        else:
+            feed_events.labels("failed").inc()
+            logger.warning(f"Tweet for {event.event_id} failed: {error}", extra={"request_id": request_id})
+
+        generation_store.record(
+            request_id=request_id,
+            tweet_type=self.tweet_type,
+            cricket_moment=moment,
+            moment_hash=moment_hash(moment),
+            prompt_hash=text_hash(result.get("prompt")),
+            tweet=tweet,
+            tweet_hash=text_hash(tweet),
+            model=result.get("model") or agent.model_name,
+            status=status,
+            error=error,
+            latency_ms=(time.monotonic() - started) * 1000,
+        )
+        release_history(result)
+
+    def _write_output(self, event: BallEvent, moment: str, tweet: str, latency: float) -> None:
+        if not self.output_path:
+            return
+        line = json.dumps({
+            "event_id": event.event_id,
+            "kind": event.kind,
+            "over": event.over,
+            "cricket_moment": moment,
+            "tweet": tweet,
+            "event_to_tweet_seconds": round(latency, 3),
+        }, ensure_ascii=False)
+        # Workers write from threads; keep their lines whole
+        with self._output_lock, open(self.output_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def run(self, source: AsyncIterator[Dict[str, Any]], drain: bool = False) -> None:
+        """Consume a feed source until it ends (or forever for a live tail).
+
+        Args:
+            source: Async iterator of raw feed events
+            drain: Wait for queued events to be tweeted once the source ends
+        """
+        workers = [asyncio.create_task(self._worker(index)) for index in range(self.concurrency)]
+        try:
+            async for data in source:
+                self.submit(data)
+            if drain:
+                await self.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+def _parse_line(line: str) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        feed_events.labels("invalid").inc()
+        return None
+    return data if isinstance(data, dict) else None
+
+def _open_feed(path: str, from_start: bool) -> Tuple[IO[str], int]:
+    """Open the feed (at its end unless from_start) and return it with its inode."""
+    f = open(path, "r", encoding="utf-8")
+    if not from_start:
+        f.seek(0, os.SEEK_END)
+    return f, os.fstat(f.fileno()).st_ino
+
+async def tail_file(
+    path: str,
+    from_start: bool = False,
+    follow: bool = True,
+    poll_interval: float = 0.1,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield events appended to a JSONL file, surviving truncation and rotation.
+
+    Args:
+        path: Feed file
+        from_start: Also yield the events already in the file
+        follow: Keep waiting for new lines at end of file
+        poll_interval: Seconds between checks for new lines
+    """
+    # Filesystem calls run in threads so a slow disk doesn't stall the loop
+    while not await asyncio.to_thread(os.path.exists, path):
+        if not follow:
+            return
+        await asyncio.sleep(poll_interval)
+
+    f, inode = await asyncio.to_thread(_open_feed, path, from_start)
+    try:
+        partial = ""
+        while True:
+            # Everything appended since the last read, in one thread hop
+            lines = await asyncio.to_thread(f.readlines)
+            for line in lines:
+                # A line without a newline is still being written
+                if not line.endswith("\n"):
+                    partial += line
+                    continue
+                data = _parse_line(partial + line)
+                partial = ""
+                if data is not None:
+                    yield data
+            if lines:
+                continue
+
+            if not follow:
+                return
+            await asyncio.sleep(poll_interval)
+            try:
+                stat = await asyncio.to_thread(os.stat, path)
+            except FileNotFoundError:
+                continue
+            if stat.st_ino != inode or stat.st_size < f.tell():
+                # Rotated or truncated: start over on the new file
+                await asyncio.to_thread(f.close)
+                f, inode = await asyncio.to_thread(_open_feed, path, True)
+                partial = ""
+    finally:
+        f.close()
+
+async def socket_source(host: str, port: int) -> AsyncIterator[Dict[str, Any]]:
+    """Yield events sent as JSONL lines to a local TCP socket."""
+    events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                data = _parse_line(line.decode("utf-8", errors="replace"))
+                if data is not None:
+                    events.put_nowait(data)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Accepting feed events on {host}:{port}")
+    try:
+        while True:
+            yield await events.get()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+def source_from_env() -> Optional[AsyncIterator[Dict[str, Any]]]:
+    """Feed source configured by FEED_PATH / FEED_SOCKET_PORT, if any."""
+    if os.getenv("FEED_PATH"):
+        return tail_file(os.environ["FEED_PATH"])
+    if os.getenv("FEED_SOCKET_PORT"):
+        return socket_source(os.getenv("FEED_SOCKET_HOST", "127.0.0.1"), int(os.environ["FEED_SOCKET_PORT"]))
+    return None
+
+async def main():
+    setup_logging("feed")
+    parser = argparse.ArgumentParser(description="Generate tweets from a live ball-by-ball feed")
+    parser.add_argument("--file", help="JSONL feed file to tail")
+    parser.add_argument("--socket-port", type=int, help="Accept JSONL events on this local TCP port")
+    parser.add_argument("--from-start", action="store_true", help="Also process events already in the file")
+    parser.add_argument("--no-follow", action="store_true",
+                        help="Stop at end of file once every queued event is handled")
+    args = parser.parse_args()
+
+    if args.file:
+        source = tail_file(args.file, from_start=args.from_start, follow=not args.no_follow)
+    elif args.socket_port:
+        source = socket_source("127.0.0.1", args.socket_port)
+    else:
+        source = source_from_env()
+    if source is None:
+        parser.error("give --file or --socket-port (or set FEED_PATH / FEED_SOCKET_PORT)")
+
+    ingestor = FeedIngestor()
+    try:
+        await ingestor.run(source, drain=args.no_follow)
+    finally:
+        generation_store.flush()
+        if ingestor.latencies:
+            ordered = sorted(ingestor.latencies)
+            print(
+                f"\n{len(ordered)} tweets, event-to-tweet p50 {ordered[len(ordered) // 2]:.2f}s, "
+                f"max {ordered[-1]:.2f}s"
+            )
+
+if __name__ == "__main__":
+    asyncio.run(main())
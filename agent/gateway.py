@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+"""
+Agent Gateway - Consistent-hash routing of tweet requests across agent replicas
+
+Every ``POST /v1/tweets`` is routed by the normalized ``cricket_moment`` to one
+agent replica on a consistent-hash ring, so duplicate moments converge on the same
+node and hit its result cache and single-flight instead of being generated once per
+replica. Each replica owns ``GATEWAY_VNODES`` points on the ring to spread load
+evenly. Replicas that fail their readiness check (``/ready``, so new replicas join
+only once warmed up), or refuse a connection, leave the ring until they recover;
+only the moments they owned move, to the next node on the ring. Other requests
+are forwarded to any healthy replica; Server-Sent Events responses are relayed as
+they arrive instead of being buffered.
+
+Each replica's ``/v1/tweets/stream`` carries only the tweets that replica
+generated, so the gateway subscribes to every healthy replica and merges their
+frames into one stream. Merged event ids list each replica's last id
+(``0:12,1:7``, by position in ``GATEWAY_REPLICAS``), so a client that reconnects
+with ``Last-Event-ID`` gets every replica's missed tweets replayed. The merged
+stream ends when any replica's stream does, and the reconnect picks up the
+replicas healthy at that time.
+
+    GATEWAY_REPLICAS            comma-separated agent base URLs (default http://localhost:8000)
+    GATEWAY_VNODES              virtual nodes per replica (default 100)
+    GATEWAY_HEALTH_INTERVAL     seconds between health checks (default 5)
+    GATEWAY_PORT                port to listen on (default 8080)
+
+    python gateway.py
+"""
+
+import os
+import json
+import bisect
+import asyncio
+import hashlib
+import logging
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from generation_store import moment_hash
+from json_logging import setup_logging
+from metrics import registry, CONTENT_TYPE_LATEST
+
+logger = logging.getLogger(__name__)
+
+gateway_requests = registry.counter(
+    "gateway_requests",
+    "Requests forwarded by the gateway, by replica and status code",
+    ["replica", "status"],
+)
+gateway_failovers = registry.counter(
+    "gateway_failovers",
+    "Requests retried on the next replica because the owner could not be reached",
+    ["replica"],
+)
+gateway_replica_healthy = registry.gauge(
+    "gateway_replica_healthy",
+    "1 if the replica is on the hash ring, 0 if it is out for failing health checks",
+    ["replica"],
+)
+
+# Hop-by-hop headers and headers httpx recomputes
+_DROPPED_HEADERS = {"host", "content-length", "connection", "keep-alive", "transfer-encoding"}
+
+# Frames buffered per replica stream before the gateway stops reading it, so a
+# slow client is dropped by the replicas instead of growing the gateway's memory
+_STREAM_BUFFER = 64
+
+def _parse_stream_id(last_event_id: Optional[str]) -> Dict[int, str]:
+    """Per-replica event ids from a merged ``Last-Event-ID`` such as ``0:12,1:7``."""
+    positions: Dict[int, str] = {}
+    for part in (last_event_id or "").split(","):
+        index, _, event_id = part.strip().partition(":")
+        if index.isdigit() and event_id.isdigit():
+            positions[int(index)] = event_id
+    return positions
+
+def _stream_id(positions: Dict[int, str]) -> str:
+    return ",".join(f"{index}:{event_id}" for index, event_id in sorted(positions.items()))
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes."""
+
+    def __init__(self, nodes: List[str], vnodes: int = 100):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        for index in range(self.vnodes):
+            point = _ring_hash(f"{node}#{index}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def nodes_for(self, key: str) -> List[str]:
+        """Distinct nodes in ring order starting at the key's owner (owner first)."""
+        if not self._points:
+            return []
+        start = bisect.bisect(self._points, _ring_hash(key)) % len(self._points)
+        ordered: List[str] = []
+        for offset in range(len(self._points)):
+            node = self._owners[self._points[(start + offset) % len(self._points)]]
+            if node not in ordered:
+                ordered.append(node)
+        return ordered
+
+class Gateway:
+    """Health-aware consistent-hash router in front of the agent replicas."""
+
+    def __init__(
+        self,
+        replicas: Optional[List[str]] = None,
+        vnodes: Optional[int] = None,
+        health_interval: Optional[float] = None,
+    ):
+        """Initialize the gateway; unset arguments fall back to the GATEWAY_* variables."""
+        raw = os.getenv("GATEWAY_REPLICAS", "http://localhost:8000")
+        self.replicas = replicas or [replica.strip().rstrip("/") for replica in raw.split(",") if replica.strip()]
+        self.vnodes = vnodes or int(os.getenv("GATEWAY_VNODES", "100"))
+        self.health_interval = health_interval or float(os.getenv("GATEWAY_HEALTH_INTERVAL", "5"))
+        self.ring = HashRing(self.replicas, self.vnodes)
+        self.healthy = {replica: True for replica in self.replicas}
+        self._round_robin = itertools.cycle(self.replicas)
+        self.client: Optional[httpx.AsyncClient] = None
+        for replica in self.replicas:
+            gateway_replica_healthy.labels(replica).set(1)
+
+    def set_health(self, replica: str, healthy: bool) -> None:
+        """Take a replica off the ring or put it back; only its keys move."""
+        if self.healthy[replica] == healthy:
+            return
+        self.healthy[replica] = healthy
+        gateway_replica_healthy.labels(replica).set(1 if healthy else 0)
+        if healthy:
+            self.ring.add(replica)
+            logger.info(f"Replica {replica} is healthy again, back on the ring")
+        else:
+            self.ring.remove(replica)
+            logger.warning(f"Replica {replica} is unhealthy, its moments move to the next replica")
+
+    async def check_health(self) -> None:
+        """Probe every replica's /ready once."""
+        async def probe(replica: str) -> Tuple[str, bool]:
+            try:
+                response = await self.client.get(f"{replica}/ready", timeout=2.0)
+                return replica, response.status_code == 200
+            except httpx.HTTPError:
+                return replica, False
+
+        for replica, healthy in await asyncio.gather(*(probe(replica) for replica in self.replicas)):
+            self.set_health(replica, healthy)
+
+    async def health_loop(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def route(self, cricket_moment: Optional[str]) -> List[str]:
+        """Replicas to try for a moment, owner first; any healthy replica without a moment."""
+        if cricket_moment:
+            return self.ring.nodes_for(moment_hash(cricket_moment))
+        healthy = [replica for replica in self.replicas if self.healthy[replica]]
+        if not healthy:
+            return []
+        start = next(self._round_robin)
+        while start not in healthy:
+            start = next(self._round_robin)
+        return [start] + [replica for replica in healthy if replica != start]
+
+    async def forward(self, request: Request, replicas: List[str], body: bytes) -> Response:
+        """Send the request to the first reachable replica in the list."""
+        headers = {key: value for key, value in request.headers.items() if key.lower() not in _DROPPED_HEADERS}
+        for replica in replicas:
+            upstream_request = self.client.build_request(
+                request.method,
+                f"{replica}{request.url.path}",
+                params=request.query_params,
+                content=body,
+                headers=headers,
+            )
+            try:
+                upstream = await self.client.send(upstream_request, stream=True)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                gateway_failovers.labels(replica).inc()
+                self.set_health(replica, False)
+                continue
+            gateway_requests.labels(replica, str(upstream.status_code)).inc()
+            response_headers = {
+                key: value for key, value in upstream.headers.items()
+                if key.lower() not in _DROPPED_HEADERS | {"content-encoding"}
+            }
+            response_headers["X-Gateway-Replica"] = replica
+            if upstream.headers.get("content-type", "").startswith("text/event-stream"):
+                return StreamingResponse(
+                    _relay(upstream), status_code=upstream.status_code, headers=response_headers,
+                )
+            try:
+                content = await upstream.aread()
+            finally:
+                await upstream.aclose()
+            return Response(content, status_code=upstream.status_code, headers=response_headers)
+        return JSONResponse(status_code=503, content={"detail": "No healthy agent replica"})
+
+    async def fan_in(self, request: Request) -> Response:
+        """Merge the tweet streams of every healthy replica into one event stream."""
+        positions = _parse_stream_id(request.headers.get("Last-Event-ID"))
+        headers = {
+            key: value for key, value in request.headers.items()
+            if key.lower() not in _DROPPED_HEADERS | {"last-event-id"}
+        }
+
+        async def subscribe(index: int, replica: str) -> Optional[httpx.Response]:
+            replica_headers = dict(headers)
+            if index in positions:
+                replica_headers["Last-Event-ID"] = positions[index]
+            upstream_request = self.client.build_request(
+                "GET", f"{replica}{request.url.path}", params=request.query_params, headers=replica_headers,
+            )
+            try:
+                upstream = await self.client.send(upstream_request, stream=True)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self.set_health(replica, False)
+                return None
+            gateway_requests.labels(replica, str(upstream.status_code)).inc()
+            if upstream.status_code != 200:
+                await upstream.aclose()
+                return None
+            return upstream
+
+        indexed = [(index, replica) for index, replica in enumerate(self.replicas) if self.healthy[replica]]
+        opened = await asyncio.gather(*(subscribe(index, replica) for index, replica in indexed))
+        upstreams = {index: upstream for (index, _), upstream in zip(indexed, opened) if upstream is not None}
+        if not upstreams:
+            return JSONResponse(status_code=503, content={"detail": "No agent replica is streaming"})
+        return StreamingResponse(
+            _merge(upstreams, positions),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                "X-Gateway-Replica": ",".join(self.replicas[index] for index in upstreams),
+            },
+        )
+
+async def _merge(upstreams: Dict[int, httpx.Response], positions: Dict[int, str]) -> AsyncIterator[bytes]:
+    """Interleave whole SSE frames from several replicas, rewriting ids to the merged form."""
+    frames: "asyncio.Queue[Tuple[int, Optional[bytes]]]" = asyncio.Queue(maxsize=_STREAM_BUFFER * len(upstreams))
+
+    async def pump(index: int, upstream: httpx.Response) -> None:
+        pending = b""
+        try:
+            async for chunk in upstream.aiter_bytes():
+                # A chunk may end mid-frame; only complete frames are interleaved
+                *complete, pending = (pending + chunk).split(b"\n\n")
+                for frame in complete:
+                    await frames.put((index, frame))
+        except httpx.HTTPError as e:
+            logger.warning(f"Tweet stream from replica {index} failed: {str(e)}")
+        finally:
+            await upstream.aclose()
+        await frames.put((index, None))
+
+    def rewrite(index: int, frame: bytes) -> bytes:
+        lines = frame.split(b"\n")
+        for position, line in enumerate(lines):
+            if line.startswith(b"id: "):
+                positions[index] = line[4:].decode("utf-8")
+                lines[position] = f"id: {_stream_id(positions)}".encode("utf-8")
+        return b"\n".join(lines) + b"\n\n"
+
+    pumps = [asyncio.create_task(pump(index, upstream)) for index, upstream in upstreams.items()]
+    try:
+        while True:
+            # Whatever else is already queued goes out in the same write
+            batch = [await frames.get()]
+            while not frames.empty():
+                batch.append(frames.get_nowait())
+            output = []
+            ended = False
+            for index, frame in batch:
+                if frame is None:
+                    ended = True
+                    break
+                output.append(rewrite(index, frame))
+            if output:
+                yield b"".join(output)
+            if ended:
+                # One replica's stream is over (restart, or it dropped this client):
+                # end here so the client reconnects with every replica's position
+                return
+    finally:
+        for task in pumps:
+            task.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+async def _relay(upstream: httpx.Response) -> AsyncIterator[bytes]:
+    """Pass an event stream through chunk by chunk; closing it releases the upstream connection."""
+    try:
+        async for chunk in upstream.aiter_bytes():
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+gateway = Gateway()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the upstream connection pool and the health checker"""
+    # Generation can take a while; the agents enforce their own deadlines
+    gateway.client = httpx.AsyncClient(
+        timeout=httpx.Timeout(connect=2.0, read=180.0, write=10.0, pool=10.0),
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+    )
+    health_task = asyncio.create_task(gateway.health_loop())
+    yield
+    health_task.cancel()
+    await asyncio.gather(health_task, return_exceptions=True)
+    await gateway.client.aclose()
+
+app = FastAPI(title="IPL Tweet Agent Gateway", lifespan=lifespan)
+
+@app.get("/gateway/status")
+async def status():
+    """Replica health and ring size"""
+    return {"replicas": gateway.healthy, "vnodes": gateway.vnodes, "ring_points": len(gateway.ring)}
+
+@app.get("/gateway/route")
+async def route(cricket_moment: str):
+    """Replica a moment is routed to (with fallbacks in order)"""
+    return {"moment_hash": moment_hash(cricket_moment), "replicas": gateway.route(cricket_moment)}
+
+@app.get("/health")
+async def health():
+    """Health of the gateway itself"""
+    healthy = any(gateway.healthy.values())
+    return JSONResponse(status_code=200 if healthy else 503, content={"status": "healthy" if healthy else "degraded"})
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose gateway metrics in the Prometheus text format"""
+    return Response(registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/v1/tweets")
+async def tweets(request: Request):
+    """Route a tweet request to the replica that owns its moment"""
+    body = await request.body()
+    try:
+        cricket_moment = json.loads(body).get("cricket_moment")
+    except (ValueError, AttributeError):
+        cricket_moment = None
+    return await gateway.forward(request, gateway.route(cricket_moment), body)
+
+@app.get("/v1/tweets/stream")
+async def tweet_stream(request: Request):
+    """Tweets generated on every healthy replica, as one event stream"""
+    return await gateway.fan_in(request)
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def proxy(path: str, request: Request):
+    """Forward everything else to any healthy replica"""
+    return await gateway.forward(request, gateway.route(None), await request.body())
+
+if __name__ == "__main__":
+    setup_logging("gateway")
+    uvicorn.run(app, host=os.getenv("GATEWAY_HOST", "0.0.0.0"), port=int(os.getenv("GATEWAY_PORT", "8080")))
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""
+Generation Store - Embedded SQLite record of every tweet generation
+
+Each generation (one tweet type of one request) is stored with the request id, the
+cricket moment and its hash, the hash of the rendered prompt, the tweet and its
+candidates, token usage and step timings. The database runs in WAL mode so the API
+can read while rows are written.
+
+Writes never happen on the request path: ``record`` only enqueues the row and a
+background writer thread creates the database on its first run and inserts queued
+rows in batches, one transaction per batch.
+If the queue is full the row is dropped and counted rather than slowing requests.
+
+    AGENT_DB_PATH               SQLite file (default /data/generations.db, the agent-data volume)
+    AGENT_DB_BATCH_SIZE         max rows per write transaction (default 100)
+    AGENT_DB_FLUSH_INTERVAL     max seconds a queued row waits before it is written (default 1.0)
+    AGENT_DB_QUEUE_SIZE         max queued rows before new ones are dropped (default 10000)
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+store_rows = registry.counter(
+    "agent_store_rows",
+    "Generation rows handled by the store, by outcome",
+    ["result"],
+)
+store_batch_size = registry.histogram(
+    "agent_store_batch_size",
+    "Rows written per store transaction",
+    [],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+store_queue_depth = registry.gauge(
+    "agent_store_queue_depth",
+    "Generation rows waiting to be written",
+    [],
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    tweet_type TEXT NOT NULL,
+    cricket_moment TEXT NOT NULL,
+    moment_hash TEXT NOT NULL,
+    prompt_hash TEXT,
+    tweet TEXT,
+    tweet_hash TEXT,
+    candidates TEXT,
+    model TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    total_tokens INTEGER,
+    latency_ms REAL,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_generations_moment_hash ON generations (moment_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_generations_created_at ON generations (created_at);
+CREATE INDEX IF NOT EXISTS idx_generations_type_created_at ON generations (tweet_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_generations_tweet_hash ON generations (tweet_hash);
+"""
+
+_COLUMNS = (
+    "request_id", "created_at", "tweet_type", "cricket_moment", "moment_hash", "prompt_hash",
+    "tweet", "tweet_hash", "candidates", "model", "status", "error",
+    "input_tokens", "output_tokens", "total_tokens", "latency_ms", "timings",
+)
+_INSERT = (
+    f"INSERT INTO generations ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+
+# Queued to tell the writer thread to flush and exit
+_STOP = object()
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def moment_hash(cricket_moment: str) -> str:
+    """Hash of a cricket moment, insensitive to case and whitespace."""
+    return _hash(re.sub(r"\s+", " ", cricket_moment).strip().lower())
+
+def text_hash(text: Optional[str]) -> Optional[str]:
+    """Hash of a prompt or tweet, or None when there is none."""
+    return _hash(text.strip()) if text else None
+
+class GenerationStore:
+    """SQLite generation log with a batched background writer."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """Initialize the store; unset arguments fall back to the AGENT_DB_* variables."""
+        self.path = path or os.getenv("AGENT_DB_PATH", "/data/generations.db")
+        self.batch_size = batch_size or int(os.getenv("AGENT_DB_BATCH_SIZE", "100"))
+        self.flush_interval = flush_interval or float(os.getenv("AGENT_DB_FLUSH_INTERVAL", "1.0"))
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size or int(os.getenv("AGENT_DB_QUEUE_SIZE", "10000")))
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.enabled = True
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA busy_timeout = 5000")
+        return connection
+
+    def _initialize(self) -> bool:
+        """Create the database and schema once; disables the store if that fails."""
+        if self._initialized:
+            return self.enabled
+        with self._lock:
+            if self._initialized:
+                return self.enabled
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                connection = self._connect()
+                try:
+                    connection.execute("PRAGMA journal_mode = WAL")
+                    connection.execute("PRAGMA synchronous = NORMAL")
+                    connection.executescript(_SCHEMA)
+                    connection.commit()
+                finally:
+                    connection.close()
+                logger.info(f"Generation store ready at {self.path}")
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Generation store disabled, cannot open {self.path}: {str(e)}")
+                self.enabled = False
+            self._initialized = True
+        return self.enabled
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="generation-store-writer", daemon=True)
+                self._writer.start()
+
+    def record(self, **row: Any) -> None:
+        """Queue one generation row for writing; never blocks the caller.
+
+        Args:
+            **row: Column values (see _COLUMNS); ``created_at`` defaults to now and
+                ``candidates``/``timings`` may be passed as lists/dicts
+        """
+        # The database is created by the writer thread, never on the caller's
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        row.setdefault("created_at", time.time())
+        for key in ("candidates", "timings"):
+            if row.get(key) is not None and not isinstance(row[key], str):
+                row[key] = json.dumps(row[key], ensure_ascii=False)
+        try:
+            self._queue.put_nowait(tuple(row.get(column) for column in _COLUMNS))
+            store_queue_depth.set(self._queue.qsize())
+        except queue.Full:
+            store_rows.labels("dropped").inc()
+
+    def _write_loop(self) -> None:
+        """Writer thread: drain the queue in batches until told to stop."""
+        if not self._initialize():
+            self._drop_queued()
+            return
+        connection = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write_batch(connection, batch)
+        finally:
+            connection.close()
+
+    def _drop_queued(self) -> None:
+        """Drop the rows queued before the store found it cannot open the database."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                store_rows.labels("dropped").inc()
+        store_queue_depth.set(0)
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: List[tuple]) -> None:
+        try:
+            with connection:
+                connection.executemany(_INSERT, batch)
+            store_rows.labels("written").inc(len(batch))
+            store_batch_size.observe(len(batch))
+        except sqlite3.Error as e:
+            logger.error(f"Generation store write failed, {len(batch)} rows lost: {str(e)}")
+            store_rows.labels("failed").inc(len(batch))
+        store_queue_depth.set(self._queue.qsize())
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Stop the writer after it has written everything queued so far."""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        writer.join(timeout)
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        if not self._initialize():
+            return []
+        connection = self._connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        results = []
+        for row in rows:
+            item = dict(row)
+            for key in ("candidates", "timings"):
+                if item.get(key):
+                    item[key] = json.loads(item[key])
+            results.append(item)
+        return results
+
+    def recent(self, limit: int = 20, tweet_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent generations, newest first.
+
+        Args:
+            limit: Maximum number of rows
+            tweet_type: Only return this tweet type
+
+        Returns:
+            Generation rows as dictionaries
+        """
+        if tweet_type:
+            return self._query(
+                "SELECT * FROM generations WHERE tweet_type = ? ORDER BY created_at DESC LIMIT ?",
+                (tweet_type, limit),
+            )
+        return self._query("SELECT * FROM generations ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def duplicates(
+        self,
+        cricket_moment: Optional[str] = None,
+        tweet: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Earlier generations for the same moment, or that produced the same tweet.
+
+        Args:
+            cricket_moment: Moment to look up (matched by normalized hash)
+            tweet: Tweet text to look up (matched by hash)
+            limit: Maximum number of rows
+
+        Returns:
+            Matching generation rows, newest first
+        """
+        if cricket_moment:
+            return self._query(
+                "SELECT * FROM generations WHERE moment_hash = ? ORDER BY created_at DESC LIMIT ?",
+                (moment_hash(cricket_moment), limit),
+            )
+        if tweet:
+            return self._query(
+                "SELECT * FROM generations WHERE tweet_hash = ? ORDER BY created_at DESC LIMIT ?",
+                (text_hash(tweet), limit),
+            )
+        return []
+
+# One store per process, shared by every request
+generation_store = GenerationStore()
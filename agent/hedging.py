@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Request Hedging - Cut tail latency of the tweet-writing model call
+
+If the first model call has not returned after a configurable percentile of recent
+latencies, a duplicate call is issued and whichever finishes first wins; the other
+is cancelled. Extra spend is capped by a hedge budget so hedging cannot double the
+bill when the provider is uniformly slow: every call earns ``LLM_HEDGE_MAX_RATIO``
+of a hedge, a hedge spends one, and at most ``LLM_HEDGE_BURST`` unspent hedges are
+kept. A latency burst after a long healthy period can therefore use up only the
+burst, and after that hedges at most the ratio of calls.
+
+    LLM_HEDGING             "true" to enable hedging (default false)
+    LLM_HEDGE_PERCENTILE    latency percentile that triggers a hedge (default 95)
+    LLM_HEDGE_MIN_DELAY     never hedge earlier than this many seconds (default 1.0)
+    LLM_HEDGE_MAX_RATIO     max fraction of calls that may be hedged (default 0.1)
+    LLM_HEDGE_MIN_SAMPLES   latencies needed before hedging starts (default 20)
+    LLM_HEDGE_BURST         unspent hedges that may be saved up (default 5)
+"""
+
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from metrics import registry
+
+T = TypeVar("T")
+
+hedges_fired = registry.counter(
+    "agent_llm_hedges_fired",
+    "Duplicate LLM calls issued because the first one was slow",
+    ["model"],
+)
+hedges_won = registry.counter(
+    "agent_llm_hedges_won",
+    "Hedged LLM calls where the duplicate finished first",
+    ["model"],
+)
+hedges_skipped = registry.counter(
+    "agent_llm_hedges_skipped",
+    "Slow LLM calls that were not hedged because the hedge budget was exhausted",
+    ["model"],
+)
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(self, window: int = 500):
+        """Initialize the tracker.
+
+        Args:
+            window: Number of most recent latencies to keep
+        """
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None when empty."""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+class HedgePolicy:
+    """Decides when to hedge a model call and enforces the hedge budget."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        min_delay: Optional[float] = None,
+        max_ratio: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        burst: Optional[float] = None,
+    ):
+        """Initialize the policy; unset arguments fall back to the LLM_HEDGE_* variables."""
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv("LLM_HEDGING", "false").lower() == "true"
+        )
+        self.percentile = percentile if percentile is not None else float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.min_delay = min_delay if min_delay is not None else float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+        self.max_ratio = max_ratio if max_ratio is not None else float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+        self.min_samples = min_samples if min_samples is not None else int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.burst = burst if burst is not None else float(os.getenv("LLM_HEDGE_BURST", "5"))
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self.calls = 0
+        self.hedges = 0
+        # Token bucket: each call adds max_ratio, each hedge takes one
+        self.budget = 0.0
+
+    def tracker(self, model: str) -> LatencyTracker:
+        """Latency window for a model."""
+        if model not in self.trackers:
+            self.trackers[model] = LatencyTracker()
+        return self.trackers[model]
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this call must not be hedged."""
+        tracker = self.tracker(model)
+        if not self.enabled or len(tracker) < self.min_samples:
+            return None
+        threshold = tracker.percentile(self.percentile)
+        return max(self.min_delay, threshold or 0.0)
+
+    def try_acquire_hedge(self) -> bool:
+        """Reserve budget for one hedge; False when the bucket is empty."""
+        # Tolerate float rounding: ten calls at a ratio of 0.1 earn exactly one hedge
+        if self.budget < 1.0 - 1e-9:
+            return False
+        self.budget -= 1.0
+        self.hedges += 1
+        return True
+
+    async def call(self, model: str, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run a model call, hedging it if it is slower than usual.
+
+        Args:
+            model: Model name, used for the latency window and metrics
+            make_call: Zero-argument factory returning a fresh awaitable per attempt
+
+        Returns:
+            The result of whichever attempt finished first
+        """
+        self.calls += 1
+        self.budget = min(self.burst, self.budget + self.max_ratio)
+        started = time.monotonic()
+        delay = self.hedge_delay(model)
+
+        if delay is None:
+            result = await make_call()
+            self.tracker(model).record(time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(make_call())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                if self.try_acquire_hedge():
+                    hedges_fired.labels(model).inc()
+                    tasks.add(asyncio.ensure_future(make_call()))
+                else:
+                    hedges_skipped.labels(model).inc()
+
+            # Take the first attempt that succeeds; only fail once every attempt failed
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            hedges_won.labels(model).inc()
+                        self.tracker(model).record(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+# Shared by every agent in the process so latency history survives across requests
+hedge_policy = HedgePolicy()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+LLM HTTP Client - Process-wide pooled HTTP client for the chat model
+
+Every IPLTweetAgent builds its own ChatOpenAI instance, which by default also
+builds its own HTTP client, so TCP connections and TLS sessions were thrown away
+after each request. All chat models now share one keep-alive connection pool
+configured from the environment:
+
+    LLM_HTTP_MAX_CONNECTIONS    maximum open connections (default 100)
+    LLM_HTTP_MAX_KEEPALIVE      idle connections kept for reuse (default 20)
+    LLM_HTTP_KEEPALIVE_EXPIRY   seconds an idle connection is kept (default 30)
+    LLM_HTTP2                   "true" to negotiate HTTP/2 (needs the h2 package)
+    LLM_CONNECT_TIMEOUT         connect timeout in seconds (default 5)
+    LLM_READ_TIMEOUT            read timeout in seconds (default 60)
+    LLM_WRITE_TIMEOUT           write timeout in seconds (default 10)
+    LLM_POOL_TIMEOUT            seconds to wait for a free connection (default 5)
+"""
+
+import os
+import logging
+import importlib.util
+from typing import Any, Dict, Optional
+
+import httpx
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+llm_http_requests = registry.counter(
+    "agent_llm_http_requests",
+    "HTTP requests sent to the LLM provider, by whether they reused a pooled connection",
+    ["connection"],
+)
+llm_http_connections_opened = registry.counter(
+    "agent_llm_http_connections_opened",
+    "New TCP connections opened to the LLM provider",
+)
+llm_http_tls_handshakes = registry.counter(
+    "agent_llm_http_tls_handshakes",
+    "TLS handshakes performed with the LLM provider",
+)
+
+_client: Optional[httpx.AsyncClient] = None
+
+def llm_http_timeout() -> httpx.Timeout:
+    """Explicit connect/read/write/pool timeouts for LLM calls."""
+    return httpx.Timeout(
+        connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+        read=float(os.getenv("LLM_READ_TIMEOUT", "60")),
+        write=float(os.getenv("LLM_WRITE_TIMEOUT", "10")),
+        pool=float(os.getenv("LLM_POOL_TIMEOUT", "5")),
+    )
+
+def _http2_enabled() -> bool:
+    if os.getenv("LLM_HTTP2", "false").lower() != "true":
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("LLM_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+async def _trace_connection_reuse(request: httpx.Request) -> None:
+    """Request hook: follow httpcore's trace events to count connection reuse."""
+    state: Dict[str, Any] = {"opened": False}
+
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            state["opened"] = True
+            llm_http_connections_opened.inc()
+        elif event_name == "connection.start_tls.complete":
+            llm_http_tls_handshakes.inc()
+        elif event_name.endswith("send_request_headers.started"):
+            llm_http_requests.labels("new" if state["opened"] else "reused").inc()
+
+    request.extensions["trace"] = trace
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30")),
+        )
+        _client = httpx.AsyncClient(
+            limits=limits,
+            timeout=llm_http_timeout(),
+            http2=_http2_enabled(),
+            follow_redirects=True,
+            event_hooks={"request": [_trace_connection_reuse]},
+        )
+    return _client
+
+async def close_llm_http_client() -> None:
+    """Close the shared client (on application shutdown)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Idempotency Keys - Answer retried POST /v1/tweets requests without generating again
+
+A client that sends an ``Idempotency-Key`` header gets the same response for every
+request with that key, within ``IDEMPOTENCY_TTL`` seconds. Only the first request
+runs the pipeline. Retries that arrive while it is still running wait for it, and
+later retries get the stored response without touching the MCP server or the model.
+
+The key is first claimed with a short-lived "pending" entry. The claim is atomic in
+the backend, so with the sqlite backend one worker on the host generates and
+retries on the other workers poll until the response is stored. A retry waits
+no longer than its own request deadline (then it gets a 504) and stops waiting
+as soon as its client disconnects. Only successful
+responses are stored. When the original request fails, or its client goes away,
+the claim is released and the next retry generates again. Reusing a key for a
+different request body is rejected.
+
+Entries live in the same kind of backend as the result cache (``result_cache.py``):
+
+    IDEMPOTENCY_BACKEND         memory, sqlite or none to ignore the header (default memory)
+    IDEMPOTENCY_TTL             seconds a stored response is replayed (default 86400)
+    IDEMPOTENCY_LOCK_SECONDS    seconds a claim is held before another worker may take over (default 120)
+    IDEMPOTENCY_MAX_ENTRIES     entries kept before LRU eviction (default 10000)
+    IDEMPOTENCY_PATH            SQLite file for the sqlite backend (default /data/idempotency.db)
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import sqlite3
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from deadline import Deadline, run_within
+from result_cache import CacheBackend, MemoryCache, SQLiteCache
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Longest Idempotency-Key accepted
+MAX_KEY_LENGTH = 255
+
+# How often a retry checks on a request another worker is generating
+PENDING_POLL_INTERVAL = 0.1
+
+idempotency_requests = registry.counter(
+    "agent_idempotency_requests",
+    "Requests with an Idempotency-Key, by result (new, replayed, shared, mismatch)",
+    ["result"],
+)
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is sent again with a different request body."""
+
+class IdempotencyWaitAbandoned(Exception):
+    """Raised when a retry's client disconnects while it waits for the first request."""
+
+def fingerprint(body: Dict[str, Any]) -> str:
+    """Stable hash of a request body, to tell a retry from a reused key."""
+    return hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def create_idempotency_backend(kind: Optional[str] = None) -> CacheBackend:
+    """Backend selected by IDEMPOTENCY_BACKEND (or `kind`)."""
+    kind = kind or os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    max_entries = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    if kind == "memory":
+        return MemoryCache(max_entries)
+    if kind == "sqlite":
+        path = os.getenv("IDEMPOTENCY_PATH", "/data/idempotency.db")
+        try:
+            return SQLiteCache(path, max_entries)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Idempotency store falling back to memory, cannot open {path}: {str(e)}")
+            return MemoryCache(max_entries)
+    return CacheBackend()
+
+class IdempotencyStore:
+    """Stored responses by idempotency key, with single-flight for concurrent retries."""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        lock_seconds: Optional[float] = None,
+    ):
+        """Initialize the store; unset arguments fall back to the IDEMPOTENCY_* variables."""
+        # Not `backend or ...`: an empty backend is falsy (it has __len__)
+        self.backend = backend if backend is not None else create_idempotency_backend()
+        self.ttl = ttl or float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+        self.lock_seconds = lock_seconds or float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend.name != "none"
+
+    async def _call(self, method: Callable, *args: Any) -> Any:
+        # SQLite may wait on another process's write lock; keep that off the event loop
+        if isinstance(self.backend, SQLiteCache):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _wait(
+        self,
+        future: Optional[asyncio.Future],
+        deadline: Optional[Deadline],
+        disconnected: Optional[Callable[[], Awaitable[bool]]],
+    ) -> None:
+        """One poll interval, or less if the in-flight future finishes, within the deadline."""
+        if future is not None:
+            # asyncio.wait never cancels the future, which other retries may be waiting on
+            waiter = asyncio.wait({future}, timeout=PENDING_POLL_INTERVAL)
+        else:
+            waiter = asyncio.sleep(PENDING_POLL_INTERVAL)
+        await run_within(deadline, waiter, "idempotency_wait")
+        if disconnected is not None and await disconnected():
+            raise IdempotencyWaitAbandoned("Client disconnected while waiting for the original request")
+
+    def _check(self, stored_fingerprint: str, request_fingerprint: str) -> None:
+        if stored_fingerprint != request_fingerprint:
+            idempotency_requests.labels("mismatch").inc()
+            raise IdempotencyKeyReused("Idempotency-Key was already used for a different request")
+
+    async def run(
+        self,
+        key: str,
+        request_fingerprint: str,
+        compute: Callable[[], Awaitable[Any]],
+        deadline: Optional[Deadline] = None,
+        disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Tuple[Any, bool]:
+        """The stored response for the key, or compute and store it.
+
+        Args:
+            key: The client's Idempotency-Key
+            request_fingerprint: fingerprint() of the request body
+            compute: Produces the JSON-serializable response; exceptions mean the
+                request failed and nothing is stored
+            deadline: This request's deadline, which bounds waiting for another
+                request with the same key
+            disconnected: Checked between waits; true ends the wait
+
+        Returns:
+            The response, and whether it is a replay of an earlier request
+
+        Raises:
+            IdempotencyKeyReused: if the key was used for a different request body
+            DeadlineExceeded: if the deadline passed while waiting for another request
+            IdempotencyWaitAbandoned: if the client disconnected while waiting
+        """
+        while True:
+            if key in self._inflight:
+                # A retry while the original is running in this worker: wait for it
+                inflight_fingerprint, future = self._inflight[key]
+                self._check(inflight_fingerprint, request_fingerprint)
+                if not future.done():
+                    await self._wait(future, deadline, disconnected)
+                    if not future.done():
+                        continue
+                if future.cancelled() or future.exception() is not None:
+                    # The original failed and stored nothing; this retry generates again
+                    continue
+                idempotency_requests.labels("shared").inc()
+                return future.result(), True
+
+            stored = await self._call(self.backend.get, key)
+            if stored is not None:
+                self._check(stored["fingerprint"], request_fingerprint)
+                if stored["state"] == "done":
+                    idempotency_requests.labels("replayed").inc()
+                    return stored["response"], True
+                # Another worker holds the claim; its response or an expired claim ends the wait
+                await self._wait(None, deadline, disconnected)
+                continue
+
+            pending = {"state": "pending", "fingerprint": request_fingerprint}
+            if not await self._call(self.backend.add, key, pending, self.lock_seconds):
+                continue
+            break
+
+        idempotency_requests.labels("new").inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (request_fingerprint, future)
+        try:
+            value = await compute()
+            await self._call(
+                self.backend.set, key,
+                {"state": "done", "fingerprint": request_fingerprint, "response": value}, self.ttl,
+            )
+            future.set_result(value)
+            return value, False
+        except BaseException as e:
+            # Release the claim so a retry can generate
+            await asyncio.shield(self._call(self.backend.delete, key))
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Nobody may be waiting; don't log "exception never retrieved"
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+# One store per process; with the sqlite backend every worker on the host shares it
+idempotency_store = IdempotencyStore()
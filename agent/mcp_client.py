@@ -4,14 +4,20 @@ MCP Client Manager - Handles connections to multiple MCP servers
 """
 
 import os
-from typing import Dict, List, Any
+import logging
+from typing import TYPE_CHECKING, Dict, List, Any
 from dotenv import load_dotenv
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain.tools import BaseTool
+
+from circuit_breaker import CircuitOpen, circuit_breakers
+
+if TYPE_CHECKING:
+    from langchain.tools import BaseTool
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class MCPClientManager:
     """Manages connections to multiple MCP servers."""
     
@@ -24,6 +30,9 @@ class MCPClientManager:
     
     async def setup(self):
         """Set up connections to all MCP servers."""
+        # Imported on first connect (the startup warm-up), not when the API boots
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+        
         try:
             # Define MCP server URLs
             tweet_mcp_url = f"http://{self.mcp_host}:{self.tweet_mcp_port}/sse"
@@ -38,21 +47,71 @@ class MCPClientManager:
                 }
             )
             
-            await self.mcp_client.__aenter__()
+            await circuit_breakers.get("mcp").call(self.mcp_client.__aenter__)
             
             # Get tools from the MCP servers
             self.tools = self.mcp_client.get_tools()
             
-            print(f"Connected to MCP servers:")
-            print(f"- Tweet MCP: {tweet_mcp_url}")
-            print(f"Total tools loaded: {len(self.tools)}")
+            logger.info(f"Connected to MCP servers: tweet MCP at {tweet_mcp_url}, {len(self.tools)} tools loaded")
             
-        except Exception as e:
-            print(f"Error connecting to MCP servers: {str(e)}")
-            print("Make sure the Tweet MCP server is running at the specified URL")
+        except CircuitOpen:
+            # Rejected before __aenter__ ran: nothing to clean up
+            self.mcp_client = None
             raise
+        except BaseException as e:
+            # A timeout or cancellation can stop __aenter__ halfway; close what it opened
+            await self._discard_client()
+            if isinstance(e, Exception):
+                logger.error(
+                    f"Error connecting to MCP servers: {str(e)}. "
+                    "Make sure the Tweet MCP server is running at the specified URL"
+                )
+            raise
+    
+    async def _discard_client(self):
+        """Exit a client whose __aenter__ did not complete, then drop it."""
+        client, self.mcp_client = self.mcp_client, None
+        if client is None:
+            return
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Could not close a half-open MCP connection: {str(e)}")
+    
+    def get_session(self, server_name: str = "tweettools"):
+        """Get the raw MCP session for a connected server.
+        
+        Args:
+            server_name: Name the server was registered under
+            
+        Returns:
+            The server's ClientSession, or None if it is not connected
+        """
+        if not self.mcp_client:
+            return None
+        return self.mcp_client.sessions.get(server_name)
+    
+    def is_connected(self, server_name: str = "tweettools") -> bool:
+        """Whether the server's session is open."""
+        return self.get_session(server_name) is not None
+    
+    async def read_resource(self, uri: str, server_name: str = "tweettools") -> str:
+        """Read a text resource from an MCP server.
+        
+        Args:
+            uri: URI of the resource
+            server_name: Name the server was registered under
+            
+        Returns:
+            The concatenated text contents of the resource
+        """
+        session = self.get_session(server_name)
+        if session is None:
+            raise RuntimeError(f"MCP server '{server_name}' is not connected")
+        result = await circuit_breakers.get("mcp").call(lambda: session.read_resource(uri))
+        return "".join(getattr(content, "text", "") for content in result.contents)
     
-    def get_tools(self) -> List[BaseTool]:
+    def get_tools(self) -> List["BaseTool"]:
         """Get all tools from the connected MCP servers.
         
         Returns:
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+"""
+Memory Tracking - tracemalloc instrumentation of requests and message histories
+
+Every generation carries a full LangChain message history (system prompt, the
+multi-KB rendered tweet prompt, the model's reply). ``release_history`` drops it
+from the result as soon as the tweets, usage and prompt hash have been taken out,
+and records its size in ``agent_message_history_bytes``.
+
+With ``MEMORY_TRACING=true`` tracemalloc runs for the life of the process and each
+``/v1/tweets`` request gets a report: the peak traced memory above where it started,
+the memory still allocated when it finished, and the size of the message histories
+it released. tracemalloc counts the whole process, so these are exact only for a
+request that ran alone (``exclusive`` in the report); for overlapping requests they
+include the other requests' allocations too. ``GET /debug/memory`` lists the top
+allocating source lines, optionally as a diff against the previous snapshot, plus
+the most recent request reports. It needs the ``X-Memory-Debug`` header (or
+``?debug=``), carrying ``MEMORY_TRACING_TOKEN`` when that is set. Tracing slows
+allocation-heavy code noticeably, so leave it off in production.
+
+    MEMORY_TRACING          start tracemalloc and report per-request memory (default false)
+    MEMORY_TRACING_TOKEN    value the /debug/memory flag must carry (default: any value)
+    MEMORY_TRACE_FRAMES     stack frames kept per allocation (default 10)
+    MEMORY_RECENT_REQUESTS  request reports kept for /debug/memory (default 100)
+"""
+
+import os
+import hmac
+import time
+import asyncio
+import logging
+import threading
+import tracemalloc
+import contextvars
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+message_history_bytes = registry.histogram(
+    "agent_message_history_bytes",
+    "Size of the message history released after each generation",
+    [],
+    buckets=(1024, 4096, 8192, 16384, 32768, 65536, 131072, 262144),
+)
+request_memory_peak_bytes = registry.histogram(
+    "agent_request_memory_peak_bytes",
+    "Peak traced memory above the start of the request (MEMORY_TRACING only)",
+    ["exclusive"],
+    buckets=(65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456),
+)
+
+# Report of the request being handled in this task (and the tasks it spawns)
+_current_report: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "memory_report", default=None
+)
+
+# Frames that are tracemalloc's own bookkeeping rather than the application's
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+def _content_bytes(content: Any) -> int:
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    if isinstance(content, list):
+        return sum(_content_bytes(part.get("text", "") if isinstance(part, dict) else part) for part in content)
+    return 0
+
+def release_history(result: Dict[str, Any]) -> Dict[str, int]:
+    """Drop a generation result's message history once the tweets have been taken out.
+
+    Args:
+        result: Result of IPLTweetAgent.generate_tweet; its "messages" and "prompt"
+            are removed in place
+
+    Returns:
+        Number of messages and bytes of message content released
+    """
+    messages = result.pop("messages", None) or []
+    released = {
+        "messages": len(messages),
+        "message_bytes": sum(_content_bytes(getattr(message, "content", "")) for message in messages),
+    }
+    result.pop("prompt", None)
+    messages.clear()
+    if released["messages"]:
+        message_history_bytes.observe(released["message_bytes"])
+    report = _current_report.get()
+    if report is not None:
+        report["messages"] += released["messages"]
+        report["message_bytes"] += released["message_bytes"]
+    return released
+
+class MemoryTracker:
+    """Per-request tracemalloc reports and allocation snapshots."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        frames: Optional[int] = None,
+        recent: Optional[int] = None,
+        token: Optional[str] = None,
+    ):
+        """Initialize the tracker; unset arguments fall back to the MEMORY_* variables."""
+        self.enabled = enabled if enabled is not None else os.getenv("MEMORY_TRACING", "false").lower() == "true"
+        self.token = token or os.getenv("MEMORY_TRACING_TOKEN", "")
+        self.frames = frames or int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent or int(os.getenv("MEMORY_RECENT_REQUESTS", "100")))
+        self._active: List[Dict[str, Any]] = []
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start tracemalloc if tracing is enabled."""
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info(f"Memory tracing enabled ({self.frames} frames per allocation)")
+
+    def authorized(self, flag: Optional[str]) -> bool:
+        """Whether a /debug/memory flag (header or query value) may read the reports."""
+        if not self.enabled or not flag:
+            return False
+        if self.token:
+            return hmac.compare_digest(flag, self.token)
+        return flag.lower() not in ("0", "false", "no")
+
+    def begin(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Start a request's report; None (and no work) when tracing is off."""
+        if not self.enabled or not tracemalloc.is_tracing():
+            return None
+        current, _ = tracemalloc.get_traced_memory()
+        if self._active:
+            # The peak is process-wide: neither this nor the running requests are alone any more
+            for report in self._active:
+                report["exclusive"] = False
+        else:
+            tracemalloc.reset_peak()
+        report = {
+            "request_id": request_id,
+            "started_at": time.time(),
+            "exclusive": not self._active,
+            "start_bytes": current,
+            "messages": 0,
+            "message_bytes": 0,
+        }
+        self._active.append(report)
+        report["_token"] = _current_report.set(report)
+        return report
+
+    def end(self, report: Optional[Dict[str, Any]]) -> None:
+        """Finish a request's report and keep it for /debug/memory."""
+        if report is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        _current_report.reset(report.pop("_token"))
+        self._active.remove(report)
+        report["peak_bytes"] = max(0, peak - report["start_bytes"])
+        report["retained_bytes"] = current - report["start_bytes"]
+        report["duration_seconds"] = round(time.time() - report["started_at"], 3)
+        request_memory_peak_bytes.labels(str(report["exclusive"]).lower()).observe(report["peak_bytes"])
+        self.recent.append(report)
+
+    async def summary(self, limit: int = 25, group_by: str = "lineno", compare: bool = False) -> Dict[str, Any]:
+        """Top allocators by size, the traced totals and the recent request reports.
+
+        The snapshot takes seconds on a large heap, so it is taken in a worker thread.
+
+        Args:
+            limit: Number of allocation sites returned
+            group_by: "lineno", "filename" or "traceback"
+            compare: Report growth since the previous call with compare=True
+                instead of absolute sizes
+
+        Returns:
+            JSON-serializable summary
+        """
+        top = await asyncio.to_thread(self._top_allocations, limit, group_by, compare)
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "compared_to_previous": compare,
+            "top": top,
+            "active_requests": len(self._active),
+            "recent_requests": list(reversed(self.recent)),
+        }
+
+    def _top_allocations(self, limit: int, group_by: str, compare: bool) -> List[Dict[str, Any]]:
+        # One snapshot at a time, so concurrent compare calls see a consistent previous one
+        with self._snapshot_lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            if compare and self._previous_snapshot is not None:
+                stats = snapshot.compare_to(self._previous_snapshot, group_by)
+                top = [
+                    {
+                        "location": self._location(stat.traceback, group_by),
+                        "size_bytes": stat.size,
+                        "size_diff_bytes": stat.size_diff,
+                        "count": stat.count,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in stats[:limit]
+                ]
+            else:
+                top = [
+                    {"location": self._location(stat.traceback, group_by), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics(group_by)[:limit]
+                ]
+            if compare or self._previous_snapshot is None:
+                self._previous_snapshot = snapshot
+            return top
+
+    @staticmethod
+    def _location(traceback: tracemalloc.Traceback, group_by: str) -> Any:
+        if group_by == "traceback":
+            return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+        frame = traceback[0]
+        return frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}"
+
+# One tracker per process, like tracemalloc itself
+memory_tracker = MemoryTracker()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Agent Metrics - Counters, gauges and histograms for the agent API
+
+Exposed in the Prometheus text format on the agent's ``/metrics`` endpoint so the
+existing Prometheus/Grafana stack can scrape the agent directly. The metrics are
+``prometheus_client`` metrics in a registry of the agent's own. Modules declare
+them through ``registry.counter/gauge/histogram``, which return the already
+registered metric when a module is imported twice (``python app.py`` runs it as
+``__main__`` and as ``app``).
+"""
+
+import threading
+from typing import Dict, Optional, Sequence, Union
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import disable_created_metrics
+
+# Only the _total/_sum/_count series, as Prometheus scrapes them; no _created timestamps
+disable_created_metrics()
+
+Metric = Union[Counter, Gauge, Histogram]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class MetricsRegistry:
+    """Metric families rendered together on ``/metrics``."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.collector_registry = CollectorRegistry()
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, kind: type, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if type(existing) is not kind or tuple(existing._labelnames) != tuple(labelnames):
+                    raise ValueError(f"Metric {name} already registered with a different shape")
+                return existing
+            metric = kind(name, documentation, labelnames, registry=self.collector_registry, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register (or return the existing) counter; it is exposed as ``<name>_total``."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Register (or return the existing) gauge."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        """Register (or return the existing) histogram."""
+        return self._register(Histogram, name, documentation, labelnames, buckets=tuple(buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        """Every registered metric in the Prometheus text format."""
+        return generate_latest(self.collector_registry).decode("utf-8")
+
+# Process-wide registry used by every agent module
+registry = MetricsRegistry()
+
+__all__ = ["CONTENT_TYPE_LATEST", "MetricsRegistry", "registry"]
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Model Routing - Pick the chat model per tweet type and priority, with SLO fallback
+
+Routes map a request to a model name. The most specific matching key wins:
+``<priority>.<tweet_type>``, then ``<tweet_type>``, then ``<priority>``, then
+``default``. Every model call is reported back to the router. When a model's
+recent p95 latency or error rate breaches its SLO, requests routed to it go to its
+fallback model for ``MODEL_FALLBACK_COOLDOWN`` seconds; after that the primary is
+tried again with a fresh window. A model whose circuit breaker is open (see
+circuit_breaker.py) is skipped the same way.
+
+    MODEL_NAME                  default model (default gpt-4o)
+    MODEL_ROUTES                e.g. "one_liner=gpt-4o-mini,batch=gpt-4o-mini,live.standard=gpt-4o"
+    MODEL_FALLBACKS             e.g. "gpt-4o=gpt-4o-mini"
+    MODEL_SLO_P95_SECONDS       p95 latency that triggers a fallback (default 10)
+    MODEL_SLO_ERROR_RATE        error rate that triggers a fallback (default 0.25)
+    MODEL_SLO_MIN_SAMPLES       calls needed before the SLO is judged (default 20)
+    MODEL_FALLBACK_COOLDOWN     seconds to stay on the fallback (default 60)
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from circuit_breaker import circuit_breakers
+from hedging import LatencyTracker
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+llm_call_seconds = registry.histogram(
+    "agent_llm_call_seconds",
+    "Seconds per tweet-writing model call, by model",
+    ["model"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0),
+)
+llm_calls = registry.counter(
+    "agent_llm_calls",
+    "Tweet-writing model calls, by model and outcome",
+    ["model", "result"],
+)
+llm_tokens = registry.counter(
+    "agent_llm_tokens",
+    "Tokens used by tweet-writing model calls, by model and kind",
+    ["model", "kind"],
+)
+model_fallbacks = registry.counter(
+    "agent_model_fallbacks",
+    "Requests sent to a fallback model because the primary breached its SLO or its circuit is open",
+    ["primary", "fallback"],
+)
+
+def _parse_mapping(raw: str) -> Dict[str, str]:
+    mapping = {}
+    for item in raw.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            if key.strip() and value.strip():
+                mapping[key.strip()] = value.strip()
+    return mapping
+
+class _ModelHealth:
+    """Recent latency and error window of one model."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.latencies = LatencyTracker(window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.degraded_until = 0.0
+
+    def reset(self) -> None:
+        self.latencies = LatencyTracker(self.window)
+        self.outcomes.clear()
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok in self.outcomes if not ok) / len(self.outcomes)
+
+class ModelRouter:
+    """Routes requests to models and falls back when a model breaches its SLO."""
+
+    def __init__(
+        self,
+        default_model: Optional[str] = None,
+        routes: Optional[Dict[str, str]] = None,
+        fallbacks: Optional[Dict[str, str]] = None,
+        slo_p95_seconds: Optional[float] = None,
+        slo_error_rate: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        window: int = 200,
+    ):
+        """Initialize the router; unset arguments fall back to the MODEL_* variables."""
+        self.default_model = default_model or os.getenv("MODEL_NAME", "gpt-4o")
+        self.routes = routes if routes is not None else _parse_mapping(os.getenv("MODEL_ROUTES", ""))
+        self.fallbacks = fallbacks if fallbacks is not None else _parse_mapping(os.getenv("MODEL_FALLBACKS", ""))
+        self.slo_p95_seconds = slo_p95_seconds or float(os.getenv("MODEL_SLO_P95_SECONDS", "10"))
+        self.slo_error_rate = slo_error_rate or float(os.getenv("MODEL_SLO_ERROR_RATE", "0.25"))
+        self.min_samples = min_samples or int(os.getenv("MODEL_SLO_MIN_SAMPLES", "20"))
+        self.cooldown = cooldown or float(os.getenv("MODEL_FALLBACK_COOLDOWN", "60"))
+        self.window = window
+        self.health: Dict[str, _ModelHealth] = {}
+
+    def _health(self, model: str) -> _ModelHealth:
+        if model not in self.health:
+            self.health[model] = _ModelHealth(self.window)
+        return self.health[model]
+
+    def primary(self, tweet_type: str, priority: str = "normal") -> str:
+        """Configured model for a tweet type and priority, ignoring model health."""
+        for key in (f"{priority}.{tweet_type}", tweet_type, priority, "default"):
+            if key in self.routes:
+                return self.routes[key]
+        return self.default_model
+
+    def models(self) -> List[str]:
+        """Every model requests may be routed to: the default, routed and fallback models."""
+        return sorted({self.default_model, *self.routes.values(), *self.fallbacks.values()})
+
+    def is_degraded(self, model: str) -> bool:
+        health = self._health(model)
+        if health.degraded_until and time.monotonic() >= health.degraded_until:
+            # Cooldown over: give the model a clean slate and try it again
+            health.degraded_until = 0.0
+            health.reset()
+        return bool(health.degraded_until)
+
+    def select(self, tweet_type: str, priority: str = "normal") -> str:
+        """Model to use for this request, following fallbacks past degraded models."""
+        model = self.primary(tweet_type, priority)
+        visited = {model}
+        while (self.is_degraded(model) or not circuit_breakers.model(model).available()) and self.fallbacks.get(model) not in (None, *visited):
+            fallback = self.fallbacks[model]
+            model_fallbacks.labels(model, fallback).inc()
+            model = fallback
+            visited.add(model)
+        return model
+
+    def observe(self, model: str, seconds: float, ok: bool, usage: Optional[Dict[str, Any]] = None) -> None:
+        """Record the outcome of one model call and re-check the model's SLO.
+
+        Args:
+            model: Model that served the call
+            seconds: Wall time of the call
+            ok: False if the call failed (not when the caller's deadline ran out)
+            usage: Token usage (input_tokens / output_tokens), if known
+        """
+        llm_call_seconds.labels(model).observe(seconds)
+        llm_calls.labels(model, "success" if ok else "error").inc()
+        for kind in ("input_tokens", "output_tokens"):
+            if usage and usage.get(kind):
+                llm_tokens.labels(model, kind.replace("_tokens", "")).inc(usage[kind])
+
+        health = self._health(model)
+        health.latencies.record(seconds)
+        health.outcomes.append(ok)
+        if health.degraded_until or len(health.outcomes) < self.min_samples:
+            return
+
+        p95 = health.latencies.percentile(95) or 0.0
+        error_rate = health.error_rate()
+        if p95 > self.slo_p95_seconds or error_rate > self.slo_error_rate:
+            health.degraded_until = time.monotonic() + self.cooldown
+            logger.warning(
+                f"Model {model} breached its SLO (p95 {p95:.2f}s, error rate {error_rate:.0%}); "
+                f"routing to {self.fallbacks.get(model, 'no fallback')} for {self.cooldown:.0f}s"
+            )
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Health of every model seen so far."""
+        return {
+            model: {
+                "degraded": self.is_degraded(model),
+                "circuit": circuit_breakers.model(model).state,
+                "fallback": self.fallbacks.get(model),
+                "p95_seconds": health.latencies.percentile(95),
+                "error_rate": round(health.error_rate(), 3),
+                "samples": len(health.outcomes),
+            }
+            for model, health in self.health.items()
+        }
+
+# Shared by every agent in the process so model health survives across requests
+model_router = ModelRouter()
@@ -0,0 +1,385 @@
+"""
+IPL Tweet Prompt - Specialized for Rohit Sharma's Fours and Sixes
+
+Bundled copy of the tweet MCP server's tools/ipl_tweet_prompt_rohit_4_6.py. The agent
+renders it only while the MCP server is unreachable (see template_cache.py), so keep
+the two files identical apart from this docstring.
+"""
+
+import hashlib
+from typing import Dict
+
+# Raw templates. ``{content_dump}`` is the only placeholder, so the same text can be
+# rendered here or shipped to clients (as MCP resources/prompts) and rendered there.
+VIRAL_TEMPLATE_ROHIT_SHARMA_4_6 = """
+# Rohit Sharma IPL Boundaries Viral Tweet Generator
+
+<examples_of_viral_posts>
+<one>
+HITMAN SPECIAL! 🔥💥
+
+Rohit Sharma just PULLED that for a massive six!
+
+Watching the ball sail over mid-wicket is PURE POETRY! 🚀
+
+Nobody plays the pull shot better than Ro45! 🇮🇳
+
+#HitmanSharma #MIPaltan #IPL2024
+</one>
+
+<two>
+VINTAGE ROHIT IS BACK! 👑
+
+That's 3 sixes in a row from the Hitman!
+
+When Rohit gets going, bowlers get going... out of the park! 🏏💥
+
+MI doesn't need a captain when they have a KING! 🦁
+
+#RohitSharma #IPL2024 #MI
+</two>
+
+<three> 
+THAT SOUND! 💥
+
+Rohit Sharma's bat meeting ball = THERAPY! 
+
+94 meters straight down the ground! 🎯
+
+Elegance, timing, class - that's Hitman for you! ✨
+
+#RO45 #MumbaiIndians #IPL2024
+</three>
+</examples_of_viral_posts>
+
+<goal>
+My goal is to go viral on X/Twitter with posts about Rohit Sharma's IPL boundaries and sixes, emphasizing his unique style, legacy as MI's former captain, and his "Hitman" brand.
+</goal>
+
+<approach>
+Your approach to achieve <goal> is to analyze Rohit Sharma's specific shot in <content_dump>, highlight his signature moves (pull shots, straight drives, timing), reference his MI legacy (former captain, most successful IPL captain), use his nicknames (Hitman, Ro45), emphasize his elegant batting style, contrast with current captaincy situation if relevant, and create engagement through Rohit-specific cricket terminology and fan emotions.
+
+Use the Rohit Sharma viral formula:
+1. Start with "HITMAN" or signature shot reference
+2. Describe the elegance and power combination
+3. Include Rohit-specific stats or records
+4. Reference his MI legacy tactfully
+5. End with his nicknames, emojis, and fan engagement
+</approach>
+
+<thinking_structure>
+<angles>
+<angle_1>Hitman brand - emphasizing his destructive ability</angle_1>
+<angle_2>Pull shot mastery - his signature shot</angle_2>
+<angle_3>Elegance personified - the aesthetic beauty</angle_3>
+<angle_4>MI legacy - former captain references</angle_4>
+<angle_5>Experience speaks - veteran showing class</angle_5>
+<angle_6>Timing perfection - minimal effort, maximum result</angle_6>
+<angle_7>Big match player - clutch performance</angle_7>
+<angle_8>Record breaker - IPL milestones</angle_8>
+<angle_9>Captain's knock - leadership without the armband</angle_9>
+<angle_10>Nostalgia factor - vintage Rohit returns</angle_10>
+<angle_11>Technical mastery - batting clinic</angle_11>
+<angle_12>Crowd favorite - stadium reaction</angle_12>
+<angle_13>International class in IPL</angle_13>
+<angle_14>Rohit vs specific bowler history</angle_14>
+<angle_15>Impact on game situation</angle_15>
+<angle_16>Partnership building</angle_16>
+<angle_17>Pressure handling</angle_17>
+<angle_18>Comparison with other openers</angle_18>
+<angle_19>Form return narrative</angle_19>
+<angle_20>MI fan emotions</angle_20>
+</angles>
+
+<drafts>
+[20 different viral tweet drafts specifically for Rohit Sharma's moment]
+</drafts>
+
+<critiques>
+[Analysis of each draft for Rohit-specific appeal and fan engagement]
+</critiques>
+
+<what_went_right>
+[10 paragraphs analyzing successful elements specific to Rohit Sharma:
+- Hitman brand utilization
+- MI legacy references
+- Signature shot descriptions
+- Elegant vs Power balance
+- Former captain narrative
+- Fan sentiment capture
+- Record highlighting
+- Nickname usage
+- Technical appreciation
+- Emotional connection]
+</what_went_right>
+
+<combining_best_ideas_into_final_tweet>
+[Iteration process to combine the best Rohit-specific elements]
+</combining_best_ideas_into_final_tweet>
+
+<final_surefire_viral_tweet>
+[The ultimate Rohit Sharma IPL boundary tweet]
+</final_surefire_viral_tweet>
+</thinking_structure>
+
+<rohit_specific_elements>
+<emoji_arsenal>
+👑 🔥 💥 🦁 🎯 🚀 ✨ 🏏 🇮🇳 💪 🏆 🌟 ⚡ 💯 🎪
+</emoji_arsenal>
+
+<hashtag_bank>
+#HitmanSharma #RohitSharma #RO45 #MIPaltan #MumbaiIndians #IPL2024 #Hitman #VadaPav #PullShot #CaptainRohit #MI
+</hashtag_bank>
+
+<rohit_nicknames>
+- Hitman
+- RO45
+- Rohit the Hitman
+- Captain Rohit (former)
+- Sharma ji
+- Rohitman
+- The Pull Shot King
+- Mr. IPL
+</rohit_nicknames>
+
+<rohit_signature_elements>
+- Pull shot
+- Front foot pull
+- Straight drive
+- Lazy elegance
+- Minimal footwork
+- Maximum timing
+- Effortless power
+- Opening masterclass
+</rohit_signature_elements>
+</rohit_specific_elements>
+
+<content_dump>
+{content_dump}
+</content_dump>
+
+Your task is to analyze Rohit Sharma's specific boundary and generate a viral tweet that captures his unique style and MI legacy.
+Make sure your final tweet is under 280 characters and resonates with Rohit Sharma fans specifically.
+"""
+
+ONE_LINER_TEMPLATE_ROHIT_SHARMA_4_6 = """
+# Rohit Sharma IPL One-Liner Viral Tweet Generator
+
+<examples_of_viral_posts>
+<one>
+HITMAN PULLS. BALL DISAPPEARS. MI ERUPTS! 🔥👑 #RO45
+</one>
+
+<two>
+ROHIT. TIMING. PERFECTION. BOWLER STUNNED. 💥 #HitmanSharma
+</two>
+
+<three> 
+VINTAGE SHARMA. 94 METERS. GOODNIGHT BOWLER! 🚀 #MI
+</three>
+
+<four>
+LAZY ELEGANCE. MAXIMUM DAMAGE. HITMAN SPECIAL! ⚡️ #IPL
+</four>
+
+<five>
+CAPTAIN'S KNOCK WITHOUT CAPTAINCY. BOSS! 🦁 #RohitSharma
+</five>
+
+<six>
+वाडापाव POWER! BALL SENT TO STANDS! 💥 #HitmanSpecial
+</six>
+
+<seven>
+दबाके SHOT! HITMAN का JALWA! 🔥 #RohitSharma45
+</seven>
+
+<eight>
+MASTER BLASTER! किती छान SIX! 👑 #WadapavPower
+</eight>
+</examples_of_viral_posts>
+
+<goal>
+Create ultra-short, punchy viral tweets (7-8 words max) about Rohit Sharma's boundaries that capture his signature style and impact. Include one or two words in Marathi or Hindi to add cultural connection.
+</goal>
+
+<approach>
+1. Focus on Rohit's signature elements
+2. Use "HITMAN" or "ROHIT" strategically
+3. Reference his elegance/power combo
+4. Maximum 1-2 emojis
+5. Use Rohit-specific hashtags
+6. Stick to 7-8 word limit
+7. Include 1-2 Hindi or Marathi words for cultural connection
+
+Formula options:
+- HITMAN + [ACTION] + [RESULT]
+- ROHIT + [SIGNATURE MOVE] + [IMPACT]
+- [ELEGANCE] + [POWER] + [EMOJI]
+- VINTAGE + [PLAYER] + [OUTCOME]
+- [HINDI/MARATHI WORD] + [ACTION] + [RESULT]
+</approach>
+
+<thinking_structure>
+<angles>
+<angle_1>Hitman brand focus</angle_1>
+<angle_2>Pull shot emphasis</angle_2>
+<angle_3>Elegance highlight</angle_3>
+<angle_4>MI legacy reference</angle_4>
+<angle_5>Former captain angle</angle_5>
+<angle_6>Timing appreciation</angle_6>
+<angle_7>Experience factor</angle_7>
+<angle_8>Record context</angle_8>
+<angle_9>Signature shot moment</angle_9>
+<angle_10>Fan emotion capture</angle_10>
+<angle_11>Bowler reaction focus</angle_11>
+<angle_12>Stadium atmosphere</angle_12>
+<angle_13>Technical mastery</angle_13>
+<angle_14>Vintage Rohit theme</angle_14>
+<angle_15>Power display</angle_15>
+<angle_16>Leadership impact</angle_16>
+<angle_17>Form narrative</angle_17>
+<angle_18>Nickname usage</angle_18>
+<angle_19>MI connection</angle_19>
+<angle_20>International class</angle_20>
+</angles>
+
+<drafts>
+[20 ultra-short viral tweets specifically for Rohit Sharma, 7-8 words max]
+</drafts>
+
+<critiques>
+[Analysis focusing on Rohit-specific impact and brevity]
+</critiques>
+
+<what_went_right>
+[Analysis of successful elements in short format for Rohit:
+- Hitman reference efficiency
+- Signature move capture
+- MI connection in few words
+- Elegance expression
+- Power description
+- Fan emotion trigger
+- Nickname effectiveness]
+</what_went_right>
+
+<final_surefire_viral_tweet>
+[The ultimate 7-8 word Rohit Sharma IPL tweet]
+</final_surefire_viral_tweet>
+</thinking_structure>
+
+<rohit_one_liner_templates>
+1. HITMAN [ACTION]. BALL [RESULT]. [EMOJI] #RO45
+2. ROHIT'S [SHOT TYPE]. [DISTANCE] METERS. GAME CHANGED! [EMOJI]
+3. VINTAGE SHARMA. [BOWLER] DESTROYED. MI ROARS! [EMOJI]
+4. PULL SHOT. PHYSICS DEFIED. HITMAN SMILES. [EMOJI]
+5. ROHIT + TIMING = BOUNDARY ASSURED. [EMOJI] #MI
+6. LAZY ELEGANCE. BRUTAL RESULT. CLASSIC RO45! [EMOJI]
+7. CAPTAIN'S KNOCK. NO ARMBAND NEEDED. [EMOJI] #HitmanSharma
+8. STRAIGHT DRIVE. CROWD STUNNED. ROHIT MAGIC! [EMOJI]
+9. वाडापाव POWER. BALL [RESULT]. [EMOJI] #Hitman
+10. ROHIT की TIMING. BOWLER की BAND. [EMOJI]
+11. एकदम JHAKKAS! HITMAN SHOW CONTINUES! [EMOJI]
+12. शानदार SHOT! MI FANS GO WILD! [EMOJI]
+</rohit_one_liner_templates>
+
+<rohit_power_words>
+HITMAN, PULLS, ELEGANT, TIMING, VINTAGE, LAZY, EFFORTLESS, CLASSIC, CAPTAIN, BOSS, MASTERCLASS, DESTROYED, LAUNCHED, DISAPPEARED, STUNNED, SPECIAL, शानदार, जबरदस्त, धमाकेदार, वाडापाव, झकास, दबाके, किती छान, भारी
+</rohit_power_words>
+
+<rohit_multilingual_words>
+<hindi>
+- शानदार (Wonderful)
+- जबरदस्त (Powerful)
+- धमाकेदार (Explosive)
+- वाडापाव (Vadapav, nickname)
+- हिटमैन (Hitman)
+- झकास (Awesome)
+- दबाके (With force)
+- किस्मत (Luck)
+- कमाल (Amazing)
+</hindi>
+
+<marathi>
+- किती छान (How nice)
+- भारी (Heavy/Strong)
+- वाडापाव (Vadapav, nickname)
+- दणका (Strong hit)
+- जबरदस्त (Powerful)
+- फटका (Hard hit)
+- अप्रतिम (Magnificent)
+- उत्तम (Excellent)
+</marathi>
+</rohit_multilingual_words>
+
+<content_dump>
+{content_dump}
+</content_dump>
+
+Your task is to create an ultra-short, punchy viral tweet (7-8 words max) specifically for Rohit Sharma's boundary.
+Include 1-2 Hindi or Marathi words to add cultural connection and authenticity.
+Make sure your final tweet captures Rohit's unique style, uses his nicknames effectively, and follows the formula with max 1-2 emojis.
+"""
+
+
+class RohitSharmaIPLTweetPrompt:
+    """Class that contains viral IPL tweet prompt templates specifically for Rohit Sharma"""
+    
+    # Template name -> raw template text
+    TEMPLATES: Dict[str, str] = {
+        "rohit_sharma_boundary_viral": VIRAL_TEMPLATE_ROHIT_SHARMA_4_6,
+        "rohit_sharma_boundary_one_liner": ONE_LINER_TEMPLATE_ROHIT_SHARMA_4_6,
+    }
+    
+    @staticmethod
+    def render(template: str, content_dump: str) -> str:
+        """
+        Fills the content placeholder of a raw template
+        
+        Args:
+            template: Raw template text containing ``{content_dump}``
+            content_dump: Information about Rohit Sharma's four or six
+            
+        Returns:
+            The rendered prompt
+        """
+        return template.replace("{content_dump}", content_dump)
+    
+    @staticmethod
+    def template_version(template: str) -> str:
+        """
+        Returns a short content hash identifying a template revision
+        
+        Args:
+            template: Raw template text
+            
+        Returns:
+            First 16 hex characters of the template's SHA-256 digest
+        """
+        return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    def get_viral_prompt_rohit_sharma_4_6(content_dump: str) -> str:
+        """
+        Returns the full viral tweet generation prompt for Rohit Sharma's boundaries
+        
+        Args:
+            content_dump: Information about Rohit Sharma's four or six
+            
+        Returns:
+            Complete prompt for generating viral IPL tweets for Rohit Sharma
+        """
+        return RohitSharmaIPLTweetPrompt.render(VIRAL_TEMPLATE_ROHIT_SHARMA_4_6, content_dump)
+
+    @staticmethod
+    def get_one_liner_prompt_rohit_sharma_4_6(content_dump: str) -> str:
+        """
+        Returns the one-liner viral tweet generation prompt for Rohit Sharma's boundaries
+        
+        Args:
+            content_dump: Information about Rohit Sharma's four or six
+            
+        Returns:
+            Complete prompt for generating one-liner viral IPL tweets for Rohit Sharma
+        """
+        return RohitSharmaIPLTweetPrompt.render(ONE_LINER_TEMPLATE_ROHIT_SHARMA_4_6, content_dump)
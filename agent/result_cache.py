@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+"""
+Result Cache - Reuse generated tweets for repeated cricket moments
+
+The same moment is often posted several times within seconds (editors retrying,
+several desks covering the same ball). Generated tweets are cached by normalized
+moment, tweet type, candidate count and model, and concurrent requests for the same
+key inside one process share a single generation (single-flight). A request with
+``Cache-Control: no-cache`` skips the cached value and its fresh result replaces it.
+
+Two backends implement the same ``CacheBackend`` interface:
+
+    memory  per-process LRU (fine for a single worker)
+    sqlite  one WAL-mode SQLite file shared by every worker process on the host;
+            each write is one transaction and the least recently used entries are
+            evicted once the cache holds more than RESULT_CACHE_MAX_ENTRIES
+
+    RESULT_CACHE_BACKEND        memory, sqlite or none (default memory)
+    RESULT_CACHE_TTL            seconds a result stays valid (default 300)
+    RESULT_CACHE_MAX_ENTRIES    entries kept before LRU eviction (default 10000)
+    RESULT_CACHE_PATH           SQLite file for the sqlite backend (default /data/result_cache.db)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from generation_store import moment_hash
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+result_cache_lookups = registry.counter(
+    "agent_result_cache_lookups",
+    "Result cache lookups, by backend and result (hit, miss, shared)",
+    ["backend", "result"],
+)
+result_cache_evictions = registry.counter(
+    "agent_result_cache_evictions",
+    "Entries evicted from the result cache to stay under its size bound",
+    ["backend"],
+)
+
+class CacheBackend:
+    """Key/value store with per-entry expiry; values must be JSON serializable."""
+
+    name = "none"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value, or None when missing or expired."""
+        return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for `ttl` seconds."""
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """Store a value unless the key holds an unexpired one; True if stored."""
+        return True
+
+    def delete(self, key: str) -> None:
+        """Drop a value."""
+
+    def __len__(self) -> int:
+        return 0
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU cache."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                result_cache_evictions.labels(self.name).inc()
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.time():
+                return False
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                result_cache_evictions.labels(self.name).inc()
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache(CacheBackend):
+    """Cache shared by every process on the host through one WAL-mode SQLite file."""
+
+    name = "sqlite"
+
+    # Only refresh an entry's LRU timestamp this often, so reads rarely write
+    TOUCH_INTERVAL = 5.0
+    # Check the size bound every this many writes
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)")
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA busy_timeout = 5000")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at < now:
+            connection.execute("DELETE FROM cache WHERE key = ? AND expires_at < ?", (key, now))
+            return None
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        # Autocommit mode: the upsert is a single atomic transaction
+        self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+            (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        now = time.time()
+        # Only replaces an expired entry; the single statement makes the claim atomic across processes
+        cursor = self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at "
+            "WHERE cache.expires_at < ?",
+            (key, json.dumps(value, ensure_ascii=False), now + ttl, now, now),
+        )
+        return cursor.rowcount == 1
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently used ones above the bound."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            (count,) = connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                result_cache_evictions.labels(self.name).inc(excess)
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()
+        return count
+
+def create_cache_backend(kind: Optional[str] = None) -> CacheBackend:
+    """Backend selected by RESULT_CACHE_BACKEND (or `kind`)."""
+    kind = kind or os.getenv("RESULT_CACHE_BACKEND", "memory")
+    max_entries = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+    if kind == "memory":
+        return MemoryCache(max_entries)
+    if kind == "sqlite":
+        path = os.getenv("RESULT_CACHE_PATH", "/data/result_cache.db")
+        try:
+            return SQLiteCache(path, max_entries)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Result cache falling back to memory, cannot open {path}: {str(e)}")
+            return MemoryCache(max_entries)
+    return CacheBackend()
+
+class ResultCache:
+    """Async front end of a cache backend, with in-process single-flight."""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: Optional[float] = None):
+        # Not `backend or ...`: an empty backend is falsy (it has __len__)
+        self.backend = backend if backend is not None else create_cache_backend()
+        self.ttl = ttl if ttl is not None else float(os.getenv("RESULT_CACHE_TTL", "300"))
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def key(cricket_moment: str, tweet_type: str, candidates: int, model: str) -> str:
+        return f"{moment_hash(cricket_moment)}:{tweet_type}:{candidates}:{model}"
+
+    async def _call(self, method: Callable, *args: Any) -> Any:
+        # SQLite may wait on another process's write lock; keep that off the event loop
+        if isinstance(self.backend, SQLiteCache):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Cached value, or None on a miss or when the backend cannot be read."""
+        try:
+            value = await self._call(self.backend.get, key)
+        except sqlite3.Error as e:
+            # A locked or broken cache is a miss, not a failed request
+            logger.warning(f"Result cache read failed, treating it as a miss: {str(e)}")
+            value = None
+        if self.backend.name != "none":
+            result_cache_lookups.labels(self.backend.name, "miss" if value is None else "hit").inc()
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a value; a backend error only skips the write."""
+        try:
+            await self._call(self.backend.set, key, value, self.ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache write failed, not caching the result: {str(e)}")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Tuple[Any, bool]]],
+        lookup: bool = True,
+    ) -> Any:
+        """Cached value, or compute it once for all concurrent callers in this process.
+
+        Args:
+            key: Cache key
+            compute: Returns (value, cacheable); failed generations are shared with
+                callers already waiting but not cached
+            lookup: False to skip reading the backend, when the caller has already
+                missed or wants a fresh value; the computed value is still stored
+
+        Returns:
+            The cached or freshly computed value
+        """
+        if self.backend.name == "none":
+            value, _ = await compute()
+            return value
+
+        while key in self._inflight:
+            try:
+                value = await asyncio.shield(self._inflight[key])
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # The leader was cancelled (its client left): take over the generation
+                continue
+            result_cache_lookups.labels(self.backend.name, "shared").inc()
+            return value
+
+        if lookup:
+            cached = await self.get(key)
+            if cached is not None:
+                return cached
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, cacheable = await compute()
+            if cacheable:
+                await self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; don't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+# One cache per process; with the sqlite backend every worker shares the same data
+result_cache = ResultCache()
@@ -2,15 +2,37 @@
 Version 1 API routes for the IPL Tweet Generator
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List, Literal
+from typing import Dict, Any, Optional, List, Literal, Awaitable, Tuple, TypeVar
+import os
+import sys
 import asyncio
+import time
 from agent import IPLTweetAgent
+from deadline import Deadline, DeadlineExceeded, requests_cancelled, run_within
+from circuit_breaker import CircuitOpen, circuit_breakers
+from draft_cache import draft_cache
+from tweet_broadcast import SubscriberLimit, tweet_broadcaster
+from generation_store import generation_store, moment_hash, text_hash
+from traffic_capture import traffic_capture
+from scheduler import LaneFull, scheduler
+from model_router import model_router
+from result_cache import result_cache
+from idempotency import (
+    IdempotencyKeyReused, IdempotencyWaitAbandoned, MAX_KEY_LENGTH, fingerprint, idempotency_store
+)
+from profiling import request_profiler
+from memory_tracking import memory_tracker, release_history
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+T = TypeVar("T")
+
+# How often to check whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+# Set up logging (configured by the app, see json_logging.py)
 logger = logging.getLogger(__name__)
 
 # Create router with prefix and tags
@@ -29,11 +51,19 @@ class TweetRequest(BaseModel):
         description="Type of tweet to generate")
     generate_both_types: Optional[bool] = Field(False, 
         description="Whether to generate both standard and one-liner tweets")
+    candidates: int = Field(1, ge=1, le=5,
+        description="Number of alternative tweets per type, generated in one model call and returned best first")
+    priority: Optional[Literal["live", "normal", "batch"]] = Field("normal",
+        description="Scheduling lane: live (editors, live feed), normal, or batch (backfills)")
 
 class TweetContent(BaseModel):
     """Model for a generated tweet"""
     content: str = Field(..., description="The generated tweet content")
     tweet_type: str = Field(..., description="Type of tweet")
+    rank: Optional[int] = Field(None, description="Position among the candidates (1 = best)")
+    score: Optional[float] = Field(None, description="Local ranking score of the candidate")
+    weighted_length: Optional[int] = Field(None, description="X/Twitter weighted length (280 max)")
+    repaired: Optional[bool] = Field(None, description="Whether the tweet was trimmed or fixed locally")
 
 class TweetResponse(BaseModel):
     """Response model for tweet generation"""
@@ -44,7 +74,7 @@ class TweetResponse(BaseModel):
 # Background task to log requests
 def log_request(request_data: Dict[str, Any], request_id: str):
     """Log request details for analytics"""
-    logger.info(f"Request {request_id}: {request_data}")
+    logger.info(f"Request {request_id}: {request_data}", extra={"request_id": request_id})
 
 # Dependency to get agent instance
 async def get_agent():
@@ -56,9 +86,197 @@ async def get_agent():
         # Clean up agent resources
         await agent.close()
 
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the response was ready."""
+
+async def run_until_disconnected(http_request: Request, work: Awaitable[T]) -> T:
+    """Run the generation work, cancelling it as soon as the client disconnects.
+    
+    Args:
+        http_request: The incoming HTTP request
+        work: The generation coroutine
+        
+    Returns:
+        The result of the work
+        
+    Raises:
+        ClientDisconnected: if the client disconnected first
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                requests_cancelled.labels("client_disconnect").inc()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+def _cache_key(request: TweetRequest, tweet_type: str) -> str:
+    return result_cache.key(
+        request.cricket_moment, tweet_type, request.candidates,
+        model_router.primary(tweet_type, request.priority or "normal")
+    )
+
+async def _cached_tweets(request: TweetRequest, tweet_types: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Cached tweets of every requested type that has them, by tweet type."""
+    cached = {}
+    for tweet_type in tweet_types:
+        tweets = await result_cache.get(_cache_key(request, tweet_type))
+        if tweets is not None:
+            cached[tweet_type] = tweets
+    return cached
+
+async def _generate(
+    request: TweetRequest,
+    agent: IPLTweetAgent,
+    request_id: str,
+    deadline: Deadline,
+    cached: Dict[str, List[Dict[str, Any]]],
+    drafted: Dict[str, Dict[str, Any]]
+) -> List[TweetContent]:
+    """Generate each requested tweet type that `cached` (already looked up) does not hold.
+    
+    Types in `drafted` were filled from the pre-match drafts before any setup and
+    are used as they are.
+    """
+    tweet_types = ["standard", "one_liner"] if request.generate_both_types else [request.tweet_type]
+    tweets = []
+    
+    for tweet_type in tweet_types:
+        generated = cached.get(tweet_type)
+        if generated is None:
+            generated = await result_cache.get_or_compute(
+                _cache_key(request, tweet_type),
+                lambda: _generate_one(request, agent, request_id, deadline, tweet_type, drafted.get(tweet_type)),
+                lookup=False,
+            )
+        tweets.extend(TweetContent(**tweet) for tweet in generated)
+    
+    return tweets
+
+async def _generate_one(
+    request: TweetRequest,
+    agent: IPLTweetAgent,
+    request_id: str,
+    deadline: Deadline,
+    tweet_type: str,
+    drafted: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Generate one tweet type in the request's lane and record it.
+    
+    Args:
+        drafted: The type's result filled from the pre-match drafts, if any;
+            it takes the place of the generation
+    
+    Returns:
+        The tweets, and whether they may be cached
+    """
+    logger.info(f"Request {request_id}: Generating {tweet_type} viral tweet", extra={"request_id": request_id})
+    priority = request.priority or "normal"
+    started = time.monotonic()
+    try:
+        if drafted is not None:
+            result = drafted
+        else:
+            async with scheduler.slot(priority, deadline):
+                result = await agent.generate_tweet(
+                    request.cricket_moment, tweet_type, deadline, request.candidates, priority, drafts=False
+                )
+    except DeadlineExceeded as e:
+        _record_generation(request, agent, request_id, tweet_type, {}, [], started, "deadline_exceeded", str(e))
+        raise
+    except CircuitOpen as e:
+        _record_generation(request, agent, request_id, tweet_type, {}, [], started, "circuit_open", str(e))
+        raise
+    except asyncio.CancelledError:
+        _record_generation(request, agent, request_id, tweet_type, {}, [], started, "cancelled", None)
+        raise
+    generated = _extract_tweets(result, tweet_type)
+    status = "error" if result.get("error") or not generated else "success"
+    error = str(result["messages"][-1].content) if result.get("error") else None
+    _record_generation(request, agent, request_id, tweet_type, result, generated, started, status, error)
+    if status == "success":
+        tweet_broadcaster.publish({
+            "request_id": request_id,
+            "source": "api",
+            "tweet_type": tweet_type,
+            "tweet": generated[0].content,
+            "candidates": [tweet.content for tweet in generated[1:]],
+            "cricket_moment": request.cricket_moment,
+            "model": result.get("model") or agent.model_name,
+            "ts": time.time(),
+        })
+    # Everything needed is extracted; don't carry the prompt and messages any further
+    release_history(result)
+    return [tweet.model_dump() for tweet in generated], status == "success"
+
+def _record_generation(
+    request: TweetRequest,
+    agent: IPLTweetAgent,
+    request_id: str,
+    tweet_type: str,
+    result: Dict[str, Any],
+    generated: List[TweetContent],
+    started: float,
+    status: str,
+    error: Optional[str]
+):
+    """Queue a row for the generation store (written in the background)"""
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for msg in result.get("messages", []):
+        for key, value in (getattr(msg, "usage_metadata", None) or {}).items():
+            if key in usage:
+                usage[key] += value
+    
+    tweet = generated[0].content if generated else None
+    generation_store.record(
+        request_id=request_id,
+        tweet_type=tweet_type,
+        cricket_moment=request.cricket_moment,
+        moment_hash=moment_hash(request.cricket_moment),
+        prompt_hash=text_hash(result.get("prompt")),
+        tweet=tweet,
+        tweet_hash=text_hash(tweet),
+        candidates=[candidate.content for candidate in generated[1:]] or None,
+        model=result.get("model") or agent.model_name,
+        status=status,
+        error=error,
+        latency_ms=(time.monotonic() - started) * 1000,
+        timings={step: round(seconds * 1000, 1) for step, seconds in (result.get("timings") or {}).items()} or None,
+        **usage
+    )
+
+def _extract_tweets(result: Dict[str, Any], tweet_type: str) -> List[TweetContent]:
+    """Pull the generated tweet(s) out of an agent result, best first."""
+    if not result.get("error") and result.get("ranked_tweets"):
+        return [
+            TweetContent(
+                content=candidate["content"],
+                tweet_type=tweet_type,
+                rank=rank,
+                score=candidate["score"],
+                weighted_length=candidate.get("weighted_length"),
+                repaired=candidate.get("repaired"),
+            )
+            for rank, candidate in enumerate(result["ranked_tweets"], start=1)
+        ]
+    
+    ai_messages = [msg.content for msg in result["messages"] 
+                if hasattr(msg, 'type') and msg.type == 'ai']
+    
+    if ai_messages:
+        return [TweetContent(content=ai_messages[-1], tweet_type=tweet_type)]
+    return []
+
 @router.post("/tweets", response_model=TweetResponse)
 async def generate_tweets(
     request: TweetRequest,
+    http_request: Request,
+    response: Response,
     background_tasks: BackgroundTasks,
     agent: IPLTweetAgent = Depends(get_agent)
 ):
@@ -68,50 +286,68 @@ async def generate_tweets(
     - **cricket_moment**: Description of the cricket moment
     - **tweet_type**: Type of tweet to generate (standard or one_liner)
     - **generate_both_types**: Whether to generate both types
+    - **candidates**: Alternatives per type from a single model call, ranked best first
+    - **priority**: Scheduling lane (live, normal or batch)
+    
+    The `X-Request-Timeout` header (seconds) sets the request deadline. Work is
+    cancelled when the deadline passes or the client disconnects.
+    
+    While a dependency's circuit breaker is open the request fails fast with 503 and
+    a `Retry-After` header.
+    
+    Requests with the same `Idempotency-Key` header get the first one's response,
+    marked with `Idempotent-Replayed: true`, without generating again; reusing a key
+    for a different body is rejected with 422.
+    
+    Repeated moments are answered from the result cache (and common ones from the
+    pre-match drafts); send `Cache-Control: no-cache` to generate afresh.
+    
+    With PROFILING_ENABLED, the `X-Profile` header or `?profile=` flag profiles the
+    request; the stored profile's id is returned in `X-Profile-Id`.
     
     Returns a list of generated tweets.
     """
     import uuid
     request_id = str(uuid.uuid4())
+    deadline = Deadline.from_headers(http_request.headers)
+    idempotency_key = http_request.headers.get("Idempotency-Key")
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+    
+    # Capture the request for replay (buffered, no-op unless TRAFFIC_CAPTURE=true)
+    traffic_capture.record(request.model_dump(), http_request.headers, request_id)
     
     # Log request in background
-    background_tasks.add_task(log_request, request.dict(), request_id)
+    background_tasks.add_task(log_request, request.model_dump(), request_id)
     
-    try:
-        results = {}
-        tweets = []
+    # Cache-Control: no-cache generates afresh, without the result cache or the drafts
+    no_cache = "no-cache" in http_request.headers.get("Cache-Control", "").lower()
+    
+    memory_report = memory_tracker.begin(request_id)
+    profile = None
+    if request_profiler.enabled:
+        profile = request_profiler.start(
+            request_id, http_request.headers.get("X-Profile") or http_request.query_params.get("profile")
+        )
+    
+    async def respond() -> Dict[str, Any]:
+        # Cached results and moments answered from the pre-match drafts need no MCP
+        # session. Otherwise it must be opened in this task, which is also the one
+        # that closes it in get_agent; only the generation runs in a child task, and
+        # it is handed the drafts filled here so it never has to set up itself.
+        tweet_types = ["standard", "one_liner"] if request.generate_both_types else [request.tweet_type]
+        cached = {} if no_cache else await _cached_tweets(request, tweet_types)
+        missing = [tweet_type for tweet_type in tweet_types if tweet_type not in cached]
+        if not no_cache:
+            await draft_cache.refresh()
+        drafted = {} if no_cache else draft_cache.fill_types(request.cricket_moment, missing, request.candidates)
+        if any(tweet_type not in drafted for tweet_type in missing) and not agent.agent:
+            await run_within(deadline, agent.setup(), "setup")
         
-        if request.generate_both_types:
-            # Generate standard tweet
-            logger.info(f"Request {request_id}: Generating standard viral tweet")
-            standard_result = await agent.generate_tweet(request.cricket_moment, "standard")
-            
-            # Generate one-liner tweet
-            logger.info(f"Request {request_id}: Generating one-liner viral tweet")
-            one_liner_result = await agent.generate_tweet(request.cricket_moment, "one_liner")
-            
-            # Extract tweets from results
-            standard_messages = [msg.content for msg in standard_result["messages"] 
-                            if hasattr(msg, 'type') and msg.type == 'ai']
-            one_liner_messages = [msg.content for msg in one_liner_result["messages"] 
-                              if hasattr(msg, 'type') and msg.type == 'ai']
-            
-            if standard_messages:
-                tweets.append(TweetContent(content=standard_messages[-1], tweet_type="standard"))
-            
-            if one_liner_messages:
-                tweets.append(TweetContent(content=one_liner_messages[-1], tweet_type="one_liner"))
-        else:
-            # Generate single tweet type
-            logger.info(f"Request {request_id}: Generating {request.tweet_type} viral tweet")
-            result = await agent.generate_tweet(request.cricket_moment, request.tweet_type)
-            
-            # Extract tweet from result
-            ai_messages = [msg.content for msg in result["messages"] 
-                        if hasattr(msg, 'type') and msg.type == 'ai']
-            
-            if ai_messages:
-                tweets.append(TweetContent(content=ai_messages[-1], tweet_type=request.tweet_type))
+        tweets = await run_until_disconnected(
+            http_request,
+            _generate(request, agent, request_id, deadline, cached, drafted)
+        )
         
         if not tweets:
             raise HTTPException(status_code=500, detail="Failed to generate any tweets")
@@ -120,11 +356,161 @@ async def generate_tweets(
             tweets=tweets,
             request_id=request_id,
             status="success"
-        )
+        ).model_dump()
+    
+    try:
+        if idempotency_key and idempotency_store.enabled:
+            # Retries with the same key share the first request's response
+            body, replayed = await idempotency_store.run(
+                idempotency_key, fingerprint(request.model_dump()), respond, deadline, http_request.is_disconnected
+            )
+            if replayed:
+                response.headers["Idempotent-Replayed"] = "true"
+                logger.info(
+                    f"Request {request_id}: Replayed response {body['request_id']} for its Idempotency-Key",
+                    extra={"request_id": request_id},
+                )
+            return body
+        return await respond()
         
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (ClientDisconnected, IdempotencyWaitAbandoned):
+        logger.info(f"Request {request_id}: Client disconnected, generation cancelled", extra={"request_id": request_id})
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except LaneFull as e:
+        logger.warning(f"Request {request_id}: {str(e)}", extra={"request_id": request_id})
+        raise HTTPException(status_code=429, detail=str(e))
+    except DeadlineExceeded as e:
+        logger.warning(f"Request {request_id}: {str(e)}", extra={"request_id": request_id})
+        raise HTTPException(status_code=504, detail=str(e))
+    except CircuitOpen as e:
+        logger.warning(f"Request {request_id}: {str(e)}", extra={"request_id": request_id})
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
     except Exception as e:
-        logger.error(f"Request {request_id}: Error - {str(e)}")
+        logger.error(f"Request {request_id}: Error - {str(e)}", exc_info=True, extra={"request_id": request_id})
         raise HTTPException(status_code=500, detail=f"Error generating tweets: {str(e)}")
+    finally:
+        if profile is not None:
+            profile.stop()
+            profile_id = await asyncio.to_thread(profile.save)
+            response.headers["X-Profile-Id"] = profile_id
+            error = sys.exc_info()[1]
+            if isinstance(error, HTTPException):
+                # Error responses are built from the exception, not from `response`
+                error.headers = {**(error.headers or {}), "X-Profile-Id": profile_id}
+        memory_tracker.end(memory_report)
+
+def _check_profile_access(http_request: Request) -> None:
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not request_profiler.authorized(http_request.headers.get("X-Profile") or http_request.query_params.get("profile")):
+        raise HTTPException(status_code=403, detail="Pass the profiling token in X-Profile or ?profile=")
+
+@router.get("/profiles")
+async def list_profiles(http_request: Request):
+    """
+    Stored request profiles, newest first.
+    
+    Needs PROFILING_ENABLED and the profiling token (if one is set) in `X-Profile`.
+    """
+    _check_profile_access(http_request)
+    return {"mode": request_profiler.mode, "profiles": await asyncio.to_thread(request_profiler.list)}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, http_request: Request):
+    """
+    Download a stored profile: collapsed stacks (.folded) for flamegraph tools, or
+    cProfile stats (.prof) for pstats / snakeviz.
+    """
+    _check_profile_access(http_request)
+    path = request_profiler.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    media_type = "text/plain" if path.endswith(".folded") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+@router.get("/tweets/recent")
+async def recent_tweets(
+    limit: int = Query(20, ge=1, le=200),
+    tweet_type: Optional[Literal["standard", "one_liner"]] = None
+):
+    """
+    Most recent generations from the generation store, newest first.
+    
+    - **limit**: Maximum number of generations to return
+    - **tweet_type**: Only return this tweet type
+    """
+    generations = await asyncio.to_thread(generation_store.recent, limit, tweet_type)
+    return {"generations": generations, "count": len(generations)}
+
+@router.get("/tweets/duplicates")
+async def duplicate_tweets(
+    cricket_moment: Optional[str] = None,
+    tweet: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    Earlier generations for the same cricket moment, or that produced the same tweet.
+    
+    - **cricket_moment**: Moment to look up (case and whitespace are ignored)
+    - **tweet**: Tweet text to look up
+    """
+    if not cricket_moment and not tweet:
+        raise HTTPException(status_code=400, detail="Provide cricket_moment or tweet")
+    generations = await asyncio.to_thread(generation_store.duplicates, cricket_moment, tweet, limit)
+    return {"generations": generations, "count": len(generations)}
+
+@router.get("/scheduler")
+async def scheduler_status():
+    """Waiting and running generations per priority lane"""
+    return {"concurrency": scheduler.concurrency, "lanes": scheduler.snapshot()}
+
+@router.get("/models")
+async def model_status():
+    """Configured model routes and the recent health of each model"""
+    return {
+        "default": model_router.default_model,
+        "routes": model_router.routes,
+        "fallbacks": model_router.fallbacks,
+        "models": model_router.status(),
+    }
+
+@router.get("/tweets/stream")
+async def stream_tweets(http_request: Request):
+    """
+    Server-Sent Events stream of every tweet generated by this worker.
+    
+    Each tweet is a `tweet` event whose data is a JSON object (request_id, source,
+    tweet_type, tweet, candidates, cricket_moment, model, ts). A client that falls
+    too far behind gets a `dropped` event and the stream ends; reconnect with
+    `Last-Event-ID` to receive the recent tweets it missed.
+    """
+    try:
+        subscriber = tweet_broadcaster.subscribe(http_request.headers.get("Last-Event-ID"))
+    except SubscriberLimit as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(
+        tweet_broadcaster.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/tweets/stream/status")
+async def stream_status():
+    """Subscribers connected to the tweet stream and messages published"""
+    return tweet_broadcaster.status()
+
+@router.get("/drafts")
+async def draft_status():
+    """Pre-match tweet drafts loaded per scenario and tweet type"""
+    await draft_cache.refresh()
+    return draft_cache.status()
+
+@router.get("/circuits")
+async def circuit_status():
+    """State of the circuit breaker of every dependency (MCP server, each model)"""
+    return {"enabled": circuit_breakers.enabled, "circuits": circuit_breakers.status()}
 
 @router.get("/health")
 async def health_check():
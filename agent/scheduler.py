@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Priority Lanes - Weighted-fair scheduling of tweet generations
+
+Every generation takes a slot from a fixed pool (``SCHEDULER_CONCURRENCY``) before
+it may call the model, so bulk work cannot monopolize the agent or the OpenAI
+quota. Requests wait in one of three lanes:
+
+    live    interactive editors and the live feed
+    normal  the default
+    batch   backfills and bulk jobs
+
+When a slot frees up, the waiting lane with the lowest virtual time gets it and its
+virtual time advances by ``1 / weight``, so under contention lanes are served in
+proportion to their weights (start-time fair queueing). ``SCHEDULER_LIVE_RESERVED``
+slots can only ever be used by the live lane, so live requests never queue behind
+a full pool of backfill work.
+
+    SCHEDULER_CONCURRENCY       generations running at once (default 8)
+    SCHEDULER_LIVE_RESERVED     slots reserved for the live lane (default 2)
+    SCHEDULER_WEIGHTS           lane weights (default "live=6,normal=3,batch=1")
+    SCHEDULER_MAX_QUEUE         max waiting requests per lane before rejecting (default 100)
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from deadline import Deadline, run_within
+from metrics import registry
+
+LANES = ("live", "normal", "batch")
+
+lane_queue_depth = registry.gauge(
+    "agent_scheduler_queue_depth",
+    "Generations waiting for a slot, by lane",
+    ["lane"],
+)
+lane_running = registry.gauge(
+    "agent_scheduler_running",
+    "Generations holding a slot, by lane",
+    ["lane"],
+)
+lane_wait_seconds = registry.histogram(
+    "agent_scheduler_wait_seconds",
+    "Seconds a generation waited for a slot, by lane",
+    ["lane"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+lane_rejected = registry.counter(
+    "agent_scheduler_rejected",
+    "Generations rejected because their lane's queue was full",
+    ["lane"],
+)
+
+class LaneFull(Exception):
+    """Raised when a lane already has the maximum number of waiting requests."""
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        super().__init__(f"Too many queued {lane} requests")
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    weights = {"live": 6.0, "normal": 3.0, "batch": 1.0}
+    for item in raw.split(","):
+        if "=" in item:
+            lane, value = item.split("=", 1)
+            if lane.strip() in weights:
+                weights[lane.strip()] = max(float(value), 0.01)
+    return weights
+
+class _Lane:
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.running = 0
+        self.virtual_time = 0.0
+
+class LaneScheduler:
+    """Weighted-fair slot scheduler with a reserved share for the live lane."""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        live_reserved: Optional[int] = None,
+        weights: Optional[Dict[str, float]] = None,
+        max_queue: Optional[int] = None,
+    ):
+        """Initialize the scheduler; unset arguments fall back to the SCHEDULER_* variables."""
+        self.concurrency = concurrency or int(os.getenv("SCHEDULER_CONCURRENCY", "8"))
+        reserved = live_reserved if live_reserved is not None else int(os.getenv("SCHEDULER_LIVE_RESERVED", "2"))
+        self.live_reserved = min(reserved, self.concurrency - 1)
+        self.max_queue = max_queue or int(os.getenv("SCHEDULER_MAX_QUEUE", "100"))
+        weights = weights or _parse_weights(os.getenv("SCHEDULER_WEIGHTS", ""))
+        self.lanes = {name: _Lane(name, weights[name]) for name in LANES}
+        self.running = 0
+        self.virtual_time = 0.0
+
+    def _may_run(self, lane: _Lane) -> bool:
+        """Whether a slot is free for this lane (non-live lanes cannot use the reserve)."""
+        if lane.name == "live":
+            return self.running < self.concurrency
+        return self.running < self.concurrency - self.live_reserved
+
+    def _grant(self, lane: _Lane) -> None:
+        self.running += 1
+        lane.running += 1
+        lane.virtual_time = max(lane.virtual_time, self.virtual_time) + 1.0 / lane.weight
+        lane_running.labels(lane.name).set(lane.running)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting lanes, lowest virtual time first."""
+        while True:
+            candidates = [
+                lane for lane in self.lanes.values()
+                if lane.waiters and self._may_run(lane)
+            ]
+            if not candidates:
+                return
+            lane = min(
+                candidates,
+                key=lambda lane: max(lane.virtual_time, self.virtual_time) + 1.0 / lane.weight,
+            )
+            waiter = lane.waiters.popleft()
+            lane_queue_depth.labels(lane.name).set(len(lane.waiters))
+            if waiter.done():
+                continue
+            self.virtual_time = max(self.virtual_time, lane.virtual_time)
+            self._grant(lane)
+            waiter.set_result(None)
+
+    async def acquire(self, lane_name: str) -> None:
+        """Wait for a slot in the given lane.
+
+        Raises:
+            LaneFull: if the lane's queue is at SCHEDULER_MAX_QUEUE
+        """
+        lane = self.lanes[lane_name]
+        started = time.monotonic()
+        if not lane.waiters and self._may_run(lane):
+            self._grant(lane)
+            lane_wait_seconds.labels(lane_name).observe(0.0)
+            return
+        if len(lane.waiters) >= self.max_queue:
+            lane_rejected.labels(lane_name).inc()
+            raise LaneFull(lane_name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        lane_queue_depth.labels(lane_name).set(len(lane.waiters))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we gave up: hand it on
+                self.release(lane_name)
+            else:
+                try:
+                    lane.waiters.remove(waiter)
+                except ValueError:
+                    pass
+                lane_queue_depth.labels(lane_name).set(len(lane.waiters))
+            raise
+        lane_wait_seconds.labels(lane_name).observe(time.monotonic() - started)
+
+    def release(self, lane_name: str) -> None:
+        """Return a slot and wake the next waiter."""
+        lane = self.lanes[lane_name]
+        self.running -= 1
+        lane.running -= 1
+        lane_running.labels(lane_name).set(lane.running)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str, deadline: Optional[Deadline] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block; waiting counts against the deadline."""
+        await run_within(deadline, self.acquire(lane_name), "queue")
+        try:
+            yield
+        finally:
+            self.release(lane_name)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Waiting and running generations per lane."""
+        return {
+            name: {"waiting": len(lane.waiters), "running": lane.running}
+            for name, lane in self.lanes.items()
+        }
+
+# One scheduler per process, in front of every agent
+scheduler = LaneScheduler()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Simulated LLM - Offline stand-in for the OpenAI chat model
+
+Used for benchmarks, load tests and local multi-replica setups where paying for
+real completions is pointless. It behaves like a tool-calling chat model: it
+sleeps for a configurable, optionally long-tailed latency, asks for the prompt tool
+when tools are bound and no tool result is present yet, and otherwise returns a
+plausible tweet with token usage attached. Enable it with ``LLM_BACKEND=simulated``.
+"""
+
+import os
+import random
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+_STANDARD_OPENERS = ["HITMAN SPECIAL! 🔥💥", "VINTAGE ROHIT IS BACK! 👑", "THAT SOUND! 💥"]
+_STANDARD_BODIES = [
+    "Rohit Sharma just sent that one into orbit!",
+    "Pull shot, pure timing, ball gone. Classic Ro45!",
+    "Elegance, timing, class - that's Hitman for you! ✨",
+]
+_ONE_LINERS = [
+    "HITMAN PULLS. BALL DISAPPEARS. MI ERUPTS! 🔥 #RO45",
+    "दबाके SHOT! HITMAN का JALWA! 🔥 #MI",
+    "VINTAGE SHARMA. GOODNIGHT BOWLER! 🚀 #HitmanSharma",
+]
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+class SimulatedChatModel(BaseChatModel):
+    """Chat model that fakes OpenAI responses with realistic latency."""
+
+    model_name: str = "simulated"
+    latency_seconds: float = float(os.getenv("SIMULATED_LLM_LATENCY", "0.8"))
+    jitter_seconds: float = float(os.getenv("SIMULATED_LLM_JITTER", "0.2"))
+    tail_probability: float = float(os.getenv("SIMULATED_LLM_TAIL_PROBABILITY", "0.02"))
+    tail_multiplier: float = float(os.getenv("SIMULATED_LLM_TAIL_MULTIPLIER", "8"))
+    error_rate: float = float(os.getenv("SIMULATED_LLM_ERROR_RATE", "0"))
+    n: int = 1
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "latency_seconds": self.latency_seconds}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Bind tools the same way ChatOpenAI does, so ReAct agents work unchanged."""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _sample_latency(self) -> float:
+        latency = max(0.0, random.gauss(self.latency_seconds, self.jitter_seconds))
+        if random.random() < self.tail_probability:
+            latency *= self.tail_multiplier
+        return latency
+
+    def _tool_call(self, messages: List[BaseMessage], tools: List[Dict[str, Any]]) -> Optional[AIMessage]:
+        """Ask for the prompt tool if the current turn has not received a tool result yet."""
+        last_human = max(
+            (index for index, message in enumerate(messages) if isinstance(message, HumanMessage)),
+            default=-1,
+        )
+        if last_human < 0 or any(isinstance(message, ToolMessage) for message in messages[last_human:]):
+            return None
+        request_text = str(messages[last_human].content)
+        for tool in tools:
+            name = tool["function"]["name"]
+            if name in request_text:
+                return AIMessage(
+                    content="",
+                    tool_calls=[{
+                        "name": name,
+                        "args": {"request": {"content_dump": request_text.strip()}},
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                    }],
+                )
+        return None
+
+    def _tweet(self, messages: List[BaseMessage], index: int) -> str:
+        """Build a deterministic-per-prompt but varied tweet."""
+        transcript = "\n".join(str(message.content) for message in messages)
+        seed = int(hashlib.sha256(transcript.encode("utf-8")).hexdigest()[:8], 16) + index
+        rng = random.Random(seed)
+        # The last human turn is the tweet-writing instruction, which names the tweet type
+        request = next(
+            (str(message.content) for message in reversed(messages) if isinstance(message, HumanMessage)),
+            "",
+        )
+        if "one-liner" in request.lower():
+            return rng.choice(_ONE_LINERS)
+        return (
+            f"{rng.choice(_STANDARD_OPENERS)}\n\n{rng.choice(_STANDARD_BODIES)}\n\n"
+            "#RohitSharma #MIPaltan #IPL2025"
+        )
+
+    def _result(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Simulated LLM provider error")
+
+        prompt_tokens = sum(_estimate_tokens(str(message.content)) for message in messages)
+        tool_message = self._tool_call(messages, kwargs.get("tools") or [])
+        if tool_message is not None:
+            outputs = [tool_message]
+        else:
+            outputs = [AIMessage(content=self._tweet(messages, index)) for index in range(kwargs.get("n") or self.n)]
+
+        generations = []
+        completion_tokens = 0
+        for message in outputs:
+            output_tokens = _estimate_tokens(str(message.content)) + 10 * len(message.tool_calls)
+            completion_tokens += output_tokens
+            message.usage_metadata = {
+                "input_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+            }
+            message.response_metadata = {"model_name": self.model_name}
+            generations.append(ChatGeneration(message=message))
+
+        return ChatResult(
+            generations=generations,
+            llm_output={
+                "model_name": self.model_name,
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._sample_latency())
+        return self._result(messages, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._sample_latency())
+        return self._result(messages, **kwargs)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Prompt Template Cache - Local, versioned copy of the tweet MCP server's templates
+
+The tweet MCP server publishes its raw prompt templates as MCP resources together
+with a manifest of content hashes. Instead of receiving the multi-KB rendered prompt
+as tool output on every request, the agent downloads each template once, keys it by
+version and renders it locally. The manifest is re-checked at most once per
+``TEMPLATE_MANIFEST_TTL`` seconds and a template is only downloaded again when its
+hash changes.
+
+While the MCP server is unreachable, ``render_bundled`` renders the copy of the
+templates bundled with the agent (prompts/ipl_tweet_prompt_rohit_4_6.py), so tweets
+can still be written when no template was ever downloaded.
+
+``agent_prompt_mcp_bytes`` records, per request, the MCP payload bytes read to get
+its prompt: 0 when the cached template is rendered, the manifest and templates
+when this request refreshed them, or the rendered prompt when the MCP tool was
+called instead. Compare its ``cache`` and ``tool`` series to see the saving.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from metrics import registry
+from prompts.ipl_tweet_prompt_rohit_4_6 import RohitSharmaIPLTweetPrompt
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_URI_PREFIX = "tweet-templates://"
+MANIFEST_URI = f"{TEMPLATE_URI_PREFIX}manifest"
+
+# Tweet type -> template name published by the tweet MCP server
+TWEET_TYPE_TEMPLATES: Dict[str, str] = {
+    "standard": "rohit_sharma_boundary_viral",
+    "one_liner": "rohit_sharma_boundary_one_liner",
+}
+
+template_cache_lookups = registry.counter(
+    "agent_template_cache_lookups",
+    "Prompt template lookups served from the local cache, by result (hit, miss, bundled)",
+    ["result"],
+)
+template_fetch_bytes = registry.counter(
+    "agent_template_fetch_bytes",
+    "Bytes of template manifests and templates read from the MCP server",
+    ["kind"],
+)
+prompt_mcp_bytes = registry.histogram(
+    "agent_prompt_mcp_bytes",
+    "MCP payload bytes read to obtain one request's prompt, by source (cache, tool, bundled)",
+    ["source"],
+    buckets=(0, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536),
+)
+
+# Bytes read from the MCP server for the current task's prompt, while it is counted
+_request_bytes: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "template_request_bytes", default=None
+)
+
+@contextmanager
+def count_request_bytes() -> Iterator[List[int]]:
+    """Collect the MCP bytes read for this task's prompt; the total is in item 0."""
+    counter = [0]
+    token = _request_bytes.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_bytes.reset(token)
+
+def add_request_bytes(count: int) -> None:
+    """Add bytes read from the MCP server to the current request's total, if counted."""
+    counter = _request_bytes.get()
+    if counter is not None:
+        counter[0] += count
+
+@dataclass
+class CachedTemplate:
+    """A raw template and the content hash it was published under."""
+    name: str
+    version: str
+    text: str
+
+    def render(self, content_dump: str) -> str:
+        """Substitute the cricket moment into the template."""
+        return self.text.replace("{content_dump}", content_dump)
+
+class PromptTemplateCache:
+    """Process-wide cache of prompt templates keyed by name and version."""
+
+    def __init__(self, manifest_ttl: Optional[float] = None):
+        """Initialize the template cache.
+
+        Args:
+            manifest_ttl: Seconds between manifest checks (default: TEMPLATE_MANIFEST_TTL or 60)
+        """
+        self.manifest_ttl = (
+            manifest_ttl
+            if manifest_ttl is not None
+            else float(os.getenv("TEMPLATE_MANIFEST_TTL", "60"))
+        )
+        self.templates: Dict[str, CachedTemplate] = {}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        """Whether the manifest should be checked again."""
+        return not self.templates or time.monotonic() - self._checked_at >= self.manifest_ttl
+
+    async def ensure_fresh(self, mcp_client_manager, force: bool = False) -> bool:
+        """Sync the cache with the server's manifest if the TTL has expired.
+
+        Args:
+            mcp_client_manager: Connected MCPClientManager used to read resources
+            force: Check the manifest even if the TTL has not expired
+
+        Returns:
+            True if the cache holds usable templates afterwards
+        """
+        if not force and not self.is_stale():
+            return True
+        if not mcp_client_manager.is_connected():
+            # Nothing to check against; try again once the server is back
+            return bool(self.templates)
+
+        async with self._lock:
+            # Another request may have refreshed while we were waiting
+            if not force and not self.is_stale():
+                return True
+            try:
+                raw_manifest = await mcp_client_manager.read_resource(MANIFEST_URI)
+                manifest_bytes = len(raw_manifest.encode("utf-8"))
+                template_fetch_bytes.labels("manifest").inc(manifest_bytes)
+                add_request_bytes(manifest_bytes)
+                manifest = json.loads(raw_manifest)["templates"]
+
+                for name, entry in manifest.items():
+                    cached = self.templates.get(name)
+                    if cached and cached.version == entry["version"]:
+                        continue
+                    text = await mcp_client_manager.read_resource(entry["uri"])
+                    text_bytes = len(text.encode("utf-8"))
+                    template_fetch_bytes.labels("template").inc(text_bytes)
+                    add_request_bytes(text_bytes)
+                    self.templates[name] = CachedTemplate(name=name, version=entry["version"], text=text)
+                    logger.info(f"Cached prompt template {name} (version {entry['version']})")
+
+                # Drop templates the server no longer publishes
+                for name in set(self.templates) - set(manifest):
+                    del self.templates[name]
+
+                self._checked_at = time.monotonic()
+            except Exception as e:
+                # Keep serving whatever we have; callers fall back to the MCP tools when empty
+                logger.warning(f"Could not refresh prompt templates: {str(e)}")
+                self._checked_at = time.monotonic()
+
+        return bool(self.templates)
+
+    def invalidate(self, name: Optional[str] = None, version: Optional[str] = None):
+        """Force the next ensure_fresh() to re-check the manifest.
+
+        When a tool response reports a ``template_version`` that differs from the cached
+        one, call this with the name and new version.
+        """
+        if name and version:
+            cached = self.templates.get(name)
+            if cached and cached.version == version:
+                return
+        self._checked_at = 0.0
+
+    def render(self, tweet_type: str, cricket_moment: str) -> Optional[str]:
+        """Render the template for a tweet type locally.
+
+        Args:
+            tweet_type: Type of tweet ("standard" or "one_liner")
+            cricket_moment: Description of the cricket moment
+
+        Returns:
+            The rendered prompt, or None if the template is not cached
+        """
+        template = self.templates.get(TWEET_TYPE_TEMPLATES.get(tweet_type, ""))
+        if template is None:
+            template_cache_lookups.labels("miss").inc()
+            return None
+        template_cache_lookups.labels("hit").inc()
+        return template.render(cricket_moment)
+
+    def render_bundled(self, tweet_type: str, cricket_moment: str) -> Optional[str]:
+        """Render the template bundled with the agent, for when the MCP server is down.
+
+        Args:
+            tweet_type: Type of tweet ("standard" or "one_liner")
+            cricket_moment: Description of the cricket moment
+
+        Returns:
+            The rendered prompt, or None if no template is bundled for the tweet type
+        """
+        text = RohitSharmaIPLTweetPrompt.TEMPLATES.get(TWEET_TYPE_TEMPLATES.get(tweet_type, ""))
+        if text is None:
+            return None
+        template_cache_lookups.labels("bundled").inc()
+        return RohitSharmaIPLTweetPrompt.render(text, cricket_moment)
+
+    def versions(self) -> Dict[str, str]:
+        """Return the cached template versions by name."""
+        return {name: template.version for name, template in self.templates.items()}
+
+# Shared by every IPLTweetAgent in the process
+template_cache = PromptTemplateCache()
@@ -0,0 +1,81 @@
+"""Input parsing, resume and per-moment failures of batch_generation.py"""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+import batch_generation
+from batch_generation import BatchRunner, _parse_item, completed_ids
+from scheduler import LaneFull
+
+def test_completed_ids_cuts_a_partial_last_line(tmp_path):
+    output = tmp_path / "tweets.jsonl"
+    output.write_text(
+        '{"id": "m1", "status": "success"}\n'
+        '{"id": "m2", "status": "circuit_open"}\n'
+        '{"id": 3, "status": "success"}\n'
+        '{"id": "m4", "status": "succ'
+    )
+    assert completed_ids(str(output)) == {"m1", "3"}
+    assert output.read_text().endswith('"status": "success"}\n')
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+def test_parse_item_defaults_and_clamps():
+    item = _parse_item('{"cricket_moment": "Rohit hits a six"}', 7, "one_liner", 2)
+    assert (item.id, item.tweet_type, item.candidates) == ("7", "one_liner", 2)
+    assert _parse_item('{"cricket_moment": "six", "candidates": 9}', 1, "standard", 1).candidates == 5
+    assert _parse_item('{"cricket_moment": "six", "candidates": -3}', 1, "standard", 1).candidates == 1
+    assert _parse_item("   \n", 1, "standard", 1) is None
+
+@pytest.mark.parametrize("line", [
+    '{"cricket_moment": "six", "candidates": [2]}',
+    '{"cricket_moment": "six", "candidates": "many"}',
+    '{"cricket_moment": "six", "tweet_type": "thread"}',
+    '{"id": "m1"}',
+    "not json",
+])
+def test_parse_item_rejects_bad_lines(line):
+    with pytest.raises(ValueError):
+        _parse_item(line, 1, "standard", 1)
+
+class _Agent:
+    model_name = "gpt-4o"
+
+    def __init__(self):
+        self.moments = []
+
+    async def setup(self):
+        pass
+
+    async def generate_tweet(self, cricket_moment, tweet_type, deadline, candidates, priority):
+        self.moments.append(cricket_moment)
+        if cricket_moment == "full":
+            raise LaneFull("batch")
+        return {"ranked_tweets": [{"content": f"{cricket_moment} 🔥"}], "messages": []}
+
+    async def close(self):
+        pass
+
+def test_run_skips_done_ids_and_keeps_going_past_failures(monkeypatch):
+    monkeypatch.setattr(batch_generation.generation_store, "record", lambda **kwargs: None)
+    source = io.StringIO("\n".join([
+        '{"id": "done", "cricket_moment": "already tweeted"}',
+        '{"id": "bad", "cricket_moment": "six", "candidates": [2]}',
+        '{"id": "lane", "cricket_moment": "full"}',
+        '{"id": "ok", "cricket_moment": "Rohit hits a six"}',
+    ]) + "\n")
+    output = io.StringIO()
+    runner = BatchRunner(output, concurrency=2, skip_ids={"done"})
+    runner.agent = _Agent()
+
+    stats = asyncio.run(runner.run(source))
+
+    assert "already tweeted" not in runner.agent.moments
+    records = {record["id"]: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert set(records) == {"lane", "ok"}
+    assert records["ok"]["status"] == "success" and records["ok"]["tweet"] == "Rohit hits a six 🔥"
+    assert records["lane"]["status"] == "error" and "LaneFull" in records["lane"]["error"]
+    assert (stats.read, stats.skipped, stats.invalid) == (3, 1, 1)
+    assert stats.statuses == {"error": 1, "success": 1}
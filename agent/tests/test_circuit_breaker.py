@@ -0,0 +1,133 @@
+"""Closed / open / half-open transitions of circuit_breaker.CircuitBreaker"""
+
+import asyncio
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+OPEN_SECONDS = 0.05
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    options = {"window": 30.0, "min_calls": 4, "failure_rate": 0.5, "open_seconds": OPEN_SECONDS, "half_open_probes": 2}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+async def _ok():
+    return "ok"
+
+async def _fail():
+    raise RuntimeError("down")
+
+def _run(breaker: CircuitBreaker, call) -> str:
+    async def outcome():
+        try:
+            return await breaker.call(call)
+        except CircuitOpen:
+            return "rejected"
+        except Exception:
+            return "failed"
+    return asyncio.run(outcome())
+
+def _open(breaker: CircuitBreaker) -> None:
+    for call in (_ok, _fail, _ok, _fail):
+        _run(breaker, call)
+    assert breaker.state == OPEN
+
+def test_stays_closed_below_min_calls():
+    breaker = _breaker()
+    for call in (_fail, _fail, _fail):
+        _run(breaker, call)
+    assert breaker.state == CLOSED
+
+def test_stays_closed_below_the_failure_rate():
+    breaker = _breaker()
+    for call in (_ok, _ok, _fail, _ok, _ok, _fail):
+        _run(breaker, call)
+    assert breaker.state == CLOSED
+    assert breaker.status()["failure_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+def test_opens_at_the_failure_rate_and_fails_fast():
+    breaker = _breaker()
+    _open(breaker)
+    called = []
+
+    async def tracked():
+        called.append(1)
+
+    assert _run(breaker, tracked) == "rejected"
+    assert not called
+    assert 0 < breaker.retry_after() <= OPEN_SECONDS
+    assert not breaker.available()
+
+def test_half_open_probes_close_it_again():
+    breaker = _breaker()
+    _open(breaker)
+    time.sleep(OPEN_SECONDS * 1.5)
+    assert breaker.available()
+    assert _run(breaker, _ok) == "ok"
+    assert breaker.state == HALF_OPEN
+    assert _run(breaker, _ok) == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.status()["calls"] == 0
+
+def test_failed_probe_reopens_it():
+    breaker = _breaker()
+    _open(breaker)
+    time.sleep(OPEN_SECONDS * 1.5)
+    assert _run(breaker, _fail) == "failed"
+    assert breaker.state == OPEN
+    assert _run(breaker, _ok) == "rejected"
+
+def test_half_open_admits_only_the_probe_budget():
+    breaker = _breaker(half_open_probes=1)
+    _open(breaker)
+    time.sleep(OPEN_SECONDS * 1.5)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "ok"
+
+        probe = asyncio.create_task(breaker.call(slow))
+        await asyncio.sleep(0)
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpen):
+            await breaker.call(_ok)
+        release.set()
+        assert await probe == "ok"
+
+    asyncio.run(scenario())
+    assert breaker.state == CLOSED
+
+def test_cancelled_probe_frees_its_slot():
+    breaker = _breaker(half_open_probes=1)
+    _open(breaker)
+    time.sleep(OPEN_SECONDS * 1.5)
+
+    async def scenario():
+        probe = asyncio.create_task(breaker.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # Neither outcome was recorded; the next call is the probe
+        assert breaker.state == HALF_OPEN
+        assert await breaker.call(_ok) == "ok"
+
+    asyncio.run(scenario())
+    assert breaker.state == CLOSED
+
+def test_call_timeout_counts_as_a_failure():
+    breaker = _breaker(min_calls=1, failure_rate=1.0, call_timeout=0.01)
+    assert _run(breaker, lambda: asyncio.sleep(1)) == "failed"
+    assert breaker.state == OPEN
+
+def test_disabled_breaker_lets_everything_through():
+    breaker = _breaker(enabled=False, min_calls=1)
+    for _ in range(5):
+        assert _run(breaker, _fail) == "failed"
+    assert breaker.state == CLOSED
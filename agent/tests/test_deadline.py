@@ -0,0 +1,24 @@
+"""Deadlines taken from the X-Request-Timeout header"""
+
+import pytest
+
+from deadline import Deadline
+
+@pytest.mark.parametrize("header, timeout", [
+    (None, 60.0),
+    ("10", 10.0),
+    ("1000", 120.0),
+    ("-5", 0.0),
+    ("soon", 60.0),
+    # Non-finite values fall back to the default instead of expiring at once or never
+    ("nan", 60.0),
+    ("inf", 60.0),
+    ("-inf", 60.0),
+])
+def test_timeout_from_header(monkeypatch, header, timeout):
+    monkeypatch.setenv("REQUEST_DEADLINE_SECONDS", "60")
+    monkeypatch.setenv("REQUEST_DEADLINE_MAX_SECONDS", "120")
+    headers = {"X-Request-Timeout": header} if header is not None else {}
+    deadline = Deadline.from_headers(headers)
+    assert deadline.timeout == timeout
+    assert deadline.remaining() <= timeout
@@ -0,0 +1,167 @@
+"""Scenario detection and filling of the pre-match drafts in draft_cache.py"""
+
+import os
+import json
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.v1 as v1
+from draft_cache import SCENARIOS, DraftCache, detect, fill_draft, match_scenario
+from result_cache import CacheBackend, ResultCache
+
+def _scenario(cricket_moment: str):
+    scenario = match_scenario(detect(cricket_moment))
+    return scenario.name if scenario else None
+
+@pytest.mark.parametrize("cricket_moment, scenario", [
+    # Every sample moment finds its own scenario
+    *[(scenario.sample_moment(), scenario.name) for scenario in SCENARIOS],
+    # Feed moments (feed_ingestion.BallEvent.to_moment)
+    ("Rohit Sharma hits Pat Cummins for a six over long-on. Over 17.4, MI 160/3 chasing 201.", "six_in_chase"),
+    ("Rohit Sharma hits Mitchell Starc for a four. Over 19.6 (final over), MI 180/4.", "four"),
+    ("Rohit Sharma hits the bowler for a six. Over 12.1.", "six"),
+    ("Rohit Sharma reaches his hundred, off 58 balls. Over 16.2.", "hundred"),
+    ("Rohit Sharma reaches his half-century with a single off Rashid Khan. Over 9.1.", "fifty"),
+    ("Rohit Sharma hits Jasprit Bumrah for a 98m maximum. Over 14.3.", "six"),
+    ("Rohit Sharma hits Arshdeep Singh for consecutive sixes. Over 18.2.", "back_to_back_sixes"),
+    ("Rohit Sharma hits Arshdeep Singh for a six, his third in a row. Over 18.3.", "six"),
+    # The kind only comes from the delivery: "six runs" does not make it a six
+    ("Rohit Sharma hits Jasprit Bumrah for a four. MI need six runs off the last over.", "four"),
+])
+def test_detects_the_scenario(cricket_moment, scenario):
+    assert _scenario(cricket_moment) == scenario
+
+@pytest.mark.parametrize("cricket_moment", [
+    # Dismissals are never drafted, whatever else the moment mentions
+    "Rohit Sharma is dismissed for 49 by Pat Cummins after hitting six sixes.",
+    "Rohit Sharma hits Pat Cummins for a six, then is caught at long-on next ball.",
+    "Rohit Sharma out for 12, bowled by Mitchell Starc.",
+    # No delivery or milestone phrase
+    "Six sixes in the innings so far for MI, a hundred runs up in 9 overs.",
+    "What a fifty partnership between Rohit and Tilak!",
+    # Several deliveries at once
+    "Rohit Sharma hits Pat Cummins for two sixes in the over.",
+])
+def test_no_scenario(cricket_moment):
+    assert _scenario(cricket_moment) is None
+
+def test_last_ball_needs_the_innings_or_over_19_6():
+    assert _scenario("Rohit Sharma hits Pat Cummins for a six off the last ball of the 15th over. Over 14.6.") == "six"
+    assert _scenario("Rohit Sharma hits Pat Cummins for a six off the last ball of the innings.") == "six_last_ball"
+    assert _scenario("Rohit Sharma hits Pat Cummins for a six. Over 19.6.") == "six_last_ball"
+
+def test_bowler_only_from_the_delivery():
+    slots = detect("Rohit Sharma hits Deepak Chahar for a six against Chennai Super Kings. Over 11.2.")["slots"]
+    assert slots["bowler"] == "Deepak Chahar" and slots["bowler_surname"] == "Chahar"
+    assert "bowler" not in detect("Rohit Sharma hits the bowler for a six against Chennai Super Kings.")["slots"]
+
+def test_slots():
+    facts = detect("Rohit Sharma hits Pat Cummins for a 103 meter six. Over 17.2, MI need 23 more runs to win.")
+    assert facts["batter"] == "Rohit Sharma"
+    assert facts["slots"] == {
+        "bowler": "Pat Cummins", "bowler_surname": "Cummins", "distance": "103", "over": "17.2", "required_runs": "23",
+    }
+    chase = detect("Rohit Sharma hits Pat Cummins for a six. Over 17.4, MI 160/3 chasing 201.")
+    assert chase["slots"]["required_runs"] == "41"
+
+def test_fill_draft():
+    slots = {"bowler": "Pat Cummins", "bowler_surname": "Cummins", "over": "17.2"}
+    assert fill_draft("{bowler} gone for six in over {over}!", slots) == "Pat Cummins gone for six in over 17.2!"
+    assert fill_draft("{BOWLER_SURNAME} CLEARED", slots) == "CUMMINS CLEARED"
+    assert fill_draft("{distance}m six off {bowler}", slots) is None
+    # Nothing taken from the moment: the draft may still describe the sample
+    assert fill_draft("What a six from the Hitman!", slots) is None
+
+@pytest.fixture
+def drafts(tmp_path):
+    path = tmp_path / "drafts.json"
+    path.write_text(json.dumps({
+        "generated_at": 1.0,
+        "batter": "Rohit Sharma",
+        "drafts": {
+            "six": {
+                "standard": ["Rohit Sharma sends {bowler} into the stands! Over {over} and the crowd erupts 🔥 #MI #IPL"],
+                "one_liner": ["HITMAN CLEARS {BOWLER_SURNAME}! 🔥 #MI"],
+            },
+            "four": {"standard": ["Shot of the match so far 🔥 #MI"]},
+        },
+    }))
+    cache = DraftCache(enabled=True, path=str(path))
+    asyncio.run(cache.refresh())
+    return cache
+
+def test_fill_uses_the_drafts_batter_only(drafts):
+    result = drafts.fill("Rohit Sharma hits Pat Cummins for a six. Over 12.1.", "standard")
+    assert result["model"] == "draft:six"
+    assert result["tweet"].startswith("Rohit Sharma sends Pat Cummins into the stands! Over 12.1")
+    assert drafts.fill("Virat Kohli hits Pat Cummins for a six. Over 12.1.", "standard") is None
+    assert drafts.fill("ROHIT SHARMA hits Pat Cummins for a six.", "one_liner")["tweet"] == "HITMAN CLEARS CUMMINS! 🔥 #MI"
+    # The only four draft has no slot
+    assert drafts.fill("Rohit Sharma hits Pat Cummins for a four. Over 3.1.", "standard") is None
+
+def test_fill_types_keeps_the_answered_types(drafts):
+    filled = drafts.fill_types("Rohit Sharma hits Pat Cummins for a six. Over 12.1.", ["standard", "one_liner"])
+    assert set(filled) == {"standard", "one_liner"}
+    assert filled["one_liner"]["tweet"] == "HITMAN CLEARS CUMMINS! 🔥 #MI"
+    assert drafts.fill_types("Rohit Sharma hits Pat Cummins for a four.", ["standard", "one_liner"]) == {}
+
+def test_disabled_by_default(monkeypatch, drafts):
+    monkeypatch.delenv("DRAFT_CACHE_ENABLED", raising=False)
+    assert not DraftCache(path=drafts.path).enabled
+
+class _Agent:
+    agent = None
+    model_name = "gpt-4o"
+
+    def __init__(self):
+        self.setups = 0
+        self.calls = []
+
+    async def setup(self):
+        self.setups += 1
+        self.agent = object()
+
+    async def generate_tweet(self, cricket_moment, tweet_type, deadline, candidates, priority, **kwargs):
+        self.calls.append((tweet_type, kwargs))
+        return {"ranked_tweets": [{"content": "Live tweet 🔥 #MI", "score": 1.0}], "messages": []}
+
+    async def close(self):
+        pass
+
+@pytest.mark.parametrize("moment, setups, generated", [
+    # Both types drafted: no MCP session and no generation
+    ("Rohit Sharma hits Pat Cummins for a six. Over 12.1.", 0, []),
+    # No draft: set up in the request task, and the generation does not try the drafts again
+    ("Virat Kohli hits Pat Cummins for a six. Over 12.1.", 1, ["standard", "one_liner"]),
+])
+def test_route_fills_the_drafts_once_before_setup(monkeypatch, drafts, moment, setups, generated):
+    monkeypatch.setattr(v1, "draft_cache", drafts)
+    monkeypatch.setattr(v1, "result_cache", ResultCache(CacheBackend()))
+    monkeypatch.setattr(v1.generation_store, "record", lambda **kwargs: None)
+    monkeypatch.setattr(v1.tweet_broadcaster, "publish", lambda event: None)
+    agent = _Agent()
+
+    async def get_agent():
+        yield agent
+
+    app = FastAPI()
+    app.include_router(v1.router)
+    app.dependency_overrides[v1.get_agent] = get_agent
+    with TestClient(app) as client:
+        response = client.post("/v1/tweets", json={"cricket_moment": moment, "generate_both_types": True})
+
+    assert response.status_code == 200
+    assert agent.setups == setups
+    assert [tweet_type for tweet_type, _ in agent.calls] == generated
+    assert all(kwargs == {"drafts": False} for _, kwargs in agent.calls)
+
+def test_refresh_follows_the_file_at_most_every_interval(monkeypatch, drafts):
+    os.remove(drafts.path)
+    asyncio.run(drafts.refresh())
+    assert drafts.drafts
+    monkeypatch.setattr(drafts, "_checked_at", 0.0)
+    asyncio.run(drafts.refresh())
+    assert drafts.drafts == {} and drafts.status()["scenarios"] == {}
@@ -0,0 +1,71 @@
+"""Tests for feed filtering and worker resilience in feed_ingestion.py"""
+
+import asyncio
+
+import feed_ingestion
+from feed_ingestion import BallEvent, FeedIngestor
+
+def _event(batter: str, kind: str = "six") -> BallEvent:
+    return BallEvent.from_dict({"event_id": f"{batter}-{kind}", "kind": kind, "batter": batter, "over": 10.2})
+
+def test_only_the_tracked_batter_is_tweet_worthy():
+    ingestor = FeedIngestor(batter="Rohit Sharma", aliases=["RG Sharma"])
+    assert ingestor.is_tweet_worthy(_event("Rohit Sharma"))
+    assert ingestor.is_tweet_worthy(_event("  rohit  SHARMA "))
+    assert ingestor.is_tweet_worthy(_event("RG Sharma"))
+    for other in ("Abhishek Sharma", "Ishant Sharma", "Mohit Sharma", "Sharma"):
+        assert not ingestor.is_tweet_worthy(_event(other))
+    assert not ingestor.is_tweet_worthy(_event("Rohit Sharma", kind="dot"))
+
+def test_latencies_are_bounded():
+    ingestor = FeedIngestor()
+    for index in range(feed_ingestion.LATENCY_WINDOW + 10):
+        ingestor.latencies.append(float(index))
+    assert len(ingestor.latencies) == feed_ingestion.LATENCY_WINDOW
+
+def test_worker_retries_a_failing_setup(monkeypatch):
+    attempts = []
+
+    class FlakyAgent:
+        model_name = "test"
+
+        async def setup(self):
+            attempts.append(True)
+            if len(attempts) < 3:
+                raise RuntimeError("MCP server unavailable")
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(feed_ingestion, "IPLTweetAgent", FlakyAgent)
+    monkeypatch.setattr(feed_ingestion, "SETUP_RETRY_SECONDS", (0.01,))
+
+    async def run():
+        ingestor = FeedIngestor(concurrency=1)
+        worker = asyncio.create_task(ingestor._worker(0))
+        await asyncio.sleep(0.2)
+        assert not worker.done()
+        worker.cancel()
+
+    asyncio.run(run())
+    assert len(attempts) == 3
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+def test_tail_file_joins_partial_lines_and_follows_truncation(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    path.write_text('{"event_id": "a"}\n{"event_id": ', encoding="utf-8")
+
+    async def scenario():
+        events = feed_ingestion.tail_file(str(path), from_start=True, poll_interval=0.01)
+        first = await events.__anext__()
+        await asyncio.to_thread(_append, path, '"b"}\n')
+        second = await events.__anext__()
+        path.write_text('{"event_id": "c"}\n', encoding="utf-8")
+        third = await asyncio.wait_for(events.__anext__(), 2)
+        await events.aclose()
+        return [first["event_id"], second["event_id"], third["event_id"]]
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
@@ -0,0 +1,42 @@
+"""Tests for the background writer in generation_store.py"""
+
+import os
+import threading
+
+from generation_store import GenerationStore
+
+def _row(tweet: str):
+    return {
+        "request_id": "r1", "tweet_type": "standard", "cricket_moment": "Six!",
+        "moment_hash": "m", "tweet": tweet, "status": "success",
+    }
+
+def test_database_is_created_on_the_writer_thread(monkeypatch, tmp_path):
+    store = GenerationStore(path=str(tmp_path / "db" / "generations.db"), flush_interval=0.05)
+    initialized_on = []
+    initialize = store._initialize
+
+    def tracking_initialize():
+        initialized_on.append(threading.current_thread().name)
+        return initialize()
+
+    monkeypatch.setattr(store, "_initialize", tracking_initialize)
+    store.record(**_row("First"))
+    store.record(**_row("Second"))
+    store.flush()
+
+    assert initialized_on[0] == "generation-store-writer"
+    assert sorted(row["tweet"] for row in store.recent()) == ["First", "Second"]
+
+def test_rows_are_dropped_when_the_database_cannot_be_opened(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    store = GenerationStore(path=str(blocker / "generations.db"), flush_interval=0.05)
+    store.record(**_row("Lost"))
+    store.flush()
+
+    assert not store.enabled
+    assert store._queue.empty()
+    store.record(**_row("Ignored"))
+    assert store._queue.empty() and store.recent() == []
+    assert not os.path.exists(blocker / "generations.db")
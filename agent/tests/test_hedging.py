@@ -0,0 +1,38 @@
+"""Tests for the hedge budget in hedging.py"""
+
+import asyncio
+
+from hedging import HedgePolicy
+
+def _policy(**kwargs) -> HedgePolicy:
+    options = {"enabled": True, "percentile": 95, "min_delay": 0.01, "max_ratio": 0.1, "min_samples": 1, "burst": 2}
+    options.update(kwargs)
+    return HedgePolicy(**options)
+
+def test_budget_earned_per_call_and_capped_by_burst():
+    policy = _policy()
+    # A long healthy period saves up no more than the burst
+    for _ in range(1000):
+        policy.calls += 1
+        policy.budget = min(policy.burst, policy.budget + policy.max_ratio)
+    assert policy.try_acquire_hedge()
+    assert policy.try_acquire_hedge()
+    assert not policy.try_acquire_hedge()
+
+def test_latency_burst_hedges_at_most_the_ratio():
+    policy = _policy(burst=1)
+    # Enough fast history that the slow calls below don't move the percentile
+    for _ in range(500):
+        policy.tracker("m").record(0.001)
+
+    async def slow():
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    async def run():
+        for _ in range(20):
+            assert await policy.call("m", slow) == "ok"
+
+    asyncio.run(run())
+    # Every call was slow, but 20 calls at a ratio of 0.1 only earn 2 hedges
+    assert policy.hedges == 2
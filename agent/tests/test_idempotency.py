@@ -0,0 +1,95 @@
+"""Single-flight and bounded waiting of idempotency.IdempotencyStore"""
+
+import asyncio
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from idempotency import IdempotencyStore, IdempotencyKeyReused, IdempotencyWaitAbandoned
+from result_cache import MemoryCache
+
+def _store() -> IdempotencyStore:
+    return IdempotencyStore(MemoryCache(100), ttl=60, lock_seconds=60)
+
+def test_concurrent_retry_shares_the_first_response():
+    async def scenario():
+        store = _store()
+        release = asyncio.Event()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return {"request_id": "first"}
+
+        first = asyncio.create_task(store.run("k", "fp", compute))
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(store.run("k", "fp", compute))
+        await asyncio.sleep(0.05)
+        release.set()
+        assert await first == ({"request_id": "first"}, False)
+        assert await retry == ({"request_id": "first"}, True)
+        # Later retries are answered from the backend
+        assert await store.run("k", "fp", compute) == ({"request_id": "first"}, True)
+        assert len(calls) == 1
+        with pytest.raises(IdempotencyKeyReused):
+            await store.run("k", "other", compute)
+
+    asyncio.run(scenario())
+
+def test_retry_generates_again_after_the_original_failed():
+    async def scenario():
+        store = _store()
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("model down")
+
+        async def succeed():
+            return {"request_id": "retry"}
+
+        first = asyncio.create_task(store.run("k", "fp", fail))
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(store.run("k", "fp", succeed))
+        with pytest.raises(RuntimeError):
+            await first
+        assert await retry == ({"request_id": "retry"}, False)
+
+    asyncio.run(scenario())
+
+def test_wait_on_the_in_flight_request_ends_at_the_deadline():
+    async def scenario():
+        store = _store()
+
+        async def slow():
+            await asyncio.sleep(0.5)
+            return {"request_id": "first"}
+
+        first = asyncio.create_task(store.run("k", "fp", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await store.run("k", "fp", slow, Deadline(0.15))
+        # The original is not cancelled with the retry
+        assert await first == ({"request_id": "first"}, False)
+
+    asyncio.run(scenario())
+
+def test_wait_on_another_workers_claim_ends_at_the_deadline_or_disconnect():
+    async def scenario():
+        store = _store()
+        # As if another worker had claimed the key and is still generating
+        store.backend.add("k", {"state": "pending", "fingerprint": "fp"}, 60)
+
+        async def compute():
+            raise AssertionError("the claim is held elsewhere")
+
+        with pytest.raises(DeadlineExceeded):
+            await store.run("k", "fp", compute, Deadline(0.15))
+
+        async def disconnected():
+            return True
+
+        with pytest.raises(IdempotencyWaitAbandoned):
+            await store.run("k", "fp", compute, Deadline(5), disconnected)
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+"""A setup that fails or is cancelled halfway closes its MCP client"""
+
+import asyncio
+
+import langchain_mcp_adapters.client
+import pytest
+
+import mcp_client
+from circuit_breaker import CircuitBreakers
+from mcp_client import MCPClientManager
+
+class _Client:
+    instances = []
+
+    def __init__(self, connections):
+        self.exited = False
+        _Client.instances.append(self)
+
+    async def __aenter__(self):
+        # Opens its connection, then hangs or fails before it is fully entered
+        await asyncio.sleep(getattr(self, "hang", 0))
+        raise ConnectionError("SSE stream closed")
+
+    async def __aexit__(self, *exc_info):
+        self.exited = True
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch):
+    _Client.instances = []
+    monkeypatch.setattr(langchain_mcp_adapters.client, "MultiServerMCPClient", _Client)
+    monkeypatch.setattr(mcp_client, "circuit_breakers", CircuitBreakers(enabled=True, mcp_call_timeout=0.05))
+
+@pytest.mark.parametrize("hang", [0, 1.0])
+def test_failed_or_timed_out_setup_exits_the_client(hang):
+    _Client.hang = hang
+    manager = MCPClientManager()
+    with pytest.raises(Exception):
+        asyncio.run(manager.setup())
+    assert manager.mcp_client is None
+    assert [client.exited for client in _Client.instances] == [True]
+
+def test_cancelled_setup_exits_the_client():
+    _Client.hang = 1.0
+    manager = MCPClientManager()
+
+    async def scenario():
+        task = asyncio.create_task(manager.setup())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert manager.mcp_client is None
+    assert [client.exited for client in _Client.instances] == [True]
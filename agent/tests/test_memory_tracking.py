@@ -0,0 +1,37 @@
+"""Access to the memory tracing reports and the summary taken off the event loop"""
+
+import asyncio
+import threading
+import tracemalloc
+
+import pytest
+
+from memory_tracking import MemoryTracker
+
+@pytest.mark.parametrize("token, flag, allowed", [
+    ("", None, False),
+    ("", "false", False),
+    ("", "1", True),
+    ("s3cret", "1", False),
+    ("s3cret", "s3cret", True),
+])
+def test_authorized(token, flag, allowed):
+    assert MemoryTracker(enabled=True, token=token).authorized(flag) is allowed
+
+def test_disabled_tracker_authorizes_nobody():
+    assert not MemoryTracker(enabled=False, token="s3cret").authorized("s3cret")
+
+def test_summary_snapshots_in_a_worker_thread(monkeypatch):
+    tracker = MemoryTracker(enabled=True)
+    threads = []
+    take_snapshot = tracemalloc.take_snapshot
+    monkeypatch.setattr(
+        tracemalloc, "take_snapshot", lambda: threads.append(threading.current_thread()) or take_snapshot()
+    )
+    tracemalloc.start()
+    try:
+        summary = asyncio.run(tracker.summary(limit=5))
+    finally:
+        tracemalloc.stop()
+    assert threads and threads[0] is not threading.main_thread()
+    assert len(summary["top"]) <= 5 and summary["recent_requests"] == []
@@ -0,0 +1,23 @@
+"""The agent's metric registry on top of prometheus_client"""
+
+import pytest
+
+from metrics import MetricsRegistry
+
+def test_declaring_a_metric_twice_returns_the_same_one():
+    registry = MetricsRegistry()
+    requests = registry.counter("agent_test_requests", "Requests", ["status"])
+    assert registry.counter("agent_test_requests", "Requests", ["status"]) is requests
+    with pytest.raises(ValueError):
+        registry.gauge("agent_test_requests", "Requests", ["status"])
+
+def test_render_is_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("agent_test_requests", "Requests", ["status"]).labels("200").inc()
+    registry.gauge("agent_test_ready", "Ready", []).set(1)
+    registry.histogram("agent_test_seconds", "Latency", [], buckets=(0.1, 1.0)).observe(0.5)
+    text = registry.render()
+    assert 'agent_test_requests_total{status="200"} 1.0' in text
+    assert "agent_test_ready 1.0" in text
+    assert 'agent_test_seconds_bucket{le="1.0"} 1.0' in text
+    assert "_created" not in text
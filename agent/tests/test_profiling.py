@@ -0,0 +1,51 @@
+"""Request profiles are written off the event loop and identified on error responses too"""
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.v1 as v1
+from circuit_breaker import CircuitOpen
+from profiling import RequestProfiler
+from result_cache import CacheBackend, ResultCache
+
+@pytest.mark.parametrize("mode", ["sample", "cprofile"])
+def test_stop_then_save_writes_the_profile(tmp_path, mode):
+    profiler = RequestProfiler(enabled=True, mode=mode, directory=str(tmp_path))
+    profile = profiler.start("p1", "1")
+    sum(range(10000))
+    profile.stop()
+    assert profile.save() == "p1"
+    assert os.listdir(tmp_path) == [f"p1.{'prof' if mode == 'cprofile' else 'folded'}"]
+    # The profiler is free for the next request
+    assert profiler.start("p2", "1") is not None
+
+class _Agent:
+    agent = object()
+    model_name = "gpt-4o"
+
+    async def generate_tweet(self, *args, **kwargs):
+        raise CircuitOpen("llm", 30)
+
+    async def close(self):
+        pass
+
+def test_error_response_carries_the_profile_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(v1, "request_profiler", RequestProfiler(enabled=True, directory=str(tmp_path)))
+    monkeypatch.setattr(v1, "result_cache", ResultCache(CacheBackend()))
+    monkeypatch.setattr(v1.generation_store, "record", lambda **kwargs: None)
+
+    async def get_agent():
+        yield _Agent()
+
+    app = FastAPI()
+    app.include_router(v1.router)
+    app.dependency_overrides[v1.get_agent] = get_agent
+    with TestClient(app) as client:
+        response = client.post("/v1/tweets", json={"cricket_moment": "Rohit hits a six"}, headers={"X-Profile": "1"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert os.listdir(tmp_path) == [f"{response.headers['X-Profile-Id']}.folded"]
@@ -0,0 +1,32 @@
+"""The bundled prompt templates must match the tweet MCP server's"""
+
+import importlib.util
+import os
+
+from prompts.ipl_tweet_prompt_rohit_4_6 import RohitSharmaIPLTweetPrompt
+
+MCP_PROMPTS = os.path.join(
+    os.path.dirname(__file__), "..", "..", "mcp_servers", "tweet_generator", "tools", "ipl_tweet_prompt_rohit_4_6.py"
+)
+
+def _mcp_prompt_class():
+    spec = importlib.util.spec_from_file_location("mcp_ipl_tweet_prompt_rohit_4_6", MCP_PROMPTS)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.RohitSharmaIPLTweetPrompt
+
+def test_bundled_templates_match_the_mcp_server():
+    served = _mcp_prompt_class()
+    assert RohitSharmaIPLTweetPrompt.TEMPLATES == served.TEMPLATES
+    for template in served.TEMPLATES.values():
+        assert RohitSharmaIPLTweetPrompt.template_version(template) == served.template_version(template)
+
+def test_bundled_rendering_matches_the_mcp_server():
+    served = _mcp_prompt_class()
+    moment = "Rohit hits Starc for a six over long-on, 98 metres"
+    assert RohitSharmaIPLTweetPrompt.get_viral_prompt_rohit_sharma_4_6(moment) == (
+        served.get_viral_prompt_rohit_sharma_4_6(moment)
+    )
+    assert RohitSharmaIPLTweetPrompt.get_one_liner_prompt_rohit_sharma_4_6(moment) == (
+        served.get_one_liner_prompt_rohit_sharma_4_6(moment)
+    )
@@ -0,0 +1,111 @@
+"""Result cache lookups, bypass and the setup skipped on a hit"""
+
+import asyncio
+import itertools
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.v1 as v1
+from result_cache import MemoryCache, ResultCache
+
+def test_lookup_false_generates_afresh_and_replaces_the_cached_value():
+    cache = ResultCache(MemoryCache(), ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return [len(calls)], True
+
+    async def scenario():
+        assert await cache.get_or_compute("k", compute) == [1]
+        assert await cache.get_or_compute("k", compute) == [1]
+        assert await cache.get_or_compute("k", compute, lookup=False) == [2]
+        assert await cache.get("k") == [2]
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+class _LockedCache(MemoryCache):
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def set(self, key, value, ttl):
+        raise sqlite3.OperationalError("database is locked")
+
+def test_backend_errors_are_a_miss_and_a_skipped_write():
+    cache = ResultCache(_LockedCache(), ttl=60)
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return ["tweet"], True
+
+    async def scenario():
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        release.set()
+        # The generated tweet reaches the caller and its waiters despite the failed write
+        assert await leader == ["tweet"]
+        assert await waiter == ["tweet"]
+        assert await cache.get("k") is None
+
+    asyncio.run(scenario())
+
+class _Agent:
+    agent = None
+    model_name = "gpt-4o"
+    tweet_numbers = itertools.count(1)
+
+    def __init__(self):
+        self.setups = 0
+        self.generations = 0
+
+    async def setup(self):
+        self.setups += 1
+        self.agent = object()
+
+    async def generate_tweet(self, cricket_moment, tweet_type, deadline, candidates, priority, **kwargs):
+        self.generations += 1
+        return {"ranked_tweets": [{"content": f"tweet {next(self.tweet_numbers)}", "score": 1.0}], "messages": []}
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(v1, "result_cache", ResultCache(MemoryCache(), ttl=60))
+    monkeypatch.setattr(v1.generation_store, "record", lambda **kwargs: None)
+    monkeypatch.setattr(v1.tweet_broadcaster, "publish", lambda event: None)
+    monkeypatch.setattr(v1.draft_cache, "fill_types", lambda *args: {})
+    agents = []
+
+    async def get_agent():
+        agents.append(_Agent())
+        yield agents[-1]
+
+    app = FastAPI()
+    app.include_router(v1.router)
+    app.dependency_overrides[v1.get_agent] = get_agent
+    with TestClient(app) as test_client:
+        yield test_client, agents
+
+def test_cache_hit_skips_setup_and_no_cache_bypasses_it(client):
+    test_client, agents = client
+    body = {"cricket_moment": "Rohit hits Starc for a six"}
+
+    first = test_client.post("/v1/tweets", json=body)
+    hit = test_client.post("/v1/tweets", json=body)
+    fresh = test_client.post("/v1/tweets", json=body, headers={"Cache-Control": "no-cache"})
+    after = test_client.post("/v1/tweets", json=body)
+
+    tweet = lambda response: response.json()["tweets"][0]["content"]
+    assert [agent.setups for agent in agents] == [1, 0, 1, 0]
+    assert [agent.generations for agent in agents] == [1, 0, 1, 0]
+    assert tweet(hit) == tweet(first)
+    assert tweet(fresh) != tweet(first)
+    assert tweet(after) == tweet(fresh)
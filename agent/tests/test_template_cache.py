@@ -0,0 +1,76 @@
+"""Template refreshes and the MCP bytes each prompt lookup reads"""
+
+import asyncio
+import json
+
+import pytest
+
+import tweet_graph
+from metrics import registry
+from template_cache import MANIFEST_URI, PromptTemplateCache
+from tweet_graph import TWEET_TYPE_TOOLS, TweetPipelineDeps
+
+TEMPLATE = "Write a viral tweet about {content_dump} 🔥"
+
+class _Tool:
+    name = TWEET_TYPE_TOOLS["standard"]
+
+    async def ainvoke(self, arguments):
+        return json.dumps({"prompt": TEMPLATE.replace("{content_dump}", arguments["request"]["content_dump"])})
+
+class _Manager:
+    def __init__(self, publishes: bool = True):
+        self.publishes = publishes
+        self.reads = []
+
+    def is_connected(self):
+        return True
+
+    def get_tools(self):
+        return [_Tool()]
+
+    async def read_resource(self, uri):
+        self.reads.append(uri)
+        if not self.publishes:
+            raise RuntimeError("no such resource")
+        if uri == MANIFEST_URI:
+            uri_for = "tweet-templates://rohit_sharma_boundary_viral"
+            return json.dumps({"templates": {"rohit_sharma_boundary_viral": {"version": "v1", "uri": uri_for}}})
+        return TEMPLATE
+
+def _bytes(source):
+    """(lookups, bytes) recorded so far for a prompt source."""
+    samples = registry.collector_registry.get_sample_value
+    labels = {"source": source}
+    return (
+        samples("agent_prompt_mcp_bytes_count", labels) or 0.0,
+        samples("agent_prompt_mcp_bytes_sum", labels) or 0.0,
+    )
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = PromptTemplateCache(manifest_ttl=60)
+    monkeypatch.setattr(tweet_graph, "template_cache", cache)
+    return cache
+
+def _prompt(manager):
+    deps = TweetPipelineDeps(llm=None, mcp_client_manager=manager, system_prompt="")
+    return asyncio.run(tweet_graph._obtain_prompt(deps, "standard", "Rohit hits a six"))
+
+def test_cached_template_reads_no_mcp_bytes_after_the_first_request():
+    manager = _Manager()
+    before = _bytes("cache")
+    assert _prompt(manager) == "Write a viral tweet about Rohit hits a six 🔥"
+    first = _bytes("cache")
+    assert first[0] == before[0] + 1 and first[1] > before[1]
+    # Within the manifest TTL: rendered locally, nothing read
+    _prompt(manager)
+    assert _bytes("cache") == (first[0] + 1, first[1])
+    assert len(manager.reads) == 2
+
+def test_tool_fallback_counts_the_rendered_prompt():
+    before = _bytes("tool")
+    _prompt(_Manager(publishes=False))
+    count, total = _bytes("tool")
+    assert count == before[0] + 1
+    assert total - before[1] == len(json.dumps({"prompt": "Write a viral tweet about Rohit hits a six 🔥"}).encode())
@@ -0,0 +1,44 @@
+"""Tests for the buffered request capture in traffic_capture.py"""
+
+import json
+import time
+import threading
+
+from traffic_capture import TrafficCapture
+
+def _capture(tmp_path, **kwargs) -> TrafficCapture:
+    options = {"enabled": True, "path": str(tmp_path / "requests.jsonl"), "flush_interval": 60.0}
+    options.update(kwargs)
+    return TrafficCapture(**options)
+
+def test_record_never_writes_on_the_calling_thread(tmp_path, monkeypatch):
+    capture = _capture(tmp_path)
+    flushed_on = []
+    monkeypatch.setattr(capture, "flush", lambda: flushed_on.append(threading.current_thread()))
+    for index in range(300):
+        capture.record({"cricket_moment": f"ball {index}"}, {}, f"r{index}")
+    # The full buffer may wake the flusher thread, but the caller never flushes
+    assert threading.current_thread() not in flushed_on
+
+def test_full_buffer_wakes_the_flusher(tmp_path):
+    capture = _capture(tmp_path)
+    for index in range(300):
+        capture.record({"cricket_moment": f"ball {index}"}, {}, f"r{index}")
+    # Well before the 60s flush interval
+    deadline = time.monotonic() + 5
+    path = tmp_path / "requests.jsonl"
+    while time.monotonic() < deadline and not path.exists():
+        time.sleep(0.01)
+    capture.close()
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["request_id"] for line in lines] == [f"r{index}" for index in range(300)]
+
+def test_rotates_by_size(tmp_path):
+    capture = _capture(tmp_path, max_bytes=200, backups=2)
+    for index in range(10):
+        capture.record({"cricket_moment": "x" * 50}, {}, f"r{index}")
+        capture.flush()
+    capture.close()
+    assert (tmp_path / "requests.jsonl.1").exists()
+    assert (tmp_path / "requests.jsonl.2").exists()
+    assert not (tmp_path / "requests.jsonl.3").exists()
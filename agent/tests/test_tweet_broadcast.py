@@ -0,0 +1,105 @@
+"""Replay on reconnect in tweet_broadcast.py, and the gateway relaying and merging the stream"""
+
+import asyncio
+
+import httpx
+from starlette.requests import Request
+
+from gateway import Gateway
+from tweet_broadcast import TweetBroadcaster
+
+async def _frames(stream, count: int) -> bytes:
+    received = b""
+    while received.count(b"event: tweet") < count:
+        received += await anext(stream)
+    return received
+
+def test_reconnect_replays_each_missed_message_once():
+    async def scenario():
+        broadcaster = TweetBroadcaster(replay=10)
+        for index in range(3):
+            broadcaster.publish({"n": index})
+        subscriber = broadcaster.subscribe("1")
+        # Published after subscribing, before the stream first runs: live only, not replayed again
+        broadcaster.publish({"n": 3})
+        stream = broadcaster.stream(subscriber)
+        received = await _frames(stream, 3)
+        await stream.aclose()
+        assert [line for line in received.split(b"\n") if line.startswith(b"id: ")] == [b"id: 2", b"id: 3", b"id: 4"]
+        assert broadcaster.subscribers == set()
+
+    asyncio.run(scenario())
+
+def test_gateway_relays_event_streams_without_buffering():
+    release = asyncio.Event()
+
+    async def events():
+        yield b"id: 1\nevent: tweet\ndata: {}\n\n"
+        # The stream stays open: a buffering proxy would never return the first frame
+        await release.wait()
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+    async def scenario():
+        gateway = Gateway(replicas=["http://replica"])
+        gateway.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        request = Request({
+            "type": "http", "method": "GET", "path": "/v1/tweets/stream", "query_string": b"", "headers": [],
+        })
+        response = await asyncio.wait_for(gateway.forward(request, gateway.route(None), b""), 1.0)
+        assert response.headers["X-Gateway-Replica"] == "http://replica"
+        first = await asyncio.wait_for(anext(response.body_iterator), 1.0)
+        assert first.startswith(b"id: 1\nevent: tweet")
+        release.set()
+        await response.body_iterator.aclose()
+        await gateway.client.aclose()
+
+    asyncio.run(scenario())
+
+def test_gateway_merges_the_stream_of_every_replica():
+    release = asyncio.Event()
+    last_event_ids = {}
+
+    async def events(replica: str, first_id: int):
+        # The second frame arrives in two chunks
+        yield f"id: {first_id}\nevent: tweet\ndata: {{\"from\": \"{replica}\"}}\n\nid: {first_id + 1}\nevent: tw".encode()
+        yield f"eet\ndata: {{\"from\": \"{replica}\"}}\n\n".encode()
+        if replica == "b":
+            await release.wait()
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        replica = request.url.host
+        last_event_ids[replica] = request.headers.get("Last-Event-ID")
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"},
+            content=events(replica, 5 if replica == "a" else 1),
+        )
+
+    async def scenario():
+        gateway = Gateway(replicas=["http://a", "http://b", "http://c"])
+        gateway.set_health("http://c", False)
+        gateway.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        request = Request({
+            "type": "http", "method": "GET", "path": "/v1/tweets/stream", "query_string": b"",
+            "headers": [(b"last-event-id", b"0:4,2:9")],
+        })
+        response = await asyncio.wait_for(gateway.fan_in(request), 1.0)
+        assert response.headers["X-Gateway-Replica"] == "http://a,http://b"
+        received = b""
+        # Replica a's stream ends after two frames, which ends the merged stream
+        async for chunk in response.body_iterator:
+            received += chunk
+        release.set()
+        await gateway.client.aclose()
+        return received
+
+    received = asyncio.run(scenario())
+    assert last_event_ids == {"a": "4", "b": None}
+    frames = [frame for frame in received.split(b"\n\n") if frame]
+    assert len([frame for frame in frames if b"\"from\": \"a\"" in frame]) == 2
+    assert all(frame.count(b"event: tweet") == 1 for frame in frames)
+    ids = [line[4:].decode() for line in received.split(b"\n") if line.startswith(b"id: ")]
+    # Every merged id keeps the position of the replica that is down
+    assert all(event_id.endswith(",2:9") for event_id in ids)
+    assert any(event_id.startswith("0:6,") for event_id in ids)
@@ -0,0 +1,47 @@
+"""Tests for how the write_tweet node reports model outcomes"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import tweet_graph
+from deadline import Deadline, DeadlineExceeded
+from tweet_graph import TweetPipelineDeps, write_tweet
+
+class _FakeModel:
+    def __init__(self, model_name: str, delay: float = 0.0, error: Exception = None):
+        self.model_name = model_name
+        self.delay = delay
+        self.error = error
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return AIMessage(content="HITMAN! 🔥 What a shot #IPL")
+
+def _run(llm, deadline=None):
+    deps = TweetPipelineDeps(llm=llm, mcp_client_manager=None, system_prompt="", deadline=deadline)
+    state = {"messages": [HumanMessage(content="write")], "tweet_type": "one_liner", "candidates": 1}
+    return asyncio.run(write_tweet(state, {"configurable": {"pipeline": deps}}))
+
+@pytest.fixture
+def observed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tweet_graph.model_router, "observe", lambda model, seconds, ok, usage=None: calls.append(ok))
+    return calls
+
+def test_client_deadline_is_not_a_model_failure(observed):
+    with pytest.raises(DeadlineExceeded):
+        _run(_FakeModel("test-deadline", delay=0.5), Deadline(0.05))
+    assert observed == []
+
+def test_model_error_is_observed(observed):
+    with pytest.raises(RuntimeError):
+        _run(_FakeModel("test-error", error=RuntimeError("provider down")))
+    assert observed == [False]
+
+def test_success_is_observed(observed):
+    assert _run(_FakeModel("test-ok"))["tweet"]
+    assert observed == [True]
@@ -0,0 +1,14 @@
+"""Validation of the /v1/tweets request body"""
+
+import pytest
+from pydantic import ValidationError
+
+from routes.v1 import TweetRequest
+
+def test_candidates_defaults_to_one():
+    assert TweetRequest(cricket_moment="Rohit hits a six").candidates == 1
+
+@pytest.mark.parametrize("candidates", [None, 0, 6])
+def test_candidates_must_be_between_one_and_five(candidates):
+    with pytest.raises(ValidationError):
+        TweetRequest(cricket_moment="Rohit hits a six", candidates=candidates)
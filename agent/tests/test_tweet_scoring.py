@@ -0,0 +1,42 @@
+"""Weighted length, rule checks and repair in tweet_scoring.py"""
+
+import pytest
+
+from tweet_scoring import MAX_WEIGHTED_LENGTH, rank_tweets, repair_tweet, score_tweet, weighted_length
+
+@pytest.mark.parametrize("text, length", [
+    ("HITMAN", 6),
+    ("🔥", 2),
+    ("👨‍👩‍👧‍👦", 2),
+    ("🇮🇳", 2),
+    ("six https://example.com/a/very/long/path", 4 + 23),
+    ("छक्का", 5),
+    ("六", 2),
+])
+def test_weighted_length(text, length):
+    assert weighted_length(text) == length
+
+@pytest.mark.parametrize("tweet, repaired", [
+    # The surplus hashtag is a prefix of the kept one
+    ("SIXER ON THE ROOF #IPL2024 #IPL", "SIXER ON THE ROOF #IPL2024"),
+    ("HITMAN #MI ON FIRE #MI #IPL", "HITMAN #MI ON FIRE"),
+    ("HITMAN 🔥🔥👑🔥 ROOF #MI", "HITMAN 🔥🔥 ROOF #MI"),
+])
+def test_one_liner_surplus_is_removed_by_position(tweet, repaired):
+    assert repair_tweet(tweet, "one_liner") == repaired
+
+def test_missing_hashtag_is_not_invented():
+    assert repair_tweet("HITMAN CLEARS THE ROOF 🔥", "one_liner") == "HITMAN CLEARS THE ROOF 🔥"
+    assert not score_tweet("HITMAN CLEARS THE ROOF 🔥", "one_liner").valid
+
+def test_over_length_is_trimmed_and_keeps_the_first_hashtag():
+    tweet = "#MI " + "Rohit " * 60 + "#IPL2024 #MI2024 🔥"
+    repaired = repair_tweet(tweet, "standard")
+    assert weighted_length(repaired) <= MAX_WEIGHTED_LENGTH
+    assert repaired.endswith("… #MI") and "#MI2024" not in repaired
+
+def test_rank_prefers_valid_tweets_and_drops_duplicates():
+    valid = "Rohit Sharma sends it onto the roof at the Wankhede! 🔥 #MI #IPL2024"
+    ranked = rank_tweets(["six", valid, valid], "standard")
+    assert [score.content for score in ranked] == [valid, "six"]
+    assert ranked[0].valid and not ranked[1].valid
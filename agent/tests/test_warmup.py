@@ -0,0 +1,84 @@
+"""Required warm-up steps and live readiness of warmup.Warmup"""
+
+import asyncio
+
+import pytest
+
+import warmup as warmup_module
+from circuit_breaker import OPEN, CircuitBreakers
+from model_router import ModelRouter
+from warmup import Warmup
+
+OPEN_SECONDS = 0.05
+
+@pytest.fixture
+def breakers(monkeypatch):
+    breakers = CircuitBreakers(enabled=True, min_calls=1, failure_rate=0.5, open_seconds=OPEN_SECONDS)
+    monkeypatch.setattr(warmup_module, "circuit_breakers", breakers)
+    monkeypatch.setattr(warmup_module, "model_router", ModelRouter(
+        default_model="gpt-4o", routes={"one_liner": "gpt-4o-mini"}, fallbacks={"gpt-4o": "backup"},
+    ))
+    return breakers
+
+def _warmup(monkeypatch, pipeline: str = "graph", down=()) -> Warmup:
+    monkeypatch.setenv("AGENT_PIPELINE", pipeline)
+    warmup = Warmup(enabled=True, model_ping=True, step_timeout=1, retry_seconds=0.01)
+
+    async def ok():
+        return {}
+
+    async def ping(model):
+        if model in down:
+            raise RuntimeError(f"{model} is down")
+        return {}
+
+    async def no_mcp():
+        raise RuntimeError("MCP server is not connected")
+
+    monkeypatch.setattr(warmup, "_connect_mcp", no_mcp)
+    monkeypatch.setattr(warmup, "_load_templates", no_mcp)
+    monkeypatch.setattr(warmup, "_compile_graph", ok)
+    monkeypatch.setattr(warmup, "_ping_model", ping)
+    return warmup
+
+def _trip(breakers: CircuitBreakers, dependency: str) -> None:
+    async def fail():
+        raise RuntimeError("down")
+
+    async def call():
+        with pytest.raises(RuntimeError):
+            await breakers.get(dependency).call(fail)
+
+    asyncio.run(call())
+    assert breakers.get(dependency).state == OPEN
+
+def test_only_the_default_model_is_required(monkeypatch, breakers):
+    warmup = _warmup(monkeypatch, down={"gpt-4o-mini", "backup"})
+    asyncio.run(asyncio.wait_for(warmup.run(), 1.0))
+    status = warmup.status()
+    assert status["ready"]
+    assert status["steps"]["model:gpt-4o"]["state"] == "ok" and status["steps"]["model:gpt-4o"]["required"]
+    assert status["steps"]["model:gpt-4o-mini"]["state"] == "failed"
+    assert not status["steps"]["model:backup"]["required"]
+    # The graph pipeline serves from the bundled templates without MCP
+    assert status["steps"]["mcp"]["state"] == "failed" and not status["steps"]["mcp"]["required"]
+
+def test_readiness_follows_the_default_models_breaker(monkeypatch, breakers):
+    warmup = _warmup(monkeypatch)
+    asyncio.run(warmup.run())
+    assert warmup.ready
+    _trip(breakers, "model:gpt-4o")
+    assert not warmup.ready
+    assert warmup.status()["unavailable"] == ["model:gpt-4o"]
+    # A routed model's breaker does not matter; the default's lets probes through again after a while
+    _trip(breakers, "model:gpt-4o-mini")
+    asyncio.run(asyncio.sleep(OPEN_SECONDS))
+    assert warmup.ready
+
+def test_react_pipeline_needs_the_mcp_server(monkeypatch, breakers):
+    warmup = _warmup(monkeypatch, pipeline="react")
+    warmup.ready_at = 0.0
+    assert warmup.ready
+    _trip(breakers, "mcp")
+    assert not warmup.ready
+    assert warmup.status()["dependencies"] == {"model:gpt-4o": "closed", "mcp": "open"}
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Traffic Capture - Record incoming tweet requests for later replay
+
+When enabled, every ``POST /v1/tweets`` body is appended to a JSONL file together
+with its arrival time and deadline header. Lines are buffered in memory and written
+in one append per flush, and the file is rotated by size like a RotatingFileHandler
+(``requests.jsonl``, ``requests.jsonl.1``, ...). Replay a capture with
+``python -m benchmarks.replay``.
+
+    TRAFFIC_CAPTURE                 "true" to capture requests (default false)
+    TRAFFIC_CAPTURE_PATH            capture file (default /data/capture/requests.jsonl)
+    TRAFFIC_CAPTURE_MAX_BYTES       rotate once the file reaches this size (default 50 MB)
+    TRAFFIC_CAPTURE_BACKUPS         rotated files to keep (default 5)
+    TRAFFIC_CAPTURE_FLUSH_INTERVAL  max seconds a line stays buffered (default 1.0)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+
+from deadline import DEADLINE_HEADER
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+captured_requests = registry.counter(
+    "agent_traffic_captured",
+    "Requests written to the traffic capture, by outcome",
+    ["result"],
+)
+
+# Flush early once this many lines are buffered
+_MAX_BUFFERED_LINES = 256
+
+class TrafficCapture:
+    """Buffered, size-rotated JSONL writer for incoming requests."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        backups: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        """Initialize the capture; unset arguments fall back to the TRAFFIC_CAPTURE_* variables."""
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv("TRAFFIC_CAPTURE", "false").lower() == "true"
+        )
+        self.path = path or os.getenv("TRAFFIC_CAPTURE_PATH", "/data/capture/requests.jsonl")
+        self.max_bytes = max_bytes or int(os.getenv("TRAFFIC_CAPTURE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.backups = backups if backups is not None else int(os.getenv("TRAFFIC_CAPTURE_BACKUPS", "5"))
+        self.flush_interval = flush_interval or float(os.getenv("TRAFFIC_CAPTURE_FLUSH_INTERVAL", "1.0"))
+        self._buffer: List[str] = []
+        # Guards only the buffer; file I/O happens outside it under _write_lock
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+
+    def record(self, body: Dict[str, Any], headers: Mapping[str, str], request_id: str) -> None:
+        """Buffer one request; cheap enough to call on the request path.
+
+        Args:
+            body: The parsed TweetRequest body
+            headers: Request headers (only the deadline header is kept)
+            request_id: The id assigned to the request
+        """
+        if not self.enabled:
+            return
+        entry = {"ts": time.time(), "request_id": request_id, "body": body}
+        if headers.get(DEADLINE_HEADER):
+            entry["headers"] = {DEADLINE_HEADER: headers[DEADLINE_HEADER]}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            self._buffer.append(line)
+            should_flush = len(self._buffer) >= _MAX_BUFFERED_LINES
+        self._ensure_flusher()
+        if should_flush:
+            # The flusher thread writes; the request never touches the disk
+            self._wake.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stopped.clear()
+                self._flusher = threading.Thread(target=self._flush_loop, name="traffic-capture-flusher", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Append everything buffered so far to the capture file."""
+        with self._write_lock:
+            # Swap the buffer under the lock so record() only ever waits for the swap
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            data = "".join(lines).encode("utf-8")
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "ab") as f:
+                    f.write(data)
+                captured_requests.labels("written").inc(len(lines))
+            except OSError as e:
+                logger.error(f"Traffic capture write failed, {len(lines)} requests lost: {str(e)}")
+                captured_requests.labels("failed").inc(len(lines))
+
+    def _rotate(self) -> None:
+        """Shift requests.jsonl -> .1 -> .2 ..., dropping the oldest backup."""
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self) -> None:
+        """Stop the background flusher and write out the buffer."""
+        self._stopped.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(self.flush_interval + 1.0)
+        self.flush()
+
+# One capture per process, shared by every request
+traffic_capture = TrafficCapture()
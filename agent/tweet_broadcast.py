@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Tweet Broadcast - Push every generated tweet to live dashboard subscribers
+
+``GET /v1/tweets/stream`` is a Server-Sent Events stream (plain HTTP, works with
+the browser ``EventSource``, no extra dependency) of every tweet generated through
+``/v1/tweets`` or the live feed. ``publish`` serializes each message once into an
+SSE frame, then hands the same bytes to every subscriber's bounded queue with
+``put_nowait``. The generation path therefore never waits for a subscriber. A
+subscriber whose queue is full has fallen ``BROADCAST_BUFFER`` messages behind.
+It is dropped: its queue is emptied, it gets a final ``dropped`` event and its
+stream ends, so one stalled dashboard costs neither memory nor the other
+subscribers' latency. A client that reconnects with ``Last-Event-ID`` first
+receives the messages it missed that are still among the last ``BROADCAST_REPLAY``.
+
+    BROADCAST_BUFFER            messages buffered per subscriber before it is dropped (default 256)
+    BROADCAST_MAX_SUBSCRIBERS   concurrent subscribers (default 10000)
+    BROADCAST_HEARTBEAT         seconds between keep-alive comments on an idle stream (default 15)
+    BROADCAST_REPLAY            recent messages kept for reconnecting clients (default 100)
+"""
+
+import os
+import json
+import time
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from metrics import registry
+
+broadcast_subscribers = registry.gauge(
+    "agent_broadcast_subscribers",
+    "Clients connected to the tweet stream",
+    [],
+)
+broadcast_messages = registry.counter(
+    "agent_broadcast_messages",
+    "Messages published to the tweet stream",
+    [],
+)
+broadcast_dropped = registry.counter(
+    "agent_broadcast_dropped_subscribers",
+    "Subscribers disconnected because they fell a full buffer behind",
+    [],
+)
+
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+def _frame(event_id: int, event: str, data: Dict[str, Any]) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+class SubscriberLimit(Exception):
+    """Raised when the stream already has the maximum number of subscribers."""
+
+class Subscriber:
+    """One connected client: a bounded queue of pre-serialized frames."""
+
+    def __init__(self, buffer: int, replay: Optional[List[bytes]] = None):
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=buffer)
+        # Missed messages, taken when the queue starts receiving so none arrives twice
+        self.replay = replay or []
+        self.dropped = False
+        self.connected_at = time.time()
+
+class TweetBroadcaster:
+    """Fans published tweets out to every subscriber without blocking the publisher."""
+
+    def __init__(
+        self,
+        buffer: Optional[int] = None,
+        max_subscribers: Optional[int] = None,
+        heartbeat: Optional[float] = None,
+        replay: Optional[int] = None,
+    ):
+        """Initialize the broadcaster; unset arguments fall back to the BROADCAST_* variables."""
+        self.buffer = buffer or int(os.getenv("BROADCAST_BUFFER", "256"))
+        self.max_subscribers = max_subscribers or int(os.getenv("BROADCAST_MAX_SUBSCRIBERS", "10000"))
+        self.heartbeat = heartbeat or float(os.getenv("BROADCAST_HEARTBEAT", "15"))
+        self.subscribers: Set[Subscriber] = set()
+        self.recent: Deque[Tuple[int, bytes]] = deque(maxlen=replay or int(os.getenv("BROADCAST_REPLAY", "100")))
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        """Send a tweet event to every subscriber; never blocks.
+
+        Args:
+            event: JSON-serializable tweet event
+
+        Returns:
+            Number of subscribers the event was queued for
+        """
+        event_id = next(self._ids)
+        frame = _frame(event_id, "tweet", event)
+        self.recent.append((event_id, frame))
+        self.published += 1
+        broadcast_messages.inc()
+
+        delivered = 0
+        slow = []
+        for subscriber in self.subscribers:
+            try:
+                subscriber.queue.put_nowait(frame)
+                delivered += 1
+            except asyncio.QueueFull:
+                slow.append(subscriber)
+        for subscriber in slow:
+            self._drop(subscriber, event_id)
+        return delivered
+
+    def _drop(self, subscriber: Subscriber, event_id: int) -> None:
+        # Free the backlog at once and leave room for the goodbye frame
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(_frame(event_id, "dropped", {"reason": "too slow", "buffer": self.buffer}))
+        subscriber.dropped = True
+        self.subscribers.discard(subscriber)
+        self.dropped += 1
+        broadcast_dropped.inc()
+        broadcast_subscribers.set(len(self.subscribers))
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscriber:
+        """Register a new subscriber.
+
+        Args:
+            last_event_id: Last-Event-ID of a reconnecting client; the recent messages
+                after it are replayed before the live ones
+
+        Raises:
+            SubscriberLimit: if BROADCAST_MAX_SUBSCRIBERS are already connected
+        """
+        if len(self.subscribers) >= self.max_subscribers:
+            raise SubscriberLimit(f"The tweet stream already has {self.max_subscribers} subscribers")
+        replay = []
+        if last_event_id and last_event_id.isdigit():
+            replay = [frame for event_id, frame in self.recent if event_id > int(last_event_id)]
+        subscriber = Subscriber(self.buffer, replay)
+        self.subscribers.add(subscriber)
+        broadcast_subscribers.set(len(self.subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+        broadcast_subscribers.set(len(self.subscribers))
+
+    async def stream(self, subscriber: Subscriber) -> AsyncIterator[bytes]:
+        """SSE frames for one subscriber until it disconnects or is dropped."""
+        try:
+            if subscriber.replay:
+                yield b"".join(subscriber.replay)
+                subscriber.replay = []
+            while True:
+                try:
+                    async with asyncio.timeout(self.heartbeat):
+                        frame = await subscriber.queue.get()
+                except TimeoutError:
+                    yield HEARTBEAT_FRAME
+                    continue
+                # A subscriber that is behind gets its whole backlog in one write
+                frames = [frame]
+                while not subscriber.queue.empty():
+                    frames.append(subscriber.queue.get_nowait())
+                yield b"".join(frames) if len(frames) > 1 else frame
+                # Dropped while this write was pending: the goodbye frame is still queued
+                if subscriber.dropped and subscriber.queue.empty():
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+    def status(self) -> Dict[str, Any]:
+        """Subscriber and message counts."""
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self.max_subscribers,
+            "buffer": self.buffer,
+            "published": self.published,
+            "dropped_subscribers": self.dropped,
+        }
+
+# One broadcaster per process; every worker streams the tweets it generated itself
+tweet_broadcaster = TweetBroadcaster()
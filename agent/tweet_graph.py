@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+Tweet Graph - Deterministic LangGraph pipeline for tweet generation
+
+Our flow is always "fetch the prompt, write the tweet", so instead of a ReAct agent
+that spends a model turn deciding to call the prompt tool, the pipeline is an
+explicit StateGraph:
+
+    fetch_prompt -> write_tweet -> [validate_tweet -> write_tweet ...] -> END
+
+``fetch_prompt`` never calls the model: it renders the locally cached template or
+calls the MCP prompt tool directly, and renders the bundled template copy when the
+MCP server is unavailable. The graph is compiled once per process; the
+per-agent dependencies (chat model, MCP client manager) are passed in through the
+``configurable`` section of the run config.
+"""
+
+import json
+import time
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
+
+from circuit_breaker import CircuitOpen, circuit_breakers
+from deadline import Deadline, DeadlineExceeded, run_within
+from hedging import hedge_policy
+from model_router import model_router
+from prompts.ipl_tweet_agent_prompt import IPLTweetAgentPrompts
+from template_cache import (
+    TWEET_TYPE_TEMPLATES, add_request_bytes, count_request_bytes, prompt_mcp_bytes, template_cache
+)
+from tweet_scoring import rank_tweets, repair_tweet, score_tweet
+
+logger = logging.getLogger(__name__)
+
+# Tweet type -> MCP tool that renders the prompt server side
+TWEET_TYPE_TOOLS: Dict[str, str] = {
+    "standard": "get_rohit_sharma_boundary_viral_tweet_prompt",
+    "one_liner": "get_rohit_sharma_boundary_one_liner_tweet_prompt",
+}
+
+class TweetState(TypedDict, total=False):
+    """State carried through the tweet pipeline."""
+    cricket_moment: str
+    tweet_type: str
+    prompt: str
+    messages: List[BaseMessage]
+    tweet: str
+    candidates: int
+    ranked_tweets: List[Dict[str, Any]]
+    validation_errors: List[str]
+    attempts: int
+    timings: Dict[str, float]
+    model: str
+
+@dataclass
+class TweetPipelineDeps:
+    """Per-agent dependencies handed to the graph nodes at run time."""
+    llm: Any
+    mcp_client_manager: Any
+    system_prompt: str
+    validate: bool = False
+    max_attempts: int = 2
+    deadline: Optional[Deadline] = None
+
+def _deps(config: RunnableConfig) -> TweetPipelineDeps:
+    """Pull the pipeline dependencies out of the run config."""
+    return config["configurable"]["pipeline"]
+
+async def _fetch_prompt_from_tool(deps: TweetPipelineDeps, tweet_type: str, cricket_moment: str) -> str:
+    """Render the prompt server side by calling the MCP prompt tool directly."""
+    tool_name = TWEET_TYPE_TOOLS[tweet_type]
+    tool = next((tool for tool in deps.mcp_client_manager.get_tools() if tool.name == tool_name), None)
+    if tool is None:
+        raise RuntimeError(f"MCP tool {tool_name} is not available")
+
+    output = await circuit_breakers.get("mcp").call(
+        lambda: tool.ainvoke({"request": {"content_dump": cricket_moment}})
+    )
+    add_request_bytes(len((output if isinstance(output, str) else json.dumps(output)).encode("utf-8")))
+    response = json.loads(output) if isinstance(output, str) else output
+    if response.get("error"):
+        raise RuntimeError(response["error"])
+
+    # The server reports the template revision it rendered; refresh our copy if it moved on
+    template_cache.invalidate(TWEET_TYPE_TEMPLATES[tweet_type], response.get("template_version"))
+    return response["prompt"]
+
+async def _prompt_and_source(deps: TweetPipelineDeps, tweet_type: str, cricket_moment: str) -> Tuple[str, str]:
+    """Render the cached template, falling back to the MCP prompt tool, then to the bundled copy."""
+    if await template_cache.ensure_fresh(deps.mcp_client_manager):
+        prompt = template_cache.render(tweet_type, cricket_moment)
+        if prompt is not None:
+            return prompt, "cache"
+    if not deps.mcp_client_manager.is_connected():
+        # Setup already reported the outage
+        prompt = template_cache.render_bundled(tweet_type, cricket_moment)
+        if prompt is not None:
+            return prompt, "bundled"
+    try:
+        return await _fetch_prompt_from_tool(deps, tweet_type, cricket_moment), "tool"
+    except Exception as e:
+        prompt = template_cache.render_bundled(tweet_type, cricket_moment)
+        if prompt is None:
+            raise
+        logger.warning(f"Prompt tool unavailable ({str(e)}); using the bundled {tweet_type} template")
+        return prompt, "bundled"
+
+async def _obtain_prompt(deps: TweetPipelineDeps, tweet_type: str, cricket_moment: str) -> str:
+    """The prompt for the moment; records the MCP bytes read to get it."""
+    with count_request_bytes() as fetched:
+        prompt, source = await _prompt_and_source(deps, tweet_type, cricket_moment)
+    prompt_mcp_bytes.labels(source).observe(fetched[0])
+    return prompt
+
+async def fetch_prompt(state: TweetState, config: RunnableConfig) -> Dict[str, Any]:
+    """Node: obtain the structured viral tweet prompt without a model call."""
+    deps = _deps(config)
+    tweet_type = state["tweet_type"]
+    started = time.monotonic()
+    prompt = await run_within(
+        deps.deadline, _obtain_prompt(deps, tweet_type, state["cricket_moment"]), "prompt_fetch"
+    )
+
+    if tweet_type == "one_liner":
+        tweet_request = IPLTweetAgentPrompts.get_one_liner_tweet_generation_template()
+    else:
+        tweet_request = IPLTweetAgentPrompts.get_tweet_generation_template()
+
+    return {
+        "prompt": prompt,
+        "messages": [
+            SystemMessage(content=deps.system_prompt),
+            HumanMessage(content=prompt),
+            HumanMessage(content=tweet_request),
+        ],
+        "attempts": 0,
+        "timings": {"prompt_fetch": time.monotonic() - started},
+    }
+
+async def _complete(deps: TweetPipelineDeps, messages: List[BaseMessage], n: int) -> List[BaseMessage]:
+    """One model call returning `n` completions for the same conversation."""
+    if n <= 1:
+        return [await deps.llm.ainvoke(messages)]
+    result = await deps.llm.agenerate([messages], n=n)
+    return [generation.message for generation in result.generations[0]]
+
+async def write_tweet(state: TweetState, config: RunnableConfig) -> Dict[str, Any]:
+    """Node: a single (possibly hedged) model call that writes the tweet.
+    
+    With ``candidates > 1`` the same call asks for that many completions. Every
+    completion is scored, repaired and ranked locally (see tweet_scoring); the best
+    one becomes the tweet.
+    """
+    deps = _deps(config)
+    messages = list(state["messages"])
+    if state.get("validation_errors"):
+        messages.append(HumanMessage(content=(
+            "The tweet above breaks these rules: "
+            + "; ".join(state["validation_errors"])
+            + ". Rewrite it so it follows every rule. Just provide the final tweet without any explanation."
+        )))
+
+    # Hedged against slow completions when LLM_HEDGING is enabled; fails fast while
+    # the model's circuit is open
+    model = getattr(deps.llm, "model_name", "unknown")
+    started = time.monotonic()
+    try:
+        completions = await run_within(
+            deps.deadline,
+            circuit_breakers.model(model).call(
+                lambda: hedge_policy.call(model, lambda: _complete(deps, messages, state.get("candidates", 1)))
+            ),
+            "write",
+        )
+    except (CircuitOpen, DeadlineExceeded):
+        # Not the model's fault: a client's short deadline must not mark it degraded
+        raise
+    except Exception:
+        model_router.observe(model, time.monotonic() - started, ok=False)
+        raise
+    elapsed = time.monotonic() - started
+    model_router.observe(model, elapsed, ok=True, usage=getattr(completions[0], "usage_metadata", None))
+    timings = dict(state.get("timings") or {})
+    timings["write"] = timings.get("write", 0.0) + elapsed
+
+    ranked = rank_tweets([str(message.content) for message in completions], state["tweet_type"])
+    if not ranked:
+        return {
+            "messages": messages + completions[:1],
+            "tweet": "",
+            "ranked_tweets": [],
+            "attempts": state.get("attempts", 0) + 1,
+            "validation_errors": ["the tweet is empty"],
+            "timings": timings,
+            "model": model,
+        }
+
+    best = ranked[0]
+    if best.repaired:
+        # Repaired locally: the conversation should carry the text we actually ship
+        message = AIMessage(content=best.content)
+    else:
+        message = next(message for message in completions if str(message.content).strip() == best.content)
+    return {
+        "messages": messages + [message],
+        "tweet": best.content,
+        "ranked_tweets": [candidate.as_dict() for candidate in ranked],
+        "attempts": state.get("attempts", 0) + 1,
+        "validation_errors": [],
+        "timings": timings,
+        "model": model,
+    }
+
+async def validate_tweet(state: TweetState, config: RunnableConfig) -> Dict[str, Any]:
+    """Node: check the tweet against the template rules without a model call.
+
+    Rules that can be fixed mechanically (length, surplus hashtags or emojis) are
+    repaired in place; only what is left goes back to the model for a rewrite.
+    """
+    tweet_type = state["tweet_type"]
+    score = score_tweet(state.get("tweet", ""), tweet_type)
+    if score.valid:
+        return {"validation_errors": []}
+
+    repaired = score_tweet(repair_tweet(score.content, tweet_type), tweet_type, repaired=True)
+    if len(repaired.errors) < len(score.errors):
+        messages = list(state["messages"])
+        messages[-1] = AIMessage(content=repaired.content)
+        ranked = list(state.get("ranked_tweets") or [])
+        if ranked:
+            ranked[0] = repaired.as_dict()
+        return {
+            "tweet": repaired.content,
+            "messages": messages,
+            "ranked_tweets": ranked,
+            "validation_errors": repaired.errors,
+        }
+    return {"validation_errors": score.errors}
+
+def _after_write(state: TweetState, config: RunnableConfig) -> str:
+    return "validate_tweet" if _deps(config).validate else END
+
+def _after_validate(state: TweetState, config: RunnableConfig) -> str:
+    if state.get("validation_errors") and state.get("attempts", 0) < _deps(config).max_attempts:
+        return "write_tweet"
+    return END
+
+@lru_cache(maxsize=1)
+def get_tweet_graph():
+    """Build and compile the tweet pipeline (once per process)."""
+    graph = StateGraph(TweetState)
+    graph.add_node("fetch_prompt", fetch_prompt)
+    graph.add_node("write_tweet", write_tweet)
+    graph.add_node("validate_tweet", validate_tweet)
+
+    graph.add_edge(START, "fetch_prompt")
+    graph.add_edge("fetch_prompt", "write_tweet")
+    graph.add_conditional_edges("write_tweet", _after_write, ["validate_tweet", END])
+    graph.add_conditional_edges("validate_tweet", _after_validate, ["write_tweet", END])
+    return graph.compile()
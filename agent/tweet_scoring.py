@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+"""
+Tweet Scoring - Local length checks, rule validation, repair and ranking
+
+Everything here runs in-process without a model call, so over-length or
+off-template tweets are repaired or ranked out locally instead of costing another
+LLM round.
+
+Length follows X/Twitter's weighted counting (twitter-text v3): code points in the
+Latin, Devanagari and common punctuation ranges weigh 1, everything else (CJK, most
+symbols) weighs 2, every emoji sequence weighs 2 however many code points it has,
+and every URL counts as 23 characters (t.co shortening). The limit is 280.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Sequence
+
+MAX_WEIGHTED_LENGTH = 280
+URL_WEIGHTED_LENGTH = 23
+
+# Code point ranges that weigh 1 (twitter-text v3 configuration); everything else weighs 2
+_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))
+
+_URL_RE = re.compile(r"(?:https?://|www\.)[^\s]+", re.IGNORECASE)
+_HASHTAG_RE = re.compile(r"(?<![\w&])#\w+", re.UNICODE)
+
+# One emoji "sequence": a pictograph (or keycap / flag pair) plus any variation
+# selectors, skin tone modifiers and zero-width-joined continuations
+_EMOJI_BASE = "[\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF\u3030\u303D\u3297\u3299]"
+_EMOJI_MODIFIERS = "[\uFE0E\uFE0F\U0001F3FB-\U0001F3FF]*"
+_EMOJI_RE = re.compile(
+    "(?:[\U0001F1E6-\U0001F1FF]{2}"
+    "|[0-9#*]\uFE0F?\u20E3"
+    f"|{_EMOJI_BASE}{_EMOJI_MODIFIERS}(?:\u200D{_EMOJI_BASE}{_EMOJI_MODIFIERS})*)"
+)
+
+@dataclass
+class TweetScore:
+    """Features, rule violations and ranking score of one tweet."""
+    content: str
+    weighted_length: int
+    hashtags: int
+    emojis: int
+    urls: int
+    words: int
+    errors: List[str] = field(default_factory=list)
+    score: float = 0.0
+    repaired: bool = False
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> dict:
+        return {
+            "content": self.content,
+            "score": self.score,
+            "errors": list(self.errors),
+            "weighted_length": self.weighted_length,
+            "repaired": self.repaired,
+        }
+
+def _char_weight(code_point: int) -> int:
+    for start, end in _LIGHT_RANGES:
+        if start <= code_point <= end:
+            return 1
+    return 2
+
+def weighted_length(text: str) -> int:
+    """X/Twitter weighted length of a tweet."""
+    length = 0
+    position = 0
+    for match in _URL_RE.finditer(text):
+        length += _plain_weighted_length(text[position:match.start()]) + URL_WEIGHTED_LENGTH
+        position = match.end()
+    return length + _plain_weighted_length(text[position:])
+
+def _plain_weighted_length(text: str) -> int:
+    length = 0
+    position = 0
+    for match in _EMOJI_RE.finditer(text):
+        length += sum(_char_weight(ord(ch)) for ch in text[position:match.start()]) + 2
+        position = match.end()
+    return length + sum(_char_weight(ord(ch)) for ch in text[position:])
+
+def _count_words(text: str) -> int:
+    """Words that carry meaning: no hashtags, mentions, URLs or emoji-only tokens."""
+    stripped = _EMOJI_RE.sub(" ", _URL_RE.sub(" ", text))
+    return sum(
+        1 for token in stripped.split()
+        if not token.startswith(("#", "@")) and any(ch.isalnum() for ch in token)
+    )
+
+def _caps_ratio(text: str) -> float:
+    """Share of upper-case letters among cased letters (1.0 when there are none)."""
+    letters = [ch for ch in _HASHTAG_RE.sub("", text) if ch.isalpha() and ch.lower() != ch.upper()]
+    if not letters:
+        return 1.0
+    return sum(1 for ch in letters if ch.isupper()) / len(letters)
+
+def _rule_errors(score: TweetScore, tweet_type: str) -> List[str]:
+    """Template rules the tweet breaks, hard limits first."""
+    errors = []
+    if not score.content:
+        return ["the tweet is empty"]
+    if score.weighted_length > MAX_WEIGHTED_LENGTH:
+        errors.append(f"it is {score.weighted_length} weighted characters long, the limit is {MAX_WEIGHTED_LENGTH}")
+    if tweet_type == "one_liner":
+        if score.words > 8:
+            errors.append(f"it has {score.words} words, a one-liner may have at most 8")
+        if score.emojis > 2:
+            errors.append(f"it has {score.emojis} emojis, a one-liner may have at most 2")
+        if score.hashtags != 1:
+            errors.append(f"it has {score.hashtags} hashtags, a one-liner needs exactly one")
+        if _caps_ratio(score.content) < 0.6:
+            errors.append("a one-liner should be written in ALL CAPS")
+    else:
+        if score.hashtags == 0:
+            errors.append("it has no hashtags")
+        if score.emojis == 0:
+            errors.append("it has no emojis")
+    return errors
+
+def _rank_score(score: TweetScore, tweet_type: str) -> float:
+    """Higher is better: rule violations dominate, then stylistic fit."""
+    value = 1.0 - 0.5 * len(score.errors)
+    if score.weighted_length > MAX_WEIGHTED_LENGTH:
+        value -= 1.0
+    if tweet_type == "one_liner":
+        value += 0.1 if 6 <= score.words <= 8 else 0.0
+    else:
+        value += 0.05 * min(score.hashtags, 3) + 0.05 * min(score.emojis, 3)
+        # Prefer tweets that use the room but leave a little slack for quote-tweets
+        value -= abs(score.weighted_length - 220) / 2000.0
+    if score.repaired:
+        value -= 0.05
+    return round(value, 4)
+
+def score_tweet(tweet: str, tweet_type: str, repaired: bool = False) -> TweetScore:
+    """Compute features, rule violations and the ranking score of one tweet."""
+    tweet = tweet.strip()
+    score = TweetScore(
+        content=tweet,
+        weighted_length=weighted_length(tweet),
+        hashtags=len(_HASHTAG_RE.findall(tweet)),
+        emojis=len(_EMOJI_RE.findall(tweet)),
+        urls=len(_URL_RE.findall(tweet)),
+        words=_count_words(tweet),
+        repaired=repaired,
+    )
+    score.errors = _rule_errors(score, tweet_type)
+    score.score = _rank_score(score, tweet_type)
+    return score
+
+def score_batch(tweets: Sequence[str], tweet_type: str) -> List[TweetScore]:
+    """Score many tweets (candidates, backfills, stored drafts), each on its own."""
+    return [score_tweet(tweet, tweet_type) for tweet in tweets]
+
+def _drop_matches(text: str, matches: Iterable[re.Match]) -> str:
+    """The text without the matched spans (removed by position, not by value)."""
+    kept = []
+    position = 0
+    for match in matches:
+        kept.append(text[position:match.start()])
+        position = match.end()
+    kept.append(text[position:])
+    return "".join(kept)
+
+def repair_tweet(tweet: str, tweet_type: str) -> str:
+    """Mechanically fix the rules that can be fixed without rewriting the tweet.
+
+    Drops surplus hashtags and emojis, and as a last resort trims whole words from
+    the end of the text (keeping the first hashtag) until it fits in 280 weighted
+    characters. Nothing is added: a missing hashtag or emoji stays a rule
+    violation, so the candidate is ranked down.
+    """
+    text = tweet.strip()
+
+    max_hashtags = 1 if tweet_type == "one_liner" else 3
+    text = _drop_matches(text, list(_HASHTAG_RE.finditer(text))[max_hashtags:])
+
+    if tweet_type == "one_liner":
+        text = _drop_matches(text, list(_EMOJI_RE.finditer(text))[2:])
+
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text).strip()
+
+    if weighted_length(text) > MAX_WEIGHTED_LENGTH:
+        first = _HASHTAG_RE.search(text)
+        body = re.sub(r"[ \t]+", " ", _drop_matches(text, [first])).strip() if first else text
+        suffix = f" {first.group()}" if first else ""
+        words = body.split(" ")
+        while words and weighted_length(" ".join(words) + "…" + suffix) > MAX_WEIGHTED_LENGTH:
+            words.pop()
+        text = " ".join(words).rstrip(" ,;:-") + "…" + suffix
+
+    return text
+
+def rank_tweets(tweets: Iterable[str], tweet_type: str) -> List[TweetScore]:
+    """Score, repair where possible and order candidate tweets best first.
+
+    Duplicate candidates are dropped. A candidate that breaks a rule is replaced by
+    its repaired version when the repair fixes more than it costs.
+    """
+    unique = list(dict.fromkeys(tweet.strip() for tweet in tweets if tweet and tweet.strip()))
+    ranked = []
+    for score in score_batch(unique, tweet_type):
+        if not score.valid:
+            repaired = score_tweet(repair_tweet(score.content, tweet_type), tweet_type, repaired=True)
+            if repaired.score > score.score:
+                score = repaired
+        ranked.append(score)
+    ranked.sort(key=lambda candidate: candidate.score, reverse=True)
+    return ranked
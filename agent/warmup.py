@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Warm-up - Get a new replica ready to serve, and say when it is
+
+The API starts listening as soon as it has imported, and ``/health`` only says the
+process is alive. Right after startup, the warm-up does what the first request
+would otherwise do, in the background:
+
+    mcp         connect to the tweet MCP server and list its tools
+    templates   load the prompt templates into the process-wide template cache
+    graph       compile the tweet pipeline (or import the ReAct agent)
+    model:<m>   send a one-token ping to every model requests may be routed to;
+                this imports the model client and opens a pooled connection
+
+An MCP session belongs to the task that opened it, so requests cannot share the
+warm-up's: it is closed once the steps are done. What carries over is the check
+that the server is reachable, the imported client code and the cached templates.
+
+``/ready`` returns 200 once every required step has succeeded and while no
+required dependency's circuit breaker is open, and 503 with each step's and
+dependency's state otherwise. Load balancers and the gateway should route on
+``/ready``. Only the default model (``MODEL_NAME``) is required: routed and
+fallback models are pinged and reported, but a problem with one of them only
+affects the requests that go to it. The
+graph pipeline can serve from the bundled templates, so for it ``mcp`` and
+``templates`` are reported but not required either; the ReAct agent needs the
+MCP server, so for it an open ``mcp`` breaker makes the replica unready too.
+Failed required steps are retried every ``WARMUP_RETRY_SECONDS``, so a replica
+that started while its model provider was down becomes ready once the provider
+is back.
+
+    WARMUP_ENABLED          "false" to report ready immediately (default true)
+    WARMUP_MODEL_PING       "false" to skip the model pings (default true)
+    WARMUP_STEP_TIMEOUT     seconds each step may take (default 15)
+    WARMUP_RETRY_SECONDS    seconds between attempts at failed required steps (default 5)
+"""
+
+import os
+import time
+import asyncio
+import logging
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from agent import IPLTweetAgent
+from circuit_breaker import circuit_breakers
+from mcp_client import MCPClientManager
+from model_router import model_router
+from template_cache import template_cache
+from tweet_graph import get_tweet_graph
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+agent_ready = registry.gauge(
+    "agent_ready",
+    "1 while the replica is ready: warm-up done and no required dependency's circuit open",
+    [],
+)
+warmup_step_seconds = registry.gauge(
+    "agent_warmup_step_seconds",
+    "Duration of the last attempt at each warm-up step",
+    ["step"],
+)
+
+@dataclass
+class WarmupStep:
+    """One warm-up step and the outcome of its last attempt."""
+
+    name: str
+    run: Callable[[], Awaitable[Dict[str, Any]]]
+    required: bool
+    state: str = "pending"
+    attempts: int = 0
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "attempts": self.attempts,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "error": self.error,
+            **self.detail,
+        }
+
+class Warmup:
+    """Startup warm-up steps and the readiness they add up to."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        model_ping: Optional[bool] = None,
+        step_timeout: Optional[float] = None,
+        retry_seconds: Optional[float] = None,
+    ):
+        """Initialize the warm-up; unset arguments fall back to the WARMUP_* variables."""
+        self.enabled = enabled if enabled is not None else os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+        self.model_ping = model_ping if model_ping is not None else os.getenv("WARMUP_MODEL_PING", "true").lower() == "true"
+        self.step_timeout = step_timeout or float(os.getenv("WARMUP_STEP_TIMEOUT", "15"))
+        self.retry_seconds = retry_seconds or float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+        self.pipeline = os.getenv("AGENT_PIPELINE", "graph")
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.steps: List[WarmupStep] = []
+        self._mcp_client_manager = None
+
+    def _dependencies(self) -> List[str]:
+        """Circuit breakers that take the replica out of rotation while open."""
+        dependencies = [f"model:{model_router.default_model}"]
+        if self.pipeline == "react":
+            dependencies.append("mcp")
+        return dependencies
+
+    def unavailable(self) -> List[str]:
+        """Required dependencies whose circuit breaker rejects calls right now."""
+        return [dependency for dependency in self._dependencies() if not circuit_breakers.get(dependency).available()]
+
+    @property
+    def ready(self) -> bool:
+        ready = self.ready_at is not None and not self.unavailable()
+        agent_ready.set(1 if ready else 0)
+        return ready
+
+    def _build_steps(self) -> List[WarmupStep]:
+        steps = [
+            WarmupStep("mcp", self._connect_mcp, required=self.pipeline == "react"),
+            WarmupStep("templates", self._load_templates, required=self.pipeline == "react"),
+            WarmupStep("graph", self._compile_graph, required=True),
+        ]
+        if self.model_ping:
+            for model in model_router.models():
+                steps.append(WarmupStep(
+                    f"model:{model}", lambda model=model: self._ping_model(model),
+                    required=model == model_router.default_model,
+                ))
+        return steps
+
+    async def _connect_mcp(self) -> Dict[str, Any]:
+        if self._mcp_client_manager is not None:
+            await self._mcp_client_manager.close()
+            self._mcp_client_manager = None
+        manager = MCPClientManager()
+        await manager.setup()
+        self._mcp_client_manager = manager
+        return {"tools": len(manager.get_tools())}
+
+    async def _load_templates(self) -> Dict[str, Any]:
+        if self._mcp_client_manager is None or not self._mcp_client_manager.is_connected():
+            raise RuntimeError("MCP server is not connected")
+        if not await template_cache.ensure_fresh(self._mcp_client_manager, force=True):
+            raise RuntimeError("MCP server published no prompt templates")
+        return {"versions": template_cache.versions()}
+
+    async def _compile_graph(self) -> Dict[str, Any]:
+        if self.pipeline == "react":
+            # Compiled per agent with its MCP tools; importing is the part worth doing early
+            importlib.import_module("langgraph.prebuilt")
+        else:
+            get_tweet_graph()
+        return {"pipeline": self.pipeline}
+
+    async def _ping_model(self, model: str) -> Dict[str, Any]:
+        llm = IPLTweetAgent(model_name=model).get_llm(model)
+        await llm.ainvoke([HumanMessage(content="ping")], max_tokens=1)
+        return {}
+
+    async def _attempt(self, step: WarmupStep) -> None:
+        step.attempts += 1
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self.step_timeout):
+                step.detail = await step.run()
+            step.state, step.error = "ok", None
+        except Exception as e:
+            step.state, step.error = "failed", str(e) or type(e).__name__
+        step.seconds = time.monotonic() - started
+        warmup_step_seconds.labels(step.name).set(step.seconds)
+        if step.state == "ok":
+            logger.info(f"Warm-up step {step.name} done in {step.seconds:.2f}s", extra={"step": step.name})
+        else:
+            logger.warning(
+                f"Warm-up step {step.name} failed after {step.seconds:.2f}s: {step.error}", extra={"step": step.name}
+            )
+
+    async def run(self) -> None:
+        """Run every step, then retry failed required ones until all have succeeded."""
+        self.started_at = time.monotonic()
+        if not self.enabled:
+            self._mark_ready()
+            return
+        self.steps = self._build_steps()
+        try:
+            pending = self.steps
+            while True:
+                for step in pending:
+                    await self._attempt(step)
+                pending = [step for step in self.steps if step.required and step.state != "ok"]
+                if not pending:
+                    break
+                await asyncio.sleep(self.retry_seconds)
+            self._mark_ready()
+        finally:
+            # Requests cannot use this session (it is bound to this task) and open
+            # their own; close it here, in the task that opened it
+            if self._mcp_client_manager is not None:
+                try:
+                    await self._mcp_client_manager.close()
+                except Exception as e:
+                    logger.warning(f"Could not close the warm-up MCP session: {str(e)}")
+                self._mcp_client_manager = None
+
+    def _mark_ready(self) -> None:
+        self.ready_at = time.monotonic()
+        logger.info(f"Agent warmed up {self.ready_at - self.started_at:.2f}s after startup")
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness, the required dependencies' breakers and the state of every warm-up step."""
+        return {
+            "ready": self.ready,
+            "warmed_up": self.ready_at is not None,
+            "pipeline": self.pipeline,
+            "seconds_to_ready": round(self.ready_at - self.started_at, 3) if self.ready_at is not None else None,
+            "unavailable": self.unavailable(),
+            "dependencies": {dependency: circuit_breakers.get(dependency).state for dependency in self._dependencies()},
+            "steps": {step.name: step.status() for step in self.steps},
+        }
+
+# One warm-up per process, started by the app's lifespan
+warmup = Warmup()
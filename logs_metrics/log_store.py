@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+"""
+Log Store - Rotating on-disk segments for log events, indexed by request and time
+
+Events posted to ``/logs`` are appended as JSON lines to segment files under
+``LOG_STORE_DIR``. ``record`` only enqueues the event; a background writer thread
+appends queued events in batches and starts a new segment once the current one is
+larger than ``LOG_STORE_SEGMENT_BYTES`` or older than ``LOG_STORE_SEGMENT_SECONDS``.
+If the queue is full the event is dropped and counted rather than slowing requests.
+
+Every segment has a small index, kept in memory and written next to the segment as
+``<segment>.idx`` when it is sealed: its first/last timestamps, the byte offsets of
+each request id's events, and the offset of every ``LOG_STORE_INDEX_STRIDE``-th
+event. A query by request id seeks straight to those events; a query by time range
+skips segments outside the range and seeks to the first event in it. Segments
+without an index (the active one after a crash) are re-indexed on startup.
+
+    LOG_STORE_DIR               segment directory (default ./logs, mounted at /app/logs)
+    LOG_STORE_SEGMENT_BYTES     rotate after this many bytes (default 67108864)
+    LOG_STORE_SEGMENT_SECONDS   rotate after this many seconds (default 3600)
+    LOG_STORE_MAX_SEGMENTS      segments kept before the oldest is deleted (default 168)
+    LOG_STORE_BATCH_SIZE        max events per write (default 500)
+    LOG_STORE_FLUSH_INTERVAL    max seconds a queued event waits before it is written (default 1.0)
+    LOG_STORE_QUEUE_SIZE        max queued events before new ones are dropped (default 50000)
+    LOG_STORE_INDEX_STRIDE      events between time index entries (default 64)
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import bisect
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^logs-\d{8}T\d{6}-(\d{6})\.jsonl$")
+
+# Queued to tell the writer thread to flush and exit
+_STOP = object()
+
+class _Segment:
+    """One segment file and its index."""
+
+    def __init__(self, path: str, created_at: float):
+        self.path = path
+        self.created_at = created_at
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.count = 0
+        self.size = 0
+        self.sealed = False
+        # (ts, offset) of every stride-th event, in write order
+        self.sparse: List[Tuple[float, int]] = []
+        self.request_ids: Dict[str, List[int]] = {}
+
+    def add(self, ts: float, request_id: Optional[str], offset: int, length: int, stride: int) -> None:
+        if self.count % stride == 0:
+            self.sparse.append((ts, offset))
+        if request_id:
+            self.request_ids.setdefault(request_id, []).append(offset)
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        self.count += 1
+        self.size = offset + length
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        if self.count == 0:
+            return False
+        return (start is None or self.last_ts >= start) and (end is None or self.first_ts <= end)
+
+    def start_offset(self, start: Optional[float]) -> int:
+        """Offset of the last indexed event before `start`; scanning from it finds the first match."""
+        if start is None or not self.sparse:
+            return 0
+        position = bisect.bisect_left(self.sparse, (start, -1)) - 1
+        return self.sparse[position][1] if position >= 0 else 0
+
+    def to_index(self) -> Dict[str, Any]:
+        return {
+            "created_at": self.created_at,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "count": self.count,
+            "size": self.size,
+            "sparse": self.sparse,
+            "request_ids": self.request_ids,
+        }
+
+    @classmethod
+    def from_index(cls, path: str, index: Dict[str, Any]) -> "_Segment":
+        segment = cls(path, index["created_at"])
+        segment.first_ts = index["first_ts"]
+        segment.last_ts = index["last_ts"]
+        segment.count = index["count"]
+        segment.size = index["size"]
+        segment.sparse = [tuple(entry) for entry in index["sparse"]]
+        segment.request_ids = index["request_ids"]
+        segment.sealed = True
+        return segment
+
+class LogStore:
+    """Append-only log segments with a batched background writer and per-segment indexes."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_bytes: Optional[int] = None,
+        segment_seconds: Optional[float] = None,
+        max_segments: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        queue_size: Optional[int] = None,
+        index_stride: Optional[int] = None,
+        registry: Optional[CollectorRegistry] = None,
+    ):
+        """Initialize the store; unset arguments fall back to the LOG_STORE_* variables.
+
+        Args:
+            registry: Prometheus registry for the store's own metrics, if any
+        """
+        self.directory = directory or os.getenv("LOG_STORE_DIR", "./logs")
+        self.segment_bytes = segment_bytes or int(os.getenv("LOG_STORE_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+        self.segment_seconds = segment_seconds or float(os.getenv("LOG_STORE_SEGMENT_SECONDS", "3600"))
+        self.max_segments = max_segments or int(os.getenv("LOG_STORE_MAX_SEGMENTS", "168"))
+        self.batch_size = batch_size or int(os.getenv("LOG_STORE_BATCH_SIZE", "500"))
+        self.flush_interval = flush_interval or float(os.getenv("LOG_STORE_FLUSH_INTERVAL", "1.0"))
+        self.index_stride = index_stride or int(os.getenv("LOG_STORE_INDEX_STRIDE", "64"))
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size or int(os.getenv("LOG_STORE_QUEUE_SIZE", "50000")))
+        self._segments: List[_Segment] = []
+        self._sequence = 0
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.enabled = True
+        self._initialized = False
+
+        self._events = self._queue_depth = self._batch_size = None
+        if registry is not None:
+            self._events = Counter(
+                "log_store_events_total",
+                "Log events handled by the log store, by outcome",
+                ["result"],
+                registry=registry,
+            )
+            self._queue_depth = Gauge(
+                "log_store_queue_depth",
+                "Log events waiting to be written",
+                registry=registry,
+            )
+            self._batch_size = Histogram(
+                "log_store_batch_size",
+                "Log events written per batch",
+                buckets=(1, 5, 10, 50, 100, 250, 500, 1000),
+                registry=registry,
+            )
+
+    def _count(self, result: str, amount: int = 1) -> None:
+        if self._events is not None:
+            self._events.labels(result).inc(amount)
+
+    def initialize(self) -> bool:
+        """Load the existing segments' indexes once; disables the store if the directory is unusable."""
+        if self._initialized:
+            return self.enabled
+        with self._lock:
+            if self._initialized:
+                return self.enabled
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                names = sorted(
+                    (int(match.group(1)), name)
+                    for name in os.listdir(self.directory)
+                    if (match := _SEGMENT_RE.match(name))
+                )
+                for sequence, name in names:
+                    self._segments.append(self._load_segment(os.path.join(self.directory, name)))
+                    self._sequence = sequence + 1
+                logger.info(f"Log store ready at {self.directory} with {len(self._segments)} segments")
+            except OSError as e:
+                logger.error(f"Log store disabled, cannot use {self.directory}: {str(e)}")
+                self.enabled = False
+            self._initialized = True
+        return self.enabled
+
+    def _load_segment(self, path: str) -> _Segment:
+        try:
+            with open(f"{path}.idx", "r", encoding="utf-8") as index_file:
+                return _Segment.from_index(path, json.load(index_file))
+        except (OSError, ValueError, KeyError):
+            pass
+        # No usable index (the server stopped before sealing it): rebuild it from the file
+        segment = _Segment(path, os.path.getmtime(path))
+        with open(path, "rb") as segment_file:
+            offset = 0
+            for line in segment_file:
+                try:
+                    event = json.loads(line)
+                    segment.add(event["ts"], event.get("request_id"), offset, len(line), self.index_stride)
+                except (ValueError, KeyError):
+                    pass
+                offset += len(line)
+        self._seal(segment)
+        return segment
+
+    def _seal(self, segment: _Segment) -> None:
+        """Write a segment's index next to it; the segment is never appended to again."""
+        temporary = f"{segment.path}.idx.tmp"
+        with open(temporary, "w", encoding="utf-8") as index_file:
+            json.dump(segment.to_index(), index_file, separators=(",", ":"))
+        os.replace(temporary, f"{segment.path}.idx")
+        segment.sealed = True
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="log-store-writer", daemon=True)
+                self._writer.start()
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """Queue one log event for writing; never blocks the caller.
+
+        Args:
+            event: JSON-serializable event; ``ts`` (epoch seconds) defaults to now and
+                ``request_id`` is indexed when present
+        """
+        if not self.initialize():
+            return
+        self._ensure_writer()
+        event.setdefault("ts", time.time())
+        try:
+            self._queue.put_nowait(event)
+            if self._queue_depth is not None:
+                self._queue_depth.set(self._queue.qsize())
+        except queue.Full:
+            self._count("dropped")
+
+    def _write_loop(self) -> None:
+        """Writer thread: drain the queue in batches until told to stop."""
+        current: Optional[_Segment] = None
+        handle = None
+        try:
+            stopping = False
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    if current is not None and time.time() - current.created_at >= self.segment_seconds:
+                        handle.close()
+                        self._seal(current)
+                        current, handle = None, None
+                        self._apply_retention()
+                    continue
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if not batch:
+                    continue
+                try:
+                    if current is None:
+                        current, handle = self._open_segment()
+                    self._write_batch(current, handle, batch)
+                    if current.size >= self.segment_bytes or time.time() - current.created_at >= self.segment_seconds:
+                        handle.close()
+                        self._seal(current)
+                        current, handle = None, None
+                        self._apply_retention()
+                except OSError as e:
+                    self._count("error", len(batch))
+                    logger.error(f"Log store failed to write {len(batch)} events: {str(e)}")
+                if self._queue_depth is not None:
+                    self._queue_depth.set(self._queue.qsize())
+        finally:
+            if current is not None:
+                handle.close()
+                try:
+                    self._seal(current)
+                except OSError as e:
+                    logger.error(f"Log store failed to seal {current.path}: {str(e)}")
+
+    def _open_segment(self) -> Tuple[_Segment, Any]:
+        created_at = time.time()
+        name = f"logs-{time.strftime('%Y%m%dT%H%M%S', time.gmtime(created_at))}-{self._sequence:06d}.jsonl"
+        self._sequence += 1
+        segment = _Segment(os.path.join(self.directory, name), created_at)
+        handle = open(segment.path, "ab")
+        with self._lock:
+            self._segments.append(segment)
+        return segment, handle
+
+    def _write_batch(self, segment: _Segment, handle: Any, batch: List[Dict[str, Any]]) -> None:
+        lines = [(event, (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8")) for event in batch]
+        handle.write(b"".join(line for _, line in lines))
+        handle.flush()
+        # Index only after the bytes are in the file, so readers never seek past its end
+        with self._lock:
+            offset = segment.size
+            for event, line in lines:
+                segment.add(event["ts"], event.get("request_id"), offset, len(line), self.index_stride)
+                offset += len(line)
+        self._count("written", len(batch))
+        if self._batch_size is not None:
+            self._batch_size.observe(len(batch))
+
+    def _apply_retention(self) -> None:
+        with self._lock:
+            expired = self._segments[:-self.max_segments] if len(self._segments) > self.max_segments else []
+            self._segments = self._segments[len(expired):]
+        for segment in expired:
+            for path in (segment.path, f"{segment.path}.idx"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def query(
+        self,
+        request_id: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """Events for a request id and/or time range, oldest first.
+
+        Args:
+            request_id: Only events with this request id (looked up in the index)
+            start: Only events at or after this epoch time
+            end: Only events at or before this epoch time
+            limit: Maximum events returned
+
+        Returns:
+            Matching events
+        """
+        if not self.initialize():
+            return []
+        with self._lock:
+            plan = []
+            for segment in self._segments:
+                if not segment.overlaps(start, end):
+                    continue
+                if request_id is not None:
+                    offsets = list(segment.request_ids.get(request_id, ()))
+                    if offsets:
+                        plan.append((segment.path, offsets, None))
+                else:
+                    plan.append((segment.path, None, (segment.start_offset(start), segment.size)))
+
+        events: List[Dict[str, Any]] = []
+        for path, offsets, span in plan:
+            try:
+                for line in self._read(path, offsets, span):
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if start is not None and event["ts"] < start:
+                        continue
+                    if end is not None and event["ts"] > end:
+                        break
+                    events.append(event)
+                    if len(events) >= limit:
+                        return events
+            except FileNotFoundError:
+                # Removed by retention while we were reading
+                continue
+        return events
+
+    @staticmethod
+    def _read(path: str, offsets: Optional[List[int]], span: Optional[Tuple[int, int]]) -> Iterator[bytes]:
+        """Lines at the given offsets, or every line in the byte span."""
+        with open(path, "rb") as segment_file:
+            if offsets is not None:
+                for offset in offsets:
+                    segment_file.seek(offset)
+                    yield segment_file.readline()
+                return
+            position, stop = span
+            segment_file.seek(position)
+            while position < stop:
+                line = segment_file.readline()
+                if not line:
+                    return
+                position += len(line)
+                yield line
+
+    def stats(self) -> Dict[str, Any]:
+        """Segment count, size and time span of the store."""
+        if not self.initialize():
+            return {"enabled": False}
+        with self._lock:
+            segments = [segment for segment in self._segments if segment.count]
+            return {
+                "enabled": True,
+                "directory": self.directory,
+                "segments": len(self._segments),
+                "events": sum(segment.count for segment in segments),
+                "bytes": sum(segment.size for segment in segments),
+                "first_ts": segments[0].first_ts if segments else None,
+                "last_ts": segments[-1].last_ts if segments else None,
+                "queued": self._queue.qsize(),
+            }
+
+    def close(self) -> None:
+        """Write everything still queued, seal the active segment and stop the writer."""
+        if self._writer is None or not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join(timeout=10.0)
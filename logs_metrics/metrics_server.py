@@ -6,9 +6,11 @@ Exposes Prometheus metrics and handles logging visualization with Grafana
 
 import os
 import time
+import asyncio
 import logging
-from typing import Dict, Any
-from fastapi import FastAPI, Request, Response
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import (
     Counter, Histogram, Gauge, 
@@ -19,6 +21,9 @@ import uvicorn
 from pydantic import BaseModel
 import datetime
 
+from log_store import LogStore
+from quantile_sketch import QuantileTracker
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,11 +31,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the log store's indexes before serving and flush it on shutdown"""
+    await asyncio.to_thread(log_store.initialize)
+    yield
+    await asyncio.to_thread(log_store.close)
+
 # Create FastAPI app
 app = FastAPI(
     title="IPL Tweet Generator Metrics",
     description="Prometheus metrics for IPL Tweet Generator",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -75,6 +88,20 @@ api_health = Gauge(
     registry=registry
 )
 
+tweet_generation_time_quantile = Gauge(
+    "tweet_generation_time_quantile_seconds",
+    "Generation time quantiles from rolling sketches, by tweet type and window",
+    ["tweet_type", "window", "quantile"],
+    registry=registry
+)
+
+# Rolling generation-time sketches behind the quantile gauges and /quantiles
+generation_time_sketches = QuantileTracker()
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Log events posted to /logs, written to rotating indexed segments under ./logs
+log_store = LogStore(registry=registry)
+
 # Initialize health as healthy
 api_health.set(1)
 
@@ -124,6 +151,14 @@ async def log_requests(request: Request, call_next):
 @app.get("/metrics")
 async def metrics():
     """Expose Prometheus metrics"""
+    # Refresh the quantile gauges from the sketches; windows that emptied drop out
+    tweet_generation_time_quantile.clear()
+    for tweet_type, windows in generation_time_sketches.summary(QUANTILES).items():
+        for window, stats in windows.items():
+            for q in QUANTILES:
+                value = stats[f"p{q * 100:g}"]
+                if value is not None:
+                    tweet_generation_time_quantile.labels(tweet_type, window, str(q)).set(value)
     return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
 
 # Endpoint to record metrics
@@ -134,6 +169,7 @@ async def record_metrics(payload: MetricsPayload):
     tweet_requests_total.labels(payload.tweet_type).inc()
     tweet_generation_time.labels(payload.tweet_type).observe(payload.generation_time_seconds)
     tweet_characters.labels(payload.tweet_type).observe(payload.characters)
+    generation_time_sketches.observe(payload.tweet_type, payload.generation_time_seconds)
     
     logger.info(
         f"Recorded metrics for request {payload.request_id}: "
@@ -144,6 +180,23 @@ async def record_metrics(payload: MetricsPayload):
     
     return {"status": "success", "recorded_at": datetime.datetime.now().isoformat()}
 
+# Rolling generation-time percentiles
+@app.get("/quantiles")
+async def quantiles(tweet_type: str = None, window: str = None):
+    """Generation time quantiles per tweet type and sliding window"""
+    summary = generation_time_sketches.summary(QUANTILES)
+    if tweet_type:
+        summary = {name: windows for name, windows in summary.items() if name == tweet_type}
+    if window:
+        summary = {name: {label: stats for label, stats in windows.items() if label == window}
+                   for name, windows in summary.items()}
+    return {
+        "metric": "tweet_generation_time_seconds",
+        "relative_accuracy": generation_time_sketches.relative_accuracy,
+        "generated_at": datetime.datetime.now().isoformat(),
+        "quantiles": summary,
+    }
+
 # Endpoint to record logs
 @app.post("/logs")
 async def record_logs(log_event: LogEvent):
@@ -166,9 +219,38 @@ async def record_logs(log_event: LogEvent):
     
     # Log the message
     log_method(log_message, extra=log_event.additional_data or {})
+
+    # Keep it on disk for later queries
+    log_store.record(log_event.dict())
     
     return {"status": "success", "recorded_at": datetime.datetime.now().isoformat()}
 
+# Query stored log events
+@app.get("/logs")
+async def query_logs(
+    request_id: Optional[str] = None,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """Fetch stored log events for a request and/or time range, oldest first"""
+    if not request_id and start is None and end is None:
+        raise HTTPException(status_code=400, detail="Pass request_id, start or end")
+    events = await asyncio.to_thread(
+        log_store.query,
+        request_id=request_id,
+        start=start.timestamp() if start else None,
+        end=end.timestamp() if end else None,
+        limit=limit,
+    )
+    return {"count": len(events), "events": events}
+
+# Log store status
+@app.get("/logs/stats")
+async def log_stats():
+    """Segments, events and time span held by the log store"""
+    return await asyncio.to_thread(log_store.stats)
+
 # Health check endpoint (for the metrics server itself)
 @app.get("/health")
 async def health():
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Quantile Sketches - Rolling percentiles with bounded memory
+
+Fixed Prometheus histogram buckets can't give an accurate p99: everything between
+two bucket bounds is interpolated. These sketches keep counts in logarithmic
+buckets instead (the HDR histogram / DDSketch idea), so every quantile is returned
+within a fixed relative error of the true value, and the number of buckets depends
+only on the range of values seen, never on how many were recorded.
+
+A sliding window is a ring of per-slice sketches; queries merge the slices still
+inside the window and old slices are dropped whole, so a window never holds more
+than ``slices`` sketches.
+
+    QUANTILE_WINDOWS            comma-separated window lengths in seconds (default 60,300,3600)
+    QUANTILE_SLICES             sub-sketches per window (default 12)
+    QUANTILE_RELATIVE_ACCURACY  relative error of every quantile (default 0.01)
+    QUANTILE_MAX_BUCKETS        buckets per sketch before the lowest are merged (default 1024)
+    QUANTILE_MAX_SERIES         distinct tweet types tracked before the rest share "other" (default 50)
+"""
+
+import os
+import math
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Values below this are counted as zero (a generation never takes under a microsecond)
+_MIN_VALUE = 1e-6
+
+def window_label(seconds: float) -> str:
+    """Short label for a window length: 60 -> "1m", 3600 -> "1h"."""
+    for unit, size in (("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+class LogBucketSketch:
+    """Quantile sketch with logarithmic buckets and a fixed relative error."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 1024):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value < 0 or math.isnan(value):
+            return
+        if value < _MIN_VALUE:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self) -> None:
+        """Fold the lowest buckets together; high quantiles keep their accuracy."""
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets
+        folded = sum(self.buckets.pop(index) for index in indexes[:excess])
+        target = indexes[excess]
+        self.buckets[target] += folded
+
+    def merge(self, other: "LogBucketSketch") -> None:
+        """Add another sketch with the same relative accuracy into this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None if the sketch is empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # The true min and max are known exactly; never report past them
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+class SlidingWindowSketch:
+    """Sketch over the last `window` seconds, kept as a ring of time slices."""
+
+    def __init__(self, window: float, slices: int = 12, relative_accuracy: float = 0.01, max_buckets: int = 1024):
+        self.window = window
+        self.slices = slices
+        self.slice_seconds = window / slices
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._ring: Deque[Tuple[int, LogBucketSketch]] = deque()
+
+    def _expire(self, current: int) -> None:
+        while self._ring and self._ring[0][0] <= current - self.slices:
+            self._ring.popleft()
+
+    def add(self, value: float, now: Optional[float] = None) -> None:
+        current = int((now if now is not None else time.time()) // self.slice_seconds)
+        self._expire(current)
+        if not self._ring or self._ring[-1][0] != current:
+            self._ring.append((current, LogBucketSketch(self.relative_accuracy, self.max_buckets)))
+        self._ring[-1][1].add(value)
+
+    def snapshot(self, now: Optional[float] = None) -> LogBucketSketch:
+        """One sketch merging every slice still inside the window."""
+        current = int((now if now is not None else time.time()) // self.slice_seconds)
+        self._expire(current)
+        merged = LogBucketSketch(self.relative_accuracy, self.max_buckets)
+        for _, sketch in self._ring:
+            merged.merge(sketch)
+        return merged
+
+# Series names the tracker reserves: the merge of every type, and the overflow series
+ALL_SERIES = "all"
+OTHER_SERIES = "other"
+
+class QuantileTracker:
+    """Sliding-window sketches of one measurement, per tweet type and window."""
+
+    def __init__(
+        self,
+        windows: Optional[List[float]] = None,
+        slices: Optional[int] = None,
+        relative_accuracy: Optional[float] = None,
+        max_buckets: Optional[int] = None,
+        max_series: Optional[int] = None,
+    ):
+        """Initialize the tracker; unset arguments fall back to the QUANTILE_* variables."""
+        raw = os.getenv("QUANTILE_WINDOWS", "60,300,3600")
+        self.windows = windows or [float(window) for window in raw.split(",") if window.strip()]
+        self.slices = slices or int(os.getenv("QUANTILE_SLICES", "12"))
+        self.relative_accuracy = relative_accuracy or float(os.getenv("QUANTILE_RELATIVE_ACCURACY", "0.01"))
+        self.max_buckets = max_buckets or int(os.getenv("QUANTILE_MAX_BUCKETS", "1024"))
+        self.max_series = max_series or int(os.getenv("QUANTILE_MAX_SERIES", "50"))
+        self._series: Dict[str, Dict[str, SlidingWindowSketch]] = {}
+        self._lock = threading.Lock()
+
+    def _windows_for(self, tweet_type: str) -> Dict[str, SlidingWindowSketch]:
+        # "all" names the merged series in summary(); a tweet type of that name joins "other"
+        if tweet_type == ALL_SERIES:
+            tweet_type = OTHER_SERIES
+        if tweet_type not in self._series:
+            if len(self._series) >= self.max_series:
+                tweet_type = OTHER_SERIES
+            self._series.setdefault(tweet_type, {
+                window_label(window): SlidingWindowSketch(window, self.slices, self.relative_accuracy, self.max_buckets)
+                for window in self.windows
+            })
+        return self._series[tweet_type]
+
+    def observe(self, tweet_type: str, value: float, now: Optional[float] = None) -> None:
+        with self._lock:
+            for sketch in self._windows_for(tweet_type).values():
+                sketch.add(value, now)
+
+    def summary(
+        self,
+        quantiles: Tuple[float, ...] = (0.5, 0.95, 0.99),
+        now: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        """Count, mean, min, max and quantiles per tweet type and window.
+
+        Every tweet type is also merged into an "all" series. Observations for a
+        tweet type named "all" are kept under "other", so the merged series never
+        overwrites them.
+        """
+        with self._lock:
+            merged: Dict[str, Dict[str, LogBucketSketch]] = {}
+            for tweet_type, windows in self._series.items():
+                merged[tweet_type] = {label: sketch.snapshot(now) for label, sketch in windows.items()}
+            total: Dict[str, LogBucketSketch] = {}
+            for windows in merged.values():
+                for label, sketch in windows.items():
+                    total.setdefault(label, LogBucketSketch(self.relative_accuracy, self.max_buckets)).merge(sketch)
+            if merged:
+                merged[ALL_SERIES] = total
+
+        result: Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        for tweet_type, windows in merged.items():
+            result[tweet_type] = {}
+            for label, sketch in windows.items():
+                stats: Dict[str, Optional[float]] = {
+                    "count": sketch.count,
+                    "mean": sketch.sum / sketch.count if sketch.count else None,
+                    "min": sketch.min if sketch.count else None,
+                    "max": sketch.max if sketch.count else None,
+                }
+                for q in quantiles:
+                    stats[f"p{q * 100:g}"] = sketch.quantile(q)
+                result[tweet_type][label] = stats
+        return result
@@ -0,0 +1,75 @@
+"""Writing, rotating, indexing and querying log_store.LogStore segments"""
+
+import os
+
+from prometheus_client import CollectorRegistry
+
+from log_store import LogStore
+
+def _store(directory, **kwargs) -> LogStore:
+    options = {"flush_interval": 0.01, "index_stride": 4, "registry": CollectorRegistry()}
+    options.update(kwargs)
+    return LogStore(str(directory), **options)
+
+def _write(store: LogStore, count: int, start: float = 1000.0) -> None:
+    for index in range(count):
+        store.record({"ts": start + index, "request_id": f"r{index % 3}", "message": f"event {index}"})
+    store.close()
+
+def _segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+def test_query_by_request_id_and_time_range(tmp_path):
+    store = _store(tmp_path)
+    _write(store, 30)
+
+    by_request = store.query(request_id="r1")
+    assert [event["message"] for event in by_request] == [f"event {index}" for index in range(1, 30, 3)]
+    in_range = store.query(start=1010.0, end=1014.0)
+    assert [event["ts"] for event in in_range] == [1010.0, 1011.0, 1012.0, 1013.0, 1014.0]
+    assert len(store.query(limit=7)) == 7
+    assert store.query(request_id="missing") == []
+
+def test_rotation_retention_and_reload_from_the_index(tmp_path):
+    store = _store(tmp_path, segment_bytes=400, max_segments=3, batch_size=1)
+    _write(store, 40)
+    segments = _segments(tmp_path)
+    # The 3 kept after the last rotation, plus the one active until close
+    assert len(segments) == 4
+    assert all(os.path.exists(tmp_path / f"{name}.idx") for name in segments)
+    kept = store.query()
+    assert kept and kept[-1]["message"] == "event 39"
+
+    # A new process finds the same events through the sealed indexes
+    reloaded = _store(tmp_path)
+    assert reloaded.query() == kept
+    assert reloaded.stats()["segments"] == 4
+
+def test_segment_without_an_index_is_reindexed(tmp_path):
+    store = _store(tmp_path)
+    _write(store, 10)
+    (segment,) = _segments(tmp_path)
+    # As if the server stopped before sealing the active segment
+    os.remove(tmp_path / f"{segment}.idx")
+
+    reloaded = _store(tmp_path)
+    assert [event["ts"] for event in reloaded.query(request_id="r2")] == [1002.0, 1005.0, 1008.0]
+    assert os.path.exists(tmp_path / f"{segment}.idx")
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    registry = CollectorRegistry()
+    store = _store(tmp_path, queue_size=1, registry=registry)
+    store.initialize()
+    # No writer yet: only the first event fits in the queue
+    store._ensure_writer = lambda: None
+    for index in range(5):
+        store.record({"ts": 1000.0 + index})
+    assert registry.get_sample_value("log_store_events_total", {"result": "dropped"}) == 4
+
+def test_unusable_directory_disables_the_store(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    store = _store(blocker / "logs")
+    store.record({"ts": 1.0})
+    assert store.query() == []
+    assert store.stats() == {"enabled": False}
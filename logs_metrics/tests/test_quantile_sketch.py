@@ -0,0 +1,92 @@
+"""Accuracy, merging and windowing of the quantile sketches"""
+
+import math
+import random
+
+import pytest
+
+from quantile_sketch import LogBucketSketch, QuantileTracker, SlidingWindowSketch, window_label
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+@pytest.mark.parametrize("q", [0.0, 0.5, 0.9, 0.95, 0.99, 1.0])
+def test_quantiles_within_the_relative_accuracy(q):
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+    sketch = LogBucketSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    assert sketch.quantile(q) == pytest.approx(_exact(values, q), rel=0.01)
+
+def test_empty_sketch_and_zeros():
+    sketch = LogBucketSketch()
+    assert sketch.quantile(0.5) is None
+    for value in (0.0, 0.0, 0.0, 2.0):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(2.0, rel=0.01)
+
+def test_negative_and_nan_values_are_ignored():
+    sketch = LogBucketSketch()
+    sketch.add(-1.0)
+    sketch.add(float("nan"))
+    assert sketch.count == 0
+
+def test_merge_equals_one_sketch_of_everything():
+    rng = random.Random(3)
+    left, right, both = LogBucketSketch(), LogBucketSketch(), LogBucketSketch()
+    for index in range(5000):
+        value = rng.expovariate(1.0)
+        (left if index % 2 else right).add(value)
+        both.add(value)
+    left.merge(right)
+    assert left.count == both.count and left.buckets == both.buckets
+    for q in (0.5, 0.99):
+        assert left.quantile(q) == both.quantile(q)
+
+def test_bucket_bound_keeps_high_quantiles_accurate():
+    values = [10 ** (exponent / 100) for exponent in range(-400, 400)]
+    sketch = LogBucketSketch(relative_accuracy=0.01, max_buckets=64)
+    for value in values:
+        sketch.add(value)
+    assert len(sketch.buckets) <= 64
+    assert sketch.quantile(0.99) == pytest.approx(_exact(values, 0.99), rel=0.01)
+
+def test_sliding_window_drops_old_slices():
+    window = SlidingWindowSketch(window=60, slices=6)
+    window.add(100.0, now=0)
+    window.add(1.0, now=55)
+    assert window.snapshot(now=59).count == 2
+    assert window.snapshot(now=65).count == 1
+    assert window.snapshot(now=125).count == 0
+    assert len(window._ring) <= 6
+
+def test_tracker_summary_per_type_and_all():
+    tracker = QuantileTracker(windows=[60, 3600], slices=6, max_series=2)
+    for value in (1.0, 2.0, 3.0):
+        tracker.observe("standard", value, now=1000)
+    tracker.observe("one_liner", 10.0, now=1000)
+    # Types beyond max_series share the "other" series
+    tracker.observe("thread", 20.0, now=1000)
+    tracker.observe("poll", 30.0, now=1000)
+    summary = tracker.summary(now=1001)
+    assert set(summary) == {"standard", "one_liner", "other", "all"}
+    assert summary["standard"]["1m"]["count"] == 3
+    assert summary["standard"]["1m"]["p50"] == pytest.approx(2.0, rel=0.01)
+    assert summary["other"]["1m"]["count"] == 2
+    assert summary["all"]["1h"]["count"] == 6
+    assert summary["all"]["1h"]["max"] == 30.0
+
+@pytest.mark.parametrize("seconds, label", [(60, "1m"), (300, "5m"), (3600, "1h"), (90, "90s"), (7200, "2h")])
+def test_window_label(seconds, label):
+    assert window_label(seconds) == label
+
+def test_tweet_type_named_all_is_not_overwritten_by_the_merge():
+    tracker = QuantileTracker(windows=[60], slices=6)
+    tracker.observe("standard", 1.0, now=1000)
+    tracker.observe("all", 5.0, now=1000)
+    summary = tracker.summary(now=1001)
+    assert summary["other"]["1m"]["count"] == 1
+    assert summary["all"]["1m"]["count"] == 2
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+JSON Logging - Structured logs written off the event loop
+
+``setup_logging`` replaces the root logger's handlers with a ``QueueHandler``: a
+log call only copies the record onto a bounded in-memory queue, and a
+``QueueListener`` thread formats it (exception tracebacks included) as one JSON
+object per line and writes it to stdout. A slow or blocked stdout therefore never
+stalls a request. When the queue is full, records are dropped and counted instead
+of waiting.
+
+INFO and DEBUG records can be sampled with ``LOG_INFO_SAMPLE_RATE``. Records that
+carry a ``request_id`` (``logger.info(..., extra={"request_id": ...})``) are kept
+or dropped per request, so a sampled request keeps all of its lines. Warnings and
+errors are never sampled. Extra fields passed with ``extra=`` become JSON keys.
+
+The agent has an identical copy of this module (agent/json_logging.py), because
+each service is built from its own directory.
+
+    LOG_LEVEL               minimum level (default INFO)
+    LOG_FORMAT              json or text (default json)
+    LOG_INFO_SAMPLE_RATE    share of INFO/DEBUG records kept, 0..1 (default 1.0)
+    LOG_QUEUE_SIZE          records buffered before new ones are dropped (default 10000)
+"""
+
+import os
+import sys
+import json
+import copy
+import time
+import queue
+import atexit
+import random
+import logging
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with extra fields as keys."""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "service": self.service,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class InfoSampler(logging.Filter):
+    """Keep a share of INFO/DEBUG records; all of a request's records or none."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno > logging.INFO:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            keep = zlib.crc32(str(request_id).encode("utf-8")) % 10000 < self.rate * 10000
+        else:
+            keep = random.random() < self.rate
+        if not keep:
+            self.sampled_out += 1
+        return keep
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that hands records over unformatted and drops them when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting (and the traceback) happens on the listener thread; only freeze
+        # the message here, since its arguments may change after the call returns
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[InfoSampler] = None
+
+def setup_logging(service: str, level: Optional[str] = None) -> None:
+    """Route the root logger through a background queue listener; safe to call twice.
+
+    Args:
+        service: Service name added to every record
+        level: Minimum level; defaults to LOG_LEVEL
+    """
+    global _listener, _handler, _sampler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        output.setFormatter(JsonFormatter(service))
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    _sampler = InfoSampler(float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0")))
+    _handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    """Write out everything still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats() -> Dict[str, int]:
+    """Records dropped because the queue was full, and INFO records sampled out."""
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "sampled_out": _sampler.sampled_out if _sampler else 0,
+    }
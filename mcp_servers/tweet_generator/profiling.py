@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""
+Request Profiling - Profile a single request on demand
+
+When ``PROFILING_ENABLED`` is true, a request that asks for it (``X-Profile`` header
+or ``?profile=`` query flag on ``/v1/tweets``, ``profile`` field on the MCP tools)
+is profiled from start to finish and the profile is stored under ``PROFILING_DIR``.
+With ``PROFILING_TOKEN`` set, the flag must carry that token. When profiling is
+disabled nothing is started and the only cost is one attribute check.
+
+Two modes:
+
+    sample    a background thread records the event loop thread's stack every
+              PROFILING_INTERVAL seconds and writes collapsed stacks
+              (``<id>.folded``, one "frame;frame;frame count" line per stack) for
+              flamegraph.pl, speedscope or inferno
+    cprofile  deterministic cProfile of the event loop thread, written as
+              ``<id>.prof`` for pstats, snakeviz or flameprof
+
+Both see everything running on the event loop thread while the request is in
+flight, so profile on a quiet instance. Only one request is profiled at a time;
+others that ask while a profile runs are served unprofiled.
+
+The agent has an identical copy of this module (agent/profiling.py), because each
+service is built from its own directory.
+
+    PROFILING_ENABLED       allow profiling requests (default false)
+    PROFILING_TOKEN         value the profile flag must carry (default: any value)
+    PROFILING_MODE          sample or cprofile (default sample)
+    PROFILING_INTERVAL      seconds between stack samples (default 0.005)
+    PROFILING_DIR           where profiles are stored (default /data/profiles)
+    PROFILING_MAX_FILES     profiles kept before the oldest is deleted (default 50)
+"""
+
+import os
+import re
+import sys
+import time
+import hmac
+import logging
+import cProfile
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_ID_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _StackSampler(threading.Thread):
+    """Counts the collapsed stacks of one thread at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+class ProfileSession:
+    """One running profile; `stop` ends it and `save` writes it out."""
+
+    def __init__(self, profiler: "RequestProfiler", profile_id: str):
+        self.profiler = profiler
+        self.profile_id = profile_id
+        self.mode = profiler.mode
+        self.started = time.perf_counter()
+        self._sampler: Optional[_StackSampler] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        if self.mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), profiler.interval)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop collecting; call on the profiled thread, since cProfile hooks are per thread."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        else:
+            self._sampler.stop()
+
+    def save(self) -> str:
+        """Write the profile out and return its id; blocks on file I/O, so run it in a worker thread."""
+        try:
+            os.makedirs(self.profiler.directory, exist_ok=True)
+            if self._cprofile is not None:
+                self._cprofile.dump_stats(os.path.join(self.profiler.directory, f"{self.profile_id}.prof"))
+            else:
+                self._sampler.join()
+                path = os.path.join(self.profiler.directory, f"{self.profile_id}.folded")
+                with open(path, "w", encoding="utf-8") as folded:
+                    for stack, count in self._sampler.stacks.most_common():
+                        folded.write(f"{stack} {count}\n")
+            self.profiler.prune()
+            logger.info(f"Stored {self.mode} profile {self.profile_id} ({time.perf_counter() - self.started:.2f}s)")
+        except OSError as e:
+            logger.warning(f"Could not store profile {self.profile_id}: {str(e)}")
+        finally:
+            self.profiler.release()
+        return self.profile_id
+
+class RequestProfiler:
+    """Starts at most one request profile at a time, when enabled and asked for."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        token: Optional[str] = None,
+        mode: Optional[str] = None,
+        interval: Optional[float] = None,
+        directory: Optional[str] = None,
+        max_files: Optional[int] = None,
+    ):
+        """Initialize the profiler; unset arguments fall back to the PROFILING_* variables."""
+        self.enabled = enabled if enabled is not None else os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+        self.token = token or os.getenv("PROFILING_TOKEN", "")
+        self.mode = mode or os.getenv("PROFILING_MODE", "sample")
+        self.interval = interval or float(os.getenv("PROFILING_INTERVAL", "0.005"))
+        self.directory = directory or os.getenv("PROFILING_DIR", "/data/profiles")
+        self.max_files = max_files or int(os.getenv("PROFILING_MAX_FILES", "50"))
+        self._running = threading.Lock()
+
+    def authorized(self, flag: Optional[str]) -> bool:
+        """Whether a profile flag (header, query or field value) may use the profiler."""
+        if not self.enabled or not flag:
+            return False
+        if self.token:
+            return hmac.compare_digest(flag, self.token)
+        return flag.lower() not in ("0", "false", "no")
+
+    def start(self, profile_id: str, flag: Optional[str]) -> Optional[ProfileSession]:
+        """Start profiling the current thread if the flag allows it and no profile is running."""
+        if not self.authorized(flag) or not _PROFILE_ID_RE.match(profile_id):
+            return None
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            return ProfileSession(self, profile_id)
+        except Exception:
+            self._running.release()
+            raise
+
+    def release(self) -> None:
+        self._running.release()
+
+    def _files(self) -> List[str]:
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith((".folded", ".prof"))]
+        except FileNotFoundError:
+            return []
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+
+    def prune(self) -> None:
+        """Delete the oldest profiles beyond PROFILING_MAX_FILES."""
+        files = self._files()
+        for name in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[Dict[str, object]]:
+        """Stored profiles, newest first."""
+        profiles = []
+        for name in reversed(self._files()):
+            path = os.path.join(self.directory, name)
+            profile_id, _, extension = name.rpartition(".")
+            profiles.append({
+                "profile_id": profile_id,
+                "format": extension,
+                "bytes": os.path.getsize(path),
+                "created_at": os.path.getmtime(path),
+            })
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """File holding a stored profile, or None."""
+        if not _PROFILE_ID_RE.match(profile_id):
+            return None
+        for extension in ("folded", "prof"):
+            path = os.path.join(self.directory, f"{profile_id}.{extension}")
+            if os.path.exists(path):
+                return path
+        return None
+
+# One profiler per process; cProfile and the sampler both cover the whole event loop
+request_profiler = RequestProfiler()
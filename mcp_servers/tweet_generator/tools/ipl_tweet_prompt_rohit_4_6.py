@@ -2,21 +2,12 @@
 IPL Tweet Prompt - Specialized for Rohit Sharma's Fours and Sixes
 """
 
-class RohitSharmaIPLTweetPrompt:
-    """Class that contains viral IPL tweet prompt templates specifically for Rohit Sharma"""
-    
-    @staticmethod
-    def get_viral_prompt_rohit_sharma_4_6(content_dump: str) -> str:
-        """
-        Returns the full viral tweet generation prompt for Rohit Sharma's boundaries
-        
-        Args:
-            content_dump: Information about Rohit Sharma's four or six
-            
-        Returns:
-            Complete prompt for generating viral IPL tweets for Rohit Sharma
-        """
-        return f"""
+import hashlib
+from typing import Dict
+
+# Raw templates. ``{content_dump}`` is the only placeholder, so the same text can be
+# rendered here or shipped to clients (as MCP resources/prompts) and rendered there.
+VIRAL_TEMPLATE_ROHIT_SHARMA_4_6 = """
 # Rohit Sharma IPL Boundaries Viral Tweet Generator
 
 <examples_of_viral_posts>
@@ -165,20 +156,9 @@ Use the Rohit Sharma viral formula:
 
 Your task is to analyze Rohit Sharma's specific boundary and generate a viral tweet that captures his unique style and MI legacy.
 Make sure your final tweet is under 280 characters and resonates with Rohit Sharma fans specifically.
-""" 
+"""
 
-    @staticmethod
-    def get_one_liner_prompt_rohit_sharma_4_6(content_dump: str) -> str:
-        """
-        Returns the one-liner viral tweet generation prompt for Rohit Sharma's boundaries
-        
-        Args:
-            content_dump: Information about Rohit Sharma's four or six
-            
-        Returns:
-            Complete prompt for generating one-liner viral IPL tweets for Rohit Sharma
-        """
-        return f"""
+ONE_LINER_TEMPLATE_ROHIT_SHARMA_4_6 = """
 # Rohit Sharma IPL One-Liner Viral Tweet Generator
 
 <examples_of_viral_posts>
@@ -335,4 +315,67 @@ HITMAN, PULLS, ELEGANT, TIMING, VINTAGE, LAZY, EFFORTLESS, CLASSIC, CAPTAIN, BOS
 Your task is to create an ultra-short, punchy viral tweet (7-8 words max) specifically for Rohit Sharma's boundary.
 Include 1-2 Hindi or Marathi words to add cultural connection and authenticity.
 Make sure your final tweet captures Rohit's unique style, uses his nicknames effectively, and follows the formula with max 1-2 emojis.
-"""
\ No newline at end of file
+"""
+
+
+class RohitSharmaIPLTweetPrompt:
+    """Class that contains viral IPL tweet prompt templates specifically for Rohit Sharma"""
+    
+    # Template name -> raw template text
+    TEMPLATES: Dict[str, str] = {
+        "rohit_sharma_boundary_viral": VIRAL_TEMPLATE_ROHIT_SHARMA_4_6,
+        "rohit_sharma_boundary_one_liner": ONE_LINER_TEMPLATE_ROHIT_SHARMA_4_6,
+    }
+    
+    @staticmethod
+    def render(template: str, content_dump: str) -> str:
+        """
+        Fills the content placeholder of a raw template
+        
+        Args:
+            template: Raw template text containing ``{content_dump}``
+            content_dump: Information about Rohit Sharma's four or six
+            
+        Returns:
+            The rendered prompt
+        """
+        return template.replace("{content_dump}", content_dump)
+    
+    @staticmethod
+    def template_version(template: str) -> str:
+        """
+        Returns a short content hash identifying a template revision
+        
+        Args:
+            template: Raw template text
+            
+        Returns:
+            First 16 hex characters of the template's SHA-256 digest
+        """
+        return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    def get_viral_prompt_rohit_sharma_4_6(content_dump: str) -> str:
+        """
+        Returns the full viral tweet generation prompt for Rohit Sharma's boundaries
+        
+        Args:
+            content_dump: Information about Rohit Sharma's four or six
+            
+        Returns:
+            Complete prompt for generating viral IPL tweets for Rohit Sharma
+        """
+        return RohitSharmaIPLTweetPrompt.render(VIRAL_TEMPLATE_ROHIT_SHARMA_4_6, content_dump)
+
+    @staticmethod
+    def get_one_liner_prompt_rohit_sharma_4_6(content_dump: str) -> str:
+        """
+        Returns the one-liner viral tweet generation prompt for Rohit Sharma's boundaries
+        
+        Args:
+            content_dump: Information about Rohit Sharma's four or six
+            
+        Returns:
+            Complete prompt for generating one-liner viral IPL tweets for Rohit Sharma
+        """
+        return RohitSharmaIPLTweetPrompt.render(ONE_LINER_TEMPLATE_ROHIT_SHARMA_4_6, content_dump)
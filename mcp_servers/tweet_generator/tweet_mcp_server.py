@@ -5,6 +5,10 @@ Tweet Generator MCP Server - Provides tweet generation services via MCP protocol
 
 import os
 import sys
+import asyncio
+import json
+import uuid
+import logging
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel
 from mcp.server.fastmcp import FastMCP
@@ -12,6 +16,7 @@ from mcp.server import Server
 from dotenv import load_dotenv
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse
 from starlette.routing import Mount, Route
 from mcp.server.sse import SseServerTransport
 import uvicorn
@@ -19,20 +24,54 @@ import uvicorn
 # Import the IPL tweet prompt tool
 from tools.ipl_tweet_prompt_rohit_4_6 import RohitSharmaIPLTweetPrompt
 
+# Structured JSON logs, written by a background thread
+from json_logging import setup_logging
+
+# Opt-in profiling of single tool calls
+from profiling import ProfileSession, request_profiler
+
 # Load environment variables
 load_dotenv()
 
+setup_logging("tweet-mcp")
+logger = logging.getLogger(__name__)
+
 # Create MCP server
 mcp = FastMCP("TweetTools")
 
 class IPLTweetPromptRequest(BaseModel):
     """Request model for IPL viral tweet prompt"""
     content_dump: str
+    profile: Optional[str] = None
 
 class IPLTweetPromptResponse(BaseModel):
     """Response model for IPL viral tweet prompt"""
     prompt: str
+    template_version: Optional[str] = None
     error: Optional[str] = None
+    profile_id: Optional[str] = None
+
+# Tool/prompt name -> template name in RohitSharmaIPLTweetPrompt.TEMPLATES
+VIRAL_TEMPLATE_NAME = "rohit_sharma_boundary_viral"
+ONE_LINER_TEMPLATE_NAME = "rohit_sharma_boundary_one_liner"
+
+TEMPLATE_URI_PREFIX = "tweet-templates://"
+
+def _template_version(name: str) -> str:
+    """Content hash of the current revision of a template."""
+    return RohitSharmaIPLTweetPrompt.template_version(RohitSharmaIPLTweetPrompt.TEMPLATES[name])
+
+def _start_profile(request: IPLTweetPromptRequest) -> Optional[ProfileSession]:
+    """Profile this tool call if profiling is enabled and the request asks for it."""
+    if not request_profiler.enabled:
+        return None
+    return request_profiler.start(f"mcp-{uuid.uuid4().hex[:12]}", request.profile)
+
+async def _finish_profile(profile: Optional[ProfileSession], response: IPLTweetPromptResponse) -> IPLTweetPromptResponse:
+    if profile is not None:
+        profile.stop()
+        response.profile_id = await asyncio.to_thread(profile.save)
+    return response
 
 @mcp.tool()
 async def get_rohit_sharma_boundary_viral_tweet_prompt(request: IPLTweetPromptRequest) -> IPLTweetPromptResponse:
@@ -45,24 +84,24 @@ async def get_rohit_sharma_boundary_viral_tweet_prompt(request: IPLTweetPromptRe
     Returns:
         An object containing the complete structured prompt for generating viral tweets about Rohit's boundaries.
     """
+    profile = _start_profile(request)
     try:
         # Get the full prompt from the prompt tool
         prompt = RohitSharmaIPLTweetPrompt.get_viral_prompt_rohit_sharma_4_6(request.content_dump)
         
-        print(f"Generated Rohit Sharma boundary viral tweet prompt for: {request.content_dump[:50]}...")
-        return IPLTweetPromptResponse(
-            prompt=prompt
-        )
+        logger.info(f"Generated Rohit Sharma boundary viral tweet prompt for: {request.content_dump[:50]}...")
+        return await _finish_profile(profile, IPLTweetPromptResponse(
+            prompt=prompt,
+            template_version=_template_version(VIRAL_TEMPLATE_NAME)
+        ))
         
     except Exception as e:
         error_msg = f"Error generating prompt: {str(e)}"
-        print(error_msg)
-        import traceback
-        print(traceback.format_exc())
-        return IPLTweetPromptResponse(
+        logger.exception(error_msg)
+        return await _finish_profile(profile, IPLTweetPromptResponse(
             prompt="",
             error=error_msg
-        )
+        ))
 
 @mcp.tool()
 async def get_rohit_sharma_boundary_one_liner_tweet_prompt(request: IPLTweetPromptRequest) -> IPLTweetPromptResponse:
@@ -75,24 +114,81 @@ async def get_rohit_sharma_boundary_one_liner_tweet_prompt(request: IPLTweetProm
     Returns:
         An object containing the complete structured prompt for generating one-liner viral tweets about Rohit's boundaries.
     """
+    profile = _start_profile(request)
     try:
         # Get the one-liner prompt from the prompt tool
         prompt = RohitSharmaIPLTweetPrompt.get_one_liner_prompt_rohit_sharma_4_6(request.content_dump)
         
-        print(f"Generated Rohit Sharma boundary one-liner tweet prompt for: {request.content_dump[:50]}...")
-        return IPLTweetPromptResponse(
-            prompt=prompt
-        )
+        logger.info(f"Generated Rohit Sharma boundary one-liner tweet prompt for: {request.content_dump[:50]}...")
+        return await _finish_profile(profile, IPLTweetPromptResponse(
+            prompt=prompt,
+            template_version=_template_version(ONE_LINER_TEMPLATE_NAME)
+        ))
         
     except Exception as e:
         error_msg = f"Error generating one-liner prompt: {str(e)}"
-        print(error_msg)
-        import traceback
-        print(traceback.format_exc())
-        return IPLTweetPromptResponse(
+        logger.exception(error_msg)
+        return await _finish_profile(profile, IPLTweetPromptResponse(
             prompt="",
             error=error_msg
-        )
+        ))
+
+@mcp.resource(
+    f"{TEMPLATE_URI_PREFIX}manifest",
+    name="tweet_template_manifest",
+    description="Names, content hashes and URIs of all raw tweet prompt templates",
+    mime_type="application/json",
+)
+async def get_template_manifest() -> str:
+    """
+    List the raw prompt templates with their current content hash.
+    
+    Clients poll this small document and only re-read a template resource when its
+    version changes, then render it locally by substituting ``{content_dump}``.
+    """
+    manifest = {
+        name: {
+            "version": RohitSharmaIPLTweetPrompt.template_version(template),
+            "uri": f"{TEMPLATE_URI_PREFIX}{name}",
+            "placeholder": "{content_dump}",
+            "size": len(template.encode("utf-8")),
+        }
+        for name, template in RohitSharmaIPLTweetPrompt.TEMPLATES.items()
+    }
+    return json.dumps({"templates": manifest})
+
+@mcp.resource(
+    TEMPLATE_URI_PREFIX + "{name}",
+    name="tweet_template",
+    description="Raw prompt template text; substitute {content_dump} to render it",
+    mime_type="text/plain",
+)
+async def get_template(name: str) -> str:
+    """
+    Return the raw (unrendered) text of a prompt template.
+    
+    Args:
+        name: Template name as listed in the manifest
+    """
+    if name not in RohitSharmaIPLTweetPrompt.TEMPLATES:
+        raise ValueError(f"Unknown tweet template: {name}")
+    return RohitSharmaIPLTweetPrompt.TEMPLATES[name]
+
+@mcp.prompt(
+    name=VIRAL_TEMPLATE_NAME,
+    description=f"Viral tweet prompt for Rohit Sharma's boundaries (version {_template_version(VIRAL_TEMPLATE_NAME)})",
+)
+def rohit_sharma_boundary_viral_prompt(content_dump: str) -> str:
+    """Render the viral tweet template for a cricket moment."""
+    return RohitSharmaIPLTweetPrompt.get_viral_prompt_rohit_sharma_4_6(content_dump)
+
+@mcp.prompt(
+    name=ONE_LINER_TEMPLATE_NAME,
+    description=f"One-liner tweet prompt for Rohit Sharma's boundaries (version {_template_version(ONE_LINER_TEMPLATE_NAME)})",
+)
+def rohit_sharma_boundary_one_liner_prompt(content_dump: str) -> str:
+    """Render the one-liner tweet template for a cricket moment."""
+    return RohitSharmaIPLTweetPrompt.get_one_liner_prompt_rohit_sharma_4_6(content_dump)
 
 def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
     """Create a Starlette app with SSE transport for the MCP server."""
@@ -111,10 +207,20 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
                 mcp_server.create_initialization_options(),
             )
 
+    async def handle_profile(request: Request):
+        """Download a stored tool-call profile (needs the profiling token in X-Profile)"""
+        if not request_profiler.authorized(request.headers.get("X-Profile") or request.query_params.get("profile")):
+            return JSONResponse({"detail": "Profiling is disabled or the token is wrong"}, status_code=403)
+        path = request_profiler.path(request.path_params["profile_id"])
+        if path is None:
+            return JSONResponse({"detail": "No such profile"}, status_code=404)
+        return FileResponse(path, filename=os.path.basename(path))
+
     return Starlette(
         debug=debug,
         routes=[
             Route("/sse", endpoint=handle_sse),
+            Route("/profiles/{profile_id}", endpoint=handle_profile),
             Mount("/messages/", app=sse.handle_post_message),
         ],
     )
@@ -132,8 +238,8 @@ def main():
     
     args = parser.parse_args()
     
-    print(f"Starting Tweet Generator MCP Server on {args.host}:{args.port}")
-    print(f"Server-Sent Events endpoint: http://{args.host}:{args.port}/sse")
+    logger.info(f"Starting Tweet Generator MCP Server on {args.host}:{args.port}")
+    logger.info(f"Server-Sent Events endpoint: http://{args.host}:{args.port}/sse")
     
     # Create Starlette app with SSE transport
     starlette_app = create_starlette_app(mcp_server, debug=True)